@@ -2,12 +2,17 @@
 from __future__ import annotations
 
 import datetime as dt
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Annotated
 
+import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jwt import InvalidTokenError
 from passlib.context import CryptContext
 
 from config import settings
@@ -24,32 +29,46 @@ class User:
 
 
 _USERS: dict[str, dict] = {
-    # Password hashes are computed at process start for MVP simplicity (avoid storing hashes in repo).
-    settings.commissioner_username: {
-        "password_hash": pwd_context.hash(settings.commissioner_password),
-        "role": "commissioner",
-    },
-    settings.admin_username: {
-        "password_hash": pwd_context.hash(settings.admin_password),
-        "role": "admin",
-    },
-    settings.it_head_username: {
-        "password_hash": pwd_context.hash(settings.it_head_password),
-        "role": "it_head",
-    },
+    # Hashes are derived from the configured passwords on first login (see _password_hash), not at import:
+    # pbkdf2 is deliberately slow and would otherwise run on every worker start and dev reload.
+    settings.commissioner_username: {"password": settings.commissioner_password, "role": "commissioner"},
+    settings.admin_username: {"password": settings.admin_password, "role": "admin"},
+    settings.it_head_username: {"password": settings.it_head_password, "role": "it_head"},
 }
+_hash_lock = threading.Lock()
+
+
+def _password_hash(record: dict) -> str:
+    h = record.get("password_hash")
+    if h is None:
+        with _hash_lock:
+            h = record.get("password_hash")
+            if h is None:
+                h = record["password_hash"] = pwd_context.hash(record["password"])
+    return h
 
 
 def verify_password(plain_password: str, password_hash: str) -> bool:
     return pwd_context.verify(plain_password, password_hash)
 
 
+# Successful logins, keyed by (username, sha256(password)) -> monotonic expiry, so repeated logins with the
+# same credentials skip pbkdf2 for a while. Only successes are recorded (a wrong password always pays the
+# full verify), which also bounds the dict to one entry per configured user.
+_VERIFIED_TTL_S = 300.0
+_verified: dict[tuple[str, str], float] = {}
+
+
 def authenticate_user(username: str, password: str) -> User | None:
     record = _USERS.get(username)
     if not record:
         return None
-    if not verify_password(password, record["password_hash"]):
-        return None
+    key = (username, hashlib.sha256(password.encode("utf-8")).hexdigest())
+    now = time.monotonic()
+    if _verified.get(key, 0.0) <= now:
+        if not verify_password(password, _password_hash(record)):
+            return None
+        _verified[key] = now + _VERIFIED_TTL_S
     return User(username=username, role=record["role"])
 
 
@@ -59,16 +78,38 @@ def create_access_token(*, sub: str, role: str) -> str:
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
 
 
+# Decoded tokens, keyed by the raw token string. Dashboards send the same bearer token on every call, so
+# the signature check + payload parse runs once per token. Tokens are immutable and there is no revocation,
+# so an entry lives until the token's exp (LRU-bounded); tokens without a numeric exp get a short TTL.
+_TOKEN_CACHE_TTL_S = 60.0
+_TOKEN_CACHE_MAX = 4096
+_token_cache: OrderedDict[str, tuple[float, User]] = OrderedDict()
+_token_lock = threading.Lock()
+
+
 def decode_token(token: str) -> User:
+    now = time.time()
+    with _token_lock:
+        hit = _token_cache.get(token)
+        if hit and now < hit[0]:
+            _token_cache.move_to_end(token)
+            return hit[1]
     try:
         payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
         username = payload.get("sub")
         role = payload.get("role")
         if not username or not role:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-        return User(username=username, role=role)
-    except JWTError as e:
+        user = User(username=username, role=role)
+    except InvalidTokenError as e:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token") from e
+    exp = payload.get("exp")
+    expires_at = float(exp) if isinstance(exp, (int, float)) else now + _TOKEN_CACHE_TTL_S
+    with _token_lock:
+        _token_cache[token] = (expires_at, user)
+        while len(_token_cache) > _TOKEN_CACHE_MAX:
+            _token_cache.popitem(last=False)
+    return user
 
 
 def get_current_user(token: Annotated[str | None, Depends(oauth2_scheme)]) -> User:
@@ -16,56 +16,78 @@ except Exception:
     pass
 from dataclasses import dataclass
 
+# Snapshot the process environment once (after .env is loaded); every setting resolves against this dict.
+_env: dict[str, str] = dict(os.environ)
+
+
+def _first(*names: str, default: str | None = None) -> str | None:
+    # First non-missing env var wins (used for legacy/alias variable names).
+    for name in names:
+        if name in _env:
+            return _env[name]
+    return default
+
+
+def _flag(name: str, default: str) -> bool:
+    return _env.get(name, default).lower() in ("1", "true", "yes")
+
 
 def _get_env(name: str, default: str | None = None) -> str:
-    val = os.getenv(name, default)
+    val = _env.get(name, default)
     if val is None or val == "":
         raise RuntimeError(f"Missing required environment variable: {name}")
     return val
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Settings:
     app_name: str = "CGDA Backend"
-    env: str = os.getenv("APP_ENV", os.getenv("ENV", "local"))
+    env: str = _first("APP_ENV", "ENV", default="local")
 
-    jwt_secret: str = os.getenv("JWT_SECRET", "dev-secret")
-    jwt_algorithm: str = os.getenv("JWT_ALGORITHM", "HS256")
-    jwt_exp_minutes: int = int(os.getenv("JWT_EXP_MINUTES", "480"))
+    jwt_secret: str = _env.get("JWT_SECRET", "dev-secret")
+    jwt_algorithm: str = _env.get("JWT_ALGORITHM", "HS256")
+    jwt_exp_minutes: int = int(_env.get("JWT_EXP_MINUTES", "480"))
 
     # Auth toggle (temporary): set true to bypass login/JWT checks and allow all API access.
     # Intended for internal demos / iframe embedding during early integration.
-    disable_auth: bool = os.getenv("DISABLE_AUTH", "true").lower() in ("1", "true", "yes")
+    disable_auth: bool = _flag("DISABLE_AUTH", "true")
 
-    cors_origins: str = os.getenv("CORS_ORIGINS", "http://localhost:3000")
+    cors_origins: str = _env.get("CORS_ORIGINS", "http://localhost:3000")
 
-    database_url: str = os.getenv("DATABASE_URL", "sqlite:///./cgda.db")
+    database_url: str = _env.get("DATABASE_URL", "sqlite:///./cgda.db")
+    # Connection pool sizing (in-memory SQLite uses a single shared connection instead, see database.py).
+    # The request threadpool is sized below pool_size + max_overflow (main.py), leaving room for read fan-out
+    # and background jobs.
+    db_pool_size: int = int(_env.get("DB_POOL_SIZE", "10"))
+    db_max_overflow: int = int(_env.get("DB_MAX_OVERFLOW", "20"))
+    db_pool_timeout_s: int = int(_env.get("DB_POOL_TIMEOUT_S", "30"))
+    db_pool_recycle_s: int = int(_env.get("DB_POOL_RECYCLE_S", "1800"))
 
     # Basic users (demo, MVP) — defaults are safe for local demo
-    commissioner_username: str = os.getenv("COMMISSIONER_USERNAME", "commissioner")
-    commissioner_password: str = os.getenv("COMMISSIONER_PASSWORD", "commissioner123")
-    admin_username: str = os.getenv("ADMIN_USER", os.getenv("ADMIN_USERNAME", "admin"))
-    admin_password: str = os.getenv("ADMIN_PASS", os.getenv("ADMIN_PASSWORD", "admin123"))
-    it_head_username: str = os.getenv("IT_HEAD_USERNAME", "it_head")
-    it_head_password: str = os.getenv("IT_HEAD_PASSWORD", "ithead123")
+    commissioner_username: str = _env.get("COMMISSIONER_USERNAME", "commissioner")
+    commissioner_password: str = _env.get("COMMISSIONER_PASSWORD", "commissioner123")
+    admin_username: str = _first("ADMIN_USER", "ADMIN_USERNAME", default="admin")
+    admin_password: str = _first("ADMIN_PASS", "ADMIN_PASSWORD", default="admin123")
+    it_head_username: str = _env.get("IT_HEAD_USERNAME", "it_head")
+    it_head_password: str = _env.get("IT_HEAD_PASSWORD", "ithead123")
 
     # Data paths (mounted via docker-compose). Defaults are absolute under repo root,
     # so running scripts from any cwd still works.
-    data_raw_dir: str = os.getenv("DATA_RAW_DIR", str((repo_root / "data/raw").resolve()))
+    data_raw_dir: str = _env.get("DATA_RAW_DIR", str((repo_root / "data/raw").resolve()))
     # Optional additional input folder used for new exports with extra columns (e.g., raw2).
-    data_raw2_dir: str = os.getenv("DATA_RAW2_DIR", str((repo_root / "data/raw2").resolve()))
+    data_raw2_dir: str = _env.get("DATA_RAW2_DIR", str((repo_root / "data/raw2").resolve()))
     # Optional delta input folder (e.g., raw3 extra grievances).
-    data_raw3_dir: str = os.getenv("DATA_RAW3_DIR", str((repo_root / "data/raw3").resolve()))
+    data_raw3_dir: str = _env.get("DATA_RAW3_DIR", str((repo_root / "data/raw3").resolve()))
     # Optional additional Excel dump folder (e.g., raw4 with "Details" sheet).
-    data_raw4_dir: str = os.getenv("DATA_RAW4_DIR", str((repo_root / "data/raw4").resolve()))
-    data_processed_dir: str = os.getenv("DATA_PROCESSED_DIR", str((repo_root / "data/processed").resolve()))
-    data_runs_dir: str = os.getenv("DATA_RUNS_DIR", str((repo_root / "data/runs").resolve()))
+    data_raw4_dir: str = _env.get("DATA_RAW4_DIR", str((repo_root / "data/raw4").resolve()))
+    data_processed_dir: str = _env.get("DATA_PROCESSED_DIR", str((repo_root / "data/processed").resolve()))
+    data_runs_dir: str = _env.get("DATA_RUNS_DIR", str((repo_root / "data/runs").resolve()))
     # Batch pipeline outputs (Gemini results parquet/csv)
-    data_outputs_dir: str = os.getenv("DATA_OUTPUTS_DIR", str((repo_root / "data/outputs").resolve()))
+    data_outputs_dir: str = _env.get("DATA_OUTPUTS_DIR", str((repo_root / "data/outputs").resolve()))
     # New file-based pipeline folders
-    data_preprocess_dir: str = os.getenv("DATA_PREPROCESS_DIR", str((repo_root / "data/preprocess").resolve()))
-    data_stage_dir: str = os.getenv("DATA_STAGE_DIR", str((repo_root / "data/stage_data").resolve()))
-    data_ai_outputs_dir: str = os.getenv("DATA_AI_OUTPUTS_DIR", str((repo_root / "data/ai_outputs").resolve()))
+    data_preprocess_dir: str = _env.get("DATA_PREPROCESS_DIR", str((repo_root / "data/preprocess").resolve()))
+    data_stage_dir: str = _env.get("DATA_STAGE_DIR", str((repo_root / "data/stage_data").resolve()))
+    data_ai_outputs_dir: str = _env.get("DATA_AI_OUTPUTS_DIR", str((repo_root / "data/ai_outputs").resolve()))
 
     # AI (Gemini) — models/config are fully controlled via env (no hardcoding in callers).
     # New preferred env vars:
@@ -74,35 +96,34 @@ class Settings:
     #
     # Backwards compatibility:
     # - GEMINI_MODEL_DEFAULT maps to PRIMARY if PRIMARY not set
-    gemini_api_key: str | None = os.getenv("GEMINI_API_KEY")
-    gemini_model_primary: str = os.getenv(
-        "GEMINI_MODEL_PRIMARY",
-        os.getenv("GEMINI_MODEL_DEFAULT", "gemini-3-pro"),
-    )
-    gemini_model_fallback: str = os.getenv("GEMINI_MODEL_FALLBACK", "gemini-3-flash")
-    gemini_temperature: float = float(os.getenv("GEMINI_TEMPERATURE", "0.1"))
-    gemini_max_output_tokens: int = int(os.getenv("GEMINI_MAX_OUTPUT_TOKENS", "256"))
+    gemini_api_key: str | None = _env.get("GEMINI_API_KEY")
+    gemini_model_primary: str = _first("GEMINI_MODEL_PRIMARY", "GEMINI_MODEL_DEFAULT", default="gemini-3-pro")
+    gemini_model_fallback: str = _env.get("GEMINI_MODEL_FALLBACK", "gemini-3-flash")
+    gemini_temperature: float = float(_env.get("GEMINI_TEMPERATURE", "0.1"))
+    gemini_max_output_tokens: int = int(_env.get("GEMINI_MAX_OUTPUT_TOKENS", "256"))
     # Network + reliability tuning for Gemini (keeps UI responsive under bad connectivity).
-    gemini_timeout_s: int = int(os.getenv("GEMINI_TIMEOUT_S", "20"))
+    gemini_timeout_s: int = int(_env.get("GEMINI_TIMEOUT_S", "20"))
     # Attempts per model (includes the initial try). Total attempts = attempts_per_model * number_of_models.
-    gemini_attempts_per_model: int = int(os.getenv("GEMINI_ATTEMPTS_PER_MODEL", "2"))
-    gemini_endpoint: str = os.getenv(
+    gemini_attempts_per_model: int = int(_env.get("GEMINI_ATTEMPTS_PER_MODEL", "2"))
+    # Max in-flight Gemini requests when a batch of records is structured (see AIService.structure_grievances_batch).
+    gemini_concurrency: int = int(_env.get("GEMINI_CONCURRENCY", "8"))
+    gemini_endpoint: str = _env.get(
         "GEMINI_ENDPOINT",
         "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent",
     )
 
     # Seeding
-    seed_sample_data: bool = os.getenv("SEED_SAMPLE_DATA", "true").lower() in ("1", "true", "yes")
-    sample_csv_path: str = os.getenv("SAMPLE_CSV_PATH", "../data/raw/sample_grievances.csv")
+    seed_sample_data: bool = _flag("SEED_SAMPLE_DATA", "true")
+    sample_csv_path: str = _env.get("SAMPLE_CSV_PATH", "../data/raw/sample_grievances.csv")
 
-    recreate_db_on_startup: bool = os.getenv("RECREATE_DB_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+    recreate_db_on_startup: bool = _flag("RECREATE_DB_ON_STARTUP", "false")
 
     # Auto-preload (localhost UX): preprocess quickly and then enrich a bounded number of rows in background.
-    auto_preload_on_startup: bool = os.getenv("AUTO_PRELOAD_ON_STARTUP", "true").lower() in ("1", "true", "yes")
-    auto_preload_limit: int = int(os.getenv("AUTO_PRELOAD_LIMIT", "100"))
+    auto_preload_on_startup: bool = _flag("AUTO_PRELOAD_ON_STARTUP", "true")
+    auto_preload_limit: int = int(_env.get("AUTO_PRELOAD_LIMIT", "100"))
     # File-pipeline staging: how many rows to clone into the fixed demo source `processed_data_500`.
     # Setting this to 5 is the easiest way to make the app run on only 5 Gemini-enriched records.
-    auto_stage_rows: int = int(os.getenv("AUTO_STAGE_ROWS", "500"))
+    auto_stage_rows: int = int(_env.get("AUTO_STAGE_ROWS", "500"))
 
 
 settings = Settings()
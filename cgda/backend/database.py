@@ -5,6 +5,7 @@ from contextlib import contextmanager
 from sqlalchemy import event
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from config import settings
 
@@ -16,10 +17,35 @@ def _sqlite_connect_args(url: str) -> dict:
     return {}
 
 
+def _pool_args(url: str) -> dict:
+    if url.startswith("sqlite:"):
+        # In-memory SQLite only exists on a single connection; share it across threads.
+        if url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url:
+            return {"poolclass": StaticPool}
+        # File SQLite: QueuePool so per-connection PRAGMAs run once, not per checkout. Sized from settings like
+        # server pools (not the 5+10 default) since WAL lets every request thread read concurrently.
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_s,
+        "pool_recycle": settings.db_pool_recycle_s,
+    }
+
+
+def _executemany_args(url: str) -> dict:
+    # psycopg2: multi-row INSERTs already use insertmanyvalues; values_plus_batch also routes executemany
+    # UPDATE/DELETE (e.g. AI backfills) through execute_batch instead of one round-trip per row.
+    if url.startswith(("postgresql://", "postgresql+psycopg2://")):
+        return {"executemany_mode": "values_plus_batch", "insertmanyvalues_page_size": 1000}
+    return {}
+
+
 engine = create_engine(
     settings.database_url,
     connect_args=_sqlite_connect_args(settings.database_url),
     pool_pre_ping=True,
+    **_pool_args(settings.database_url),
+    **_executemany_args(settings.database_url),
 )
 
 
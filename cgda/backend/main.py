@@ -4,6 +4,7 @@ import os
 import threading
 import json
 
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
@@ -17,11 +18,16 @@ from routes import data as data_routes
 from routes import grievances as grievances_routes
 from routes import overview as overview_routes
 from routes import reports as reports_routes
-from services.data_service import DataService
+from services.analytics_service import FANOUT_CONNECTIONS, refresh_subtopic_daily
+from services.data_service import data_service
 from services.enrichment_service import EnrichmentService
 from services.processed_data_service import ProcessedDataService
 
 
+# Pooled connections left for background job threads when sizing the request threadpool.
+_BACKGROUND_CONNECTIONS = 2
+
+
 def create_app() -> FastAPI:
     app = FastAPI(title=settings.app_name)
 
@@ -46,6 +52,16 @@ def create_app() -> FastAPI:
     def healthz():
         return {"status": "ok"}
 
+    @app.on_event("startup")
+    async def _size_threadpool() -> None:
+        # Sync routes run on AnyIO's worker threads (40 by default), each holding at most one pooled
+        # connection through its session. Cap them below the pool's capacity, leaving the connections
+        # reserved for read fan-out (FANOUT_CONNECTIONS) and a few for the background job threads
+        # (auto-preload, enrichment runs) that don't go through the limiter.
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        capacity = settings.db_pool_size + settings.db_max_overflow
+        limiter.total_tokens = max(1, min(limiter.total_tokens, capacity - FANOUT_CONNECTIONS - _BACKGROUND_CONNECTIONS))
+
     @app.on_event("startup")
     def _startup() -> None:
         # Log path config clearly for debugging
@@ -77,6 +93,55 @@ def create_app() -> FastAPI:
                     # Table may not exist yet; ignore.
                     pass
 
+                # grievances_raw: precomputed closure days (backfilled once from the stored dates)
+                try:
+                    cols = [r[1] for r in conn.execute(text("PRAGMA table_info(grievances_raw)")).fetchall()]
+                    if cols and "resolution_days" not in cols:
+                        conn.execute(text("ALTER TABLE grievances_raw ADD COLUMN resolution_days INTEGER"))
+                        conn.execute(
+                            text(
+                                "UPDATE grievances_raw "
+                                "SET resolution_days = CAST(julianday(closed_date) - julianday(created_date) AS INTEGER) "
+                                "WHERE created_date IS NOT NULL AND closed_date IS NOT NULL "
+                                "AND julianday(closed_date) >= julianday(created_date)"
+                            )
+                        )
+                except Exception:
+                    # Table may not exist yet; ignore.
+                    pass
+
+                # grievances_raw: month bucket for trend grouping (backfilled once from created_date)
+                try:
+                    cols = [r[1] for r in conn.execute(text("PRAGMA table_info(grievances_raw)")).fetchall()]
+                    if cols and "created_month" not in cols:
+                        conn.execute(text("ALTER TABLE grievances_raw ADD COLUMN created_month VARCHAR(7)"))
+                        conn.execute(
+                            text(
+                                "UPDATE grievances_raw SET created_month = strftime('%Y-%m', created_date) "
+                                "WHERE created_date IS NOT NULL"
+                            )
+                        )
+                except Exception:
+                    # Table may not exist yet; ignore.
+                    pass
+
+                # grievances_structured: integer sentiment code (backfilled once from the text label)
+                try:
+                    cols = [r[1] for r in conn.execute(text("PRAGMA table_info(grievances_structured)")).fetchall()]
+                    if cols and "sentiment_id" not in cols:
+                        conn.execute(text("ALTER TABLE grievances_structured ADD COLUMN sentiment_id SMALLINT"))
+                        conn.execute(
+                            text(
+                                "UPDATE grievances_structured SET sentiment_id = CASE lower(trim(sentiment)) "
+                                "WHEN 'negative' THEN 0 WHEN 'neg' THEN 0 "
+                                "WHEN 'neutral' THEN 1 WHEN 'neu' THEN 1 "
+                                "WHEN 'positive' THEN 2 WHEN 'pos' THEN 2 END"
+                            )
+                        )
+                except Exception:
+                    # Table may not exist yet; ignore.
+                    pass
+
                 # grievances_processed: add new analytic fields if missing (backwards compatible)
                 try:
                     cols = [r[1] for r in conn.execute(text("PRAGMA table_info(grievances_processed)")).fetchall()]
@@ -143,12 +208,54 @@ def create_app() -> FastAPI:
                         conn.execute(text("ALTER TABLE grievances_processed ADD COLUMN ai_run_timestamp DATETIME"))
                     if "ai_error" not in cols:
                         conn.execute(text("ALTER TABLE grievances_processed ADD COLUMN ai_error TEXT"))
+                    # Superseded by ix_gp_date_ward_dept_cat_sub (covers ai_subtopic_norm instead of ai_subtopic).
+                    conn.execute(text("DROP INDEX IF EXISTS ix_processed_range"))
+                    if "ai_subtopic_norm" not in cols:
+                        conn.execute(
+                            text(
+                                "ALTER TABLE grievances_processed ADD COLUMN ai_subtopic_norm VARCHAR(128) "
+                                "NOT NULL DEFAULT 'General Civic Issue'"
+                            )
+                        )
+                        conn.execute(
+                            text(
+                                "UPDATE grievances_processed "
+                                "SET ai_subtopic_norm = coalesce(nullif(trim(ai_subtopic), ''), 'General Civic Issue')"
+                            )
+                        )
                 except Exception:
                     # Table may not exist yet; ignore.
                     pass
 
                 # enrichment_extra_checkpoints table is created via metadata; no ALTERs needed here.
 
+        # create_all() skips tables that already exist, including any indexes added to them later.
+        # Create missing indexes explicitly so older databases pick up new composite indexes.
+        for table in Base.metadata.sorted_tables:
+            for idx in table.indexes:
+                try:
+                    idx.create(bind=engine, checkfirst=True)
+                except Exception as e:
+                    print(f"[DB] Index {idx.name} not created: {type(e).__name__}: {e}")
+
+        # Rebuild the subtopic aggregate so dashboards match grievances_processed (covers databases created
+        # before the table existed and enrichment runs that stopped before their final refresh).
+        try:
+            with session_scope() as db:
+                refresh_subtopic_daily(db)
+        except Exception as e:
+            print(f"[DB] mv_subtopic_daily not refreshed: {type(e).__name__}: {e}")
+
+        # Refresh planner statistics so the composite indexes are picked over single-column ones.
+        # analysis_limit bounds the per-index sampling, keeping this cheap on large databases.
+        if engine.dialect.name == "sqlite":
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text("PRAGMA analysis_limit=1000"))
+                    conn.execute(text("ANALYZE"))
+            except Exception as e:
+                print(f"[DB] ANALYZE skipped: {type(e).__name__}: {e}")
+
         # Auto preload (localhost): preprocess + enrich a bounded set (default 100) from the latest raw file.
         # Non-blocking: runs in a daemon thread after startup.
         if settings.auto_preload_on_startup:
@@ -327,15 +434,12 @@ def create_app() -> FastAPI:
         if not settings.seed_sample_data:
             return
 
-        data_svc = DataService()
         with session_scope() as db:
-            if data_svc.has_any_data(db):
+            if data_service.has_any_data(db):
                 return
             if not os.path.exists(settings.sample_csv_path):
                 return
-            data_svc.ingest_csv_into_db(db, settings.sample_csv_path)
-            # Ensure seed inserts are committed.
-            db.commit()
+            data_service.ingest_csv_into_db(db, settings.sample_csv_path)
         # IMPORTANT: Do not auto-run Gemini processing on startup.
         # It can create SQLite write contention (database is locked) during demo usage.
         # AI structuring is triggered on-demand via:
@@ -2,8 +2,52 @@ from __future__ import annotations
 
 import datetime as dt
 
-from sqlalchemy import Boolean, Date, DateTime, Float, ForeignKey, Integer, String, Text, UniqueConstraint
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy import (
+    Boolean,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+    Text,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship, validates
+
+# Small-int sentiment codes stored alongside the free-text label for cheap analytics filters.
+SENT_NEG = 0
+SENT_NEU = 1
+SENT_POS = 2
+
+_SENTIMENT_IDS = {
+    "negative": SENT_NEG,
+    "neg": SENT_NEG,
+    "neutral": SENT_NEU,
+    "neu": SENT_NEU,
+    "positive": SENT_POS,
+    "pos": SENT_POS,
+}
+
+
+def sentiment_id(label: str | None) -> int | None:
+    """Map a sentiment label (any case, full or short form) to its SENT_* code; None if unknown."""
+    return _SENTIMENT_IDS.get((label or "").strip().lower())
+
+
+GENERAL_SUBTOPIC = "General Civic Issue"
+
+
+def subtopic_norm(label: str | None) -> str:
+    """Dashboard grouping key for a subtopic: trimmed, GENERAL_SUBTOPIC when empty."""
+    return (label or "").strip() or GENERAL_SUBTOPIC
+
+
+def month_key(d: dt.date | None) -> str | None:
+    """Month bucket (YYYY-MM) for a date; same format as grievances_processed.created_month."""
+    return d.strftime("%Y-%m") if d else None
 
 
 class Base(DeclarativeBase):
@@ -17,7 +61,11 @@ class GrievanceRaw(Base):
     grievance_id: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
 
     created_date: Mapped[dt.date | None] = mapped_column(Date, nullable=True)
+    # Derived at ingest: "YYYY-MM" of created_date, so month trends group on a stored column.
+    created_month: Mapped[str | None] = mapped_column(String(7), nullable=True, index=True)
     closed_date: Mapped[dt.date | None] = mapped_column(Date, nullable=True)
+    # Derived at ingest: closed_date - created_date in days (NULL if either is missing or negative).
+    resolution_days: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
     ward: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
     department: Mapped[str | None] = mapped_column(String(128), nullable=True, index=True)  # aka service
@@ -32,7 +80,17 @@ class GrievanceRaw(Base):
         back_populates="raw", uselist=False, cascade="all, delete-orphan"
     )
 
-    __table_args__ = (UniqueConstraint("grievance_id", name="uq_grievance_id"),)
+    __table_args__ = (
+        UniqueConstraint("grievance_id", name="uq_grievance_id"),
+        # Date-range analytics grouped by ward / department (retrospective, predictive, feedback).
+        Index("ix_raw_date_ward", "created_date", "ward"),
+        Index("ix_raw_date_department", "created_date", "department"),
+    )
+
+    @validates("created_date")
+    def _sync_created_month(self, _key: str, value: dt.date | None) -> dt.date | None:
+        self.created_month = month_key(value)
+        return value
 
 
 class GrievanceStructured(Base):
@@ -45,6 +103,7 @@ class GrievanceStructured(Base):
     category: Mapped[str] = mapped_column(String(128), nullable=False, index=True)
     sub_issue: Mapped[str] = mapped_column(String(256), nullable=False)
     sentiment: Mapped[str] = mapped_column(String(32), nullable=False, index=True)  # negative/neutral/positive
+    sentiment_id: Mapped[int | None] = mapped_column(SmallInteger, nullable=True, index=True)  # SENT_*; kept in sync
     severity: Mapped[str] = mapped_column(String(32), nullable=False, index=True)  # low/medium/high
     repeat_flag: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False, index=True)
     delay_risk: Mapped[str] = mapped_column(String(32), nullable=False, index=True)  # low/med/high
@@ -57,10 +116,29 @@ class GrievanceStructured(Base):
     ai_version: Mapped[str] = mapped_column(String(32), nullable=False, default="v1")
 
     processed_at: Mapped[dt.datetime] = mapped_column(DateTime, default=lambda: dt.datetime.utcnow(), nullable=False)
-    is_mock: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # Indexed: the structuring loop probes "any mock rows left?" after every run.
+    is_mock: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False, index=True)
 
     raw: Mapped[GrievanceRaw] = relationship(back_populates="structured")
 
+    @validates("sentiment")
+    def _sync_sentiment_id(self, _key: str, value: str) -> str:
+        self.sentiment_id = sentiment_id(value)
+        return value
+
+
+class AIResponseCache(Base):
+    """
+    Successful Gemini structuring outputs keyed by a hash of the normalised grievance text, so repeated
+    (form-letter) complaints are structured once.
+    """
+
+    __tablename__ = "ai_response_cache"
+
+    text_hash: Mapped[str] = mapped_column(String(64), primary_key=True)  # sha256 hex
+    structured_json: Mapped[str] = mapped_column(Text, nullable=False)  # AIOutput fields
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=lambda: dt.datetime.utcnow(), nullable=False)
+
 
 class EnrichmentRun(Base):
     """
@@ -196,6 +274,9 @@ class GrievanceProcessed(Base):
 
     ai_category: Mapped[str | None] = mapped_column(String(128), nullable=True, index=True)
     ai_subtopic: Mapped[str | None] = mapped_column(String(128), nullable=True, index=True)
+    # subtopic_norm(ai_subtopic), stored so analytics group on a plain indexed column. Every writer of
+    # ai_subtopic must keep it in sync (ORM assignments are handled by the validator below).
+    ai_subtopic_norm: Mapped[str] = mapped_column(String(128), nullable=False, index=True, default=GENERAL_SUBTOPIC)
     ai_confidence: Mapped[str | None] = mapped_column(String(16), nullable=True)
 
     # Extended AI fields (Gemini record-level enrichment; stored for dashboards)
@@ -214,6 +295,46 @@ class GrievanceProcessed(Base):
     ai_run_timestamp: Mapped[dt.datetime | None] = mapped_column(DateTime, nullable=True)
     ai_error: Mapped[str | None] = mapped_column(Text, nullable=True)
 
+    __table_args__ = (
+        # Date-range analytics: range on created_date + optional ward/department/category filters,
+        # grouped by normalized subtopic. Covering, so the predictive queries don't touch the wide row.
+        Index("ix_gp_date_ward_dept_cat_sub", "created_date", "ward_name", "department_name", "ai_category", "ai_subtopic_norm"),
+        # Single-ward / single-department / single-category drilldowns over a date range.
+        Index("ix_gp_ward_date", "ward_name", "created_date"),
+        Index("ix_gp_dept_date", "department_name", "created_date"),
+        Index("ix_gp_cat_date", "ai_category", "created_date"),
+    )
+
+    @validates("ai_subtopic")
+    def _sync_subtopic_norm(self, _key: str, value: str | None) -> str | None:
+        self.ai_subtopic_norm = subtopic_norm(value)
+        return value
+
+
+class SubtopicDaily(Base):
+    """
+    Pre-aggregated subtopic counts per day and filter dimension, rebuilt from grievances_processed by
+    refresh_subtopic_daily() after preprocessing / enrichment writes. Dashboards sum over this instead
+    of grouping the wide processed table on every request.
+    """
+
+    __tablename__ = "mv_subtopic_daily"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    created_date: Mapped[dt.date] = mapped_column(Date, nullable=False)
+    ward_name: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    department_name: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    ai_category: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    source_raw_filename: Mapped[str | None] = mapped_column(String(256), nullable=True)
+    # Normalized: trimmed ai_subtopic, "General Civic Issue" when empty.
+    sub_topic: Mapped[str] = mapped_column(String(128), nullable=False)
+    cnt: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_subtopic_daily_date_ward", "created_date", "ward_name"),
+        Index("ix_subtopic_daily_date_dept", "created_date", "department_name"),
+    )
+
 
 class TicketEnrichmentCheckpoint(Base):
     """
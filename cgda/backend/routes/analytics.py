@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import datetime as dt
+from functools import lru_cache
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException
@@ -7,15 +9,21 @@ from sqlalchemy.orm import Session
 
 from auth import User, require_role
 from database import get_db
-from services.analytics_service import AnalyticsService
-from services.ai_service import AIService
+from services.analytics_service import AnalyticsService, analytics_service
+from services.ai_service import ai_service
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 reports_router = APIRouter(prefix="/api/reports", tags=["reports"])
 
 
 def _svc() -> AnalyticsService:
-    return AnalyticsService()
+    return analytics_service
+
+
+@lru_cache(maxsize=1024)
+def _parse_ymd(s: str) -> dt.date:
+    # Dashboards re-send the same handful of range bounds on every reload.
+    return dt.datetime.strptime(s, "%Y-%m-%d").date()
 
 
 def _parse_filters(
@@ -26,18 +34,12 @@ def _parse_filters(
     category: str | None,
     source: str | None,
 ):
-    import datetime as dt
     from services.analytics_service import Filters
 
-    def _d(s: str | None) -> dt.date | None:
-        if not s:
-            return None
-        return dt.datetime.strptime(s, "%Y-%m-%d").date()
-
     ward_list = [w.strip() for w in (wards or "").split(",") if w.strip()] or None
     return Filters(
-        start_date=_d(start_date),
-        end_date=_d(end_date),
+        start_date=_parse_ymd(start_date) if start_date else None,
+        end_date=_parse_ymd(end_date) if end_date else None,
         wards=ward_list,
         department=department or None,
         category=category or None,
@@ -189,7 +191,6 @@ def cases(
     - resolution_bucket (bucket label e.g. "0-1 Day", "1-3 Days", "60+ Days")
     - forward_bucket (bucket label e.g. "1 Time", "2 Times", "3+ Times")
     """
-    import datetime as dt
     from sqlalchemy import and_, func, select
     from models import GrievanceProcessed
 
@@ -218,9 +219,6 @@ def cases(
         source=f.source,
     )
 
-    def _parse_date(v: str) -> dt.date:
-        return dt.datetime.strptime(v, "%Y-%m-%d").date()
-
     def _norm(v: str) -> str:
         return str(v or "").strip()
 
@@ -241,9 +239,9 @@ def cases(
         elif field == "status":
             drill_conds.append(func.trim(base.c.status) == value)
         elif field == "created_date":
-            drill_conds.append(base.c.created_date == _parse_date(value))
+            drill_conds.append(base.c.created_date == _parse_ymd(value))
         elif field == "closed_date":
-            drill_conds.append(base.c.closed_date == _parse_date(value))
+            drill_conds.append(base.c.closed_date == _parse_ymd(value))
         elif field == "feedback_rating":
             try:
                 r = float(value)
@@ -373,7 +371,6 @@ def triage_list(
     Case-queue list for the Deep Dive → "Triage and Action" page.
     Read-only, paginated.
     """
-    import datetime as dt
     from sqlalchemy import case, func, select
 
     limit = max(1, min(int(limit or 50), 500))
@@ -702,12 +699,10 @@ def wordcloud(
 
 
 def _parse_required_dates(start_date: str | None, end_date: str | None):
-    import datetime as dt
-
     if not start_date or not end_date:
         raise ValueError("start_date and end_date are required (YYYY-MM-DD)")
-    s = dt.datetime.strptime(start_date, "%Y-%m-%d").date()
-    e = dt.datetime.strptime(end_date, "%Y-%m-%d").date()
+    s = _parse_ymd(start_date)
+    e = _parse_ymd(end_date)
     if e < s:
         raise ValueError("end_date must be >= start_date")
     return s, e
@@ -836,6 +831,32 @@ def top_subtopics_by_department(
     )
 
 
+@router.get("/top-subtopics/rollups")
+def top_subtopics_rollups(
+    _: Annotated[User, Depends(require_role("admin", "commissioner"))],
+    db: Session = Depends(get_db),
+    start_date: str | None = None,
+    end_date: str | None = None,
+    ai_category: str | None = None,
+    source: str | None = None,
+    top_n: int = 5,
+):
+    try:
+        s, e = _parse_required_dates(start_date, end_date)
+    except Exception as ex:
+        from fastapi import HTTPException
+
+        raise HTTPException(status_code=400, detail=str(ex)) from ex
+    return _svc().all_subtopic_rollups(
+        db,
+        start_date=s,
+        end_date=e,
+        ai_category=ai_category or None,
+        source=source or None,
+        top_n=top_n,
+    )
+
+
 @router.get("/subtopic-trend")
 def subtopic_trend(
     _: Annotated[User, Depends(require_role("admin", "commissioner"))],
@@ -1099,14 +1120,10 @@ def commissioner_pdf(
     from reportlab.lib.units import cm
     from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
     import io
-    import datetime as dt
-
-    svc = _svc()
-    retro = svc.retrospective(db, _parse_filters(None, None, None, None, None, None))
-    infer = svc.inferential(db, _parse_filters(None, None, None, None, None, None))
-    pred = svc.predictive(db, _parse_filters(None, None, None, None, None, None))
-    bundle = {"retrospective": retro, "inferential": infer, "predictive": pred}
-    summary = AIService().commissioner_summary(bundle)
+
+    bundle = _svc().commissioner_bundle(db, _parse_filters(None, None, None, None, None, None))
+    retro, infer, pred = bundle["retrospective"], bundle["inferential"], bundle["predictive"]
+    summary = ai_service.commissioner_summary(bundle)
 
     buf = io.BytesIO()
     doc = SimpleDocTemplate(buf, pagesize=A4, title="CGDA Commissioner Summary")
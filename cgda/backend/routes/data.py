@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import os
+from functools import lru_cache
 from typing import Annotated
 
+import pandas as pd
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
@@ -17,6 +19,42 @@ from services.processed_data_service import ProcessedDataService
 
 router = APIRouter(prefix="/api/data", tags=["data"])
 
+# Legacy /results table: API field -> grievances_enriched.csv column (created_date is derived below).
+_RESULTS_CSV_FIELDS = {
+    "grievance_id": "Grievance Id",
+    "ward": "Ward Name",
+    "department": "Current Department Name",
+    "subject": "Complaint Subject",
+    "subcategory": "AI_SubTopic",
+    "category": "AI_Category",
+    "confidence": "AI_Confidence",
+    "error": "AI_Error",
+    # Extra AI features (derived from new raw2 columns when enabled)
+    "resolution_quality": "AI_ResolutionQuality",
+    "reopen_risk": "AI_ReopenRisk",
+    "feedback_driver": "AI_FeedbackDriver",
+    "closure_theme": "AI_ClosureTheme",
+    "extra_summary": "AI_ExtraSummary",
+    "extra_model": "AI_ExtraModel",
+    "extra_error": "AI_ExtraError",
+}
+_RESULTS_CSV_COLS = frozenset({*_RESULTS_CSV_FIELDS.values(), "Created_Date_ISO", "Created Date"})
+
+
+@lru_cache(maxsize=2)
+def _enriched_results_frame(path: str, mtime_ns: int, size: int):
+    """
+    /results rows from the enriched CSV, already shaped like the API (renamed, stripped strings; missing
+    columns are ""). Parsed once per file version (mtime/size are part of the key) so paging through
+    /results is a slice + to_dict instead of a re-read.
+    """
+    df = pd.read_csv(path, usecols=lambda c: c in _RESULTS_CSV_COLS, dtype=str, keep_default_na=False)
+    df = df.reindex(columns=sorted(_RESULTS_CSV_COLS), fill_value="")
+    out = pd.DataFrame({k: df[c].str.strip() for k, c in _RESULTS_CSV_FIELDS.items()})
+    iso = df["Created_Date_ISO"].str.strip()
+    out.insert(1, "created_date", iso.where(iso != "", df["Created Date"].str.strip()))
+    return out
+
 
 @router.get("/latest")
 def latest_raw(
@@ -506,6 +544,15 @@ def download_preprocessed(_: Annotated[User, Depends(require_role("admin", "comm
     return FileResponse(path, media_type="text/csv", filename="input_dataset_latest.csv")
 
 
+@router.get("/preprocessed/download.parquet")
+def download_preprocessed_parquet(_: Annotated[User, Depends(require_role("admin", "commissioner"))]):
+    path = os.path.join(settings.data_processed_dir, "input_dataset_latest.parquet")
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="No Parquet input dataset found (requires pyarrow at preprocess time).")
+    print(f"[PIPELINE] UI download reads INPUT DATASET parquet from: {path}")
+    return FileResponse(path, media_type="application/vnd.apache.parquet", filename="input_dataset_latest.parquet")
+
+
 @router.get("/processed/download")
 def download_processed(
     _: Annotated[User, Depends(require_role("admin", "commissioner"))],
@@ -646,40 +693,16 @@ def results(
         }
 
     # Legacy fallback: enriched CSV
-    import pandas as pd
-
     path = os.path.join(settings.data_processed_dir, "grievances_enriched.csv")
     if not os.path.exists(path):
         raise HTTPException(status_code=404, detail="No enriched CSV found. Run enrichment first.")
     print(f"[PIPELINE] UI results read ENRICHED file from: {path}")
 
-    df = pd.read_csv(path)
+    st = os.stat(path)
+    df = _enriched_results_frame(path, st.st_mtime_ns, st.st_size)
     total_rows = int(len(df))
-    sub = df.iloc[offset : offset + limit].fillna("")
 
-    rows = []
-    for _, r in sub.iterrows():
-        rows.append(
-            {
-                "grievance_id": str(r.get("Grievance Id", "")).strip(),
-                "created_date": str(r.get("Created_Date_ISO", r.get("Created Date", ""))).strip(),
-                "ward": str(r.get("Ward Name", "")).strip(),
-                "department": str(r.get("Current Department Name", "")).strip(),
-                "subject": str(r.get("Complaint Subject", "")).strip(),
-                "subcategory": str(r.get("AI_SubTopic", "")).strip(),
-                "category": str(r.get("AI_Category", "")).strip(),
-                "confidence": str(r.get("AI_Confidence", "")).strip(),
-                "error": str(r.get("AI_Error", "")).strip(),
-                # Extra AI features (derived from new raw2 columns when enabled)
-                "resolution_quality": str(r.get("AI_ResolutionQuality", "")).strip(),
-                "reopen_risk": str(r.get("AI_ReopenRisk", "")).strip(),
-                "feedback_driver": str(r.get("AI_FeedbackDriver", "")).strip(),
-                "closure_theme": str(r.get("AI_ClosureTheme", "")).strip(),
-                "extra_summary": str(r.get("AI_ExtraSummary", "")).strip(),
-                "extra_model": str(r.get("AI_ExtraModel", "")).strip(),
-                "extra_error": str(r.get("AI_ExtraError", "")).strip(),
-            }
-        )
+    rows = df.iloc[offset : offset + limit].to_dict("records")
 
     return {
         "source": "data/processed/grievances_enriched.csv",
@@ -1,26 +1,61 @@
-import os
-import tempfile
-import threading
+import time
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
-from fastapi.responses import Response
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import exists, select
 from sqlalchemy.orm import Session
 
 from auth import User, require_role
 from database import get_db, session_scope
 from models import GrievanceRaw, GrievanceStructured
-from services.data_service import DataService
+from services.data_service import data_service
 
 router = APIRouter(prefix="/api/grievances", tags=["grievances"])
 
 
+# upload_csv's "remaining" flag is advisory UX; a few seconds of staleness is fine.
+_REMAINING_TTL_S = 5.0
+_remaining_cache: tuple[float, bool] | None = None
+
+
+def _has_unstructured(db: Session) -> bool:
+    global _remaining_cache
+    now = time.monotonic()
+    if _remaining_cache is not None and now - _remaining_cache[0] < _REMAINING_TTL_S:
+        return _remaining_cache[1]
+    # NOT EXISTS short-circuits on the first raw row without a structured row (uses the unique raw_id index).
+    remaining = (
+        db.execute(
+            select(GrievanceRaw.id)
+            .where(~exists().where(GrievanceStructured.raw_id == GrievanceRaw.id))
+            .limit(1)
+        ).first()
+        is not None
+    )
+    _remaining_cache = (now, remaining)
+    return remaining
+
+
+def _structure_in_batches(*, batch_size: int, max_batches: int, **kwargs) -> None:
+    """
+    Background structuring with one short-lived session per batch, so the identity map never holds
+    more than a single batch of rows for the whole run.
+    """
+    for _ in range(max_batches):
+        with session_scope() as db2:
+            res = data_service.process_pending_structuring(db2, batch_size=batch_size, max_batches=1, **kwargs)
+            db2.expunge_all()
+        if not res.get("batches"):
+            break
+
+
 class UploadResponse(BaseModel):
     stored_raw_path: str
     inserted: int
     skipped_duplicates: int
+    skipped_malformed: int
     processed: int
     batches: int
     batch_size: int
@@ -31,64 +66,46 @@ class UploadResponse(BaseModel):
 @router.post("/upload_csv", response_model=UploadResponse)
 def upload_csv(
     _: Annotated[User, Depends(require_role("admin", "commissioner"))],
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     file: UploadFile = File(...),
 ) -> UploadResponse:
     if not file.filename.lower().endswith(".csv"):
         raise HTTPException(status_code=400, detail="Please upload a .csv file")
 
-    data_svc = DataService()
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as tmp:
-        tmp_path = tmp.name
-        content = file.file.read()
-        tmp.write(content)
-
-    try:
-        stored_path = data_svc.store_uploaded_csv(tmp_path, file.filename)
-        result = data_svc.ingest_csv_into_db(db, stored_path)
-        # Free-tier + UX: do not block this request on Gemini calls.
-        # Kick off a background pass and return immediately.
-        def _bg() -> None:
-            try:
-                with session_scope() as db2:
-                    svc = DataService()
-                    svc.process_pending_structuring(db2, batch_size=8, max_batches=10)
-            except Exception:
-                return
-
-        threading.Thread(target=_bg, name="cgda-upload-structuring", daemon=True).start()
-
-        # Compute whether any unstructured items remain (fast query).
-        remaining = (
-            db.execute(
-                select(GrievanceRaw.id)
-                .outerjoin(GrievanceStructured, GrievanceStructured.raw_id == GrievanceRaw.id)
-                .where(GrievanceStructured.id.is_(None))
-                .limit(1)
-            ).first()
-            is not None
-        )
-        return UploadResponse(
-            stored_raw_path=result.stored_raw_path,
-            inserted=result.inserted,
-            skipped_duplicates=result.skipped_duplicates,
-            processed=0,
-            batches=0,
-            batch_size=8,
-            remaining=bool(remaining),
-            background_processing_started=True,
-        )
-    finally:
+    # Stream the upload straight into data_raw_dir: no full read into memory, no temp-file copy.
+    stored_path = data_service.store_uploaded_csv(file.file, file.filename)
+    result = data_service.ingest_csv_into_db(db, stored_path)
+    # Free-tier + UX: do not block this request on Gemini calls.
+    # Kick off a background pass after the response is sent (runs on the shared threadpool).
+    def _bg() -> None:
         try:
-            os.unlink(tmp_path)
+            _structure_in_batches(batch_size=8, max_batches=10)
         except Exception:
-            pass
+            return
+
+    background_tasks.add_task(_bg)
+
+    # Compute whether any unstructured items remain (fast query).
+    # Rows we just inserted have no structured output yet, so skip the probe in that case.
+    remaining = True if result.inserted else _has_unstructured(db)
+    return UploadResponse(
+        stored_raw_path=result.stored_raw_path,
+        inserted=result.inserted,
+        skipped_duplicates=result.skipped_duplicates,
+        skipped_malformed=result.skipped_malformed,
+        processed=0,
+        batches=0,
+        batch_size=8,
+        remaining=bool(remaining),
+        background_processing_started=True,
+    )
 
 
 @router.post("/process_pending")
 def process_pending(
     _: Annotated[User, Depends(require_role("admin", "commissioner"))],
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     batch_size: int = 8,
     max_batches: int = 2,
@@ -99,25 +116,22 @@ def process_pending(
     On-demand AI structuring (free-tier friendly).
     Used by the UI to bootstrap structured data without blocking server startup.
     """
-    # Do not block the request on Gemini calls; run in background and return immediately.
+    # Do not block the request on Gemini calls; run as a background task (shared threadpool) and return immediately.
     bs = max(5, min(int(batch_size), 10))
     mb = max(1, min(int(max_batches), 50))
 
     def _bg() -> None:
         try:
-            with session_scope() as db2:
-                svc = DataService()
-                svc.process_pending_structuring(
-                    db2,
-                    batch_size=bs,
-                    max_batches=mb,
-                    reprocess_mock=reprocess_mock,
-                    reprocess_unknown=reprocess_unknown,
-                )
+            _structure_in_batches(
+                batch_size=bs,
+                max_batches=mb,
+                reprocess_mock=reprocess_mock,
+                reprocess_unknown=reprocess_unknown,
+            )
         except Exception:
             return
 
-    threading.Thread(target=_bg, name="cgda-process-pending", daemon=True).start()
+    background_tasks.add_task(_bg)
     return {
         "started": True,
         "batch_size": bs,
@@ -127,67 +141,122 @@ def process_pending(
     }
 
 
+_EXPORT_BATCH = 1000
+_EXPORT_COLUMNS = (
+    "grievance_id",
+    "ward",
+    "department",
+    "created_date",
+    "closed_date",
+    "feedback_star",
+    "grievance_text",
+    "category",
+    "sub_issue",
+    "sentiment",
+    "severity",
+    "repeat_flag",
+    "delay_risk",
+    "dissatisfaction_reason",
+    "ai_provider",
+    "ai_engine",
+    "ai_model",
+    "processed_at",
+)
+# Same bytes csv.writer would emit for the header row (default dialect ends lines with \r\n).
+_EXPORT_HEADER = (",".join(_EXPORT_COLUMNS) + "\r\n").encode("utf-8")
+
+
 @router.get("/export_structured_csv")
 def export_structured_csv(
     _: Annotated[User, Depends(require_role("admin", "commissioner"))],
-    db: Session = Depends(get_db),
 ):
     import csv
     import io
 
-    out = io.StringIO()
-    w = csv.writer(out)
-    w.writerow(
-        [
-            "grievance_id",
-            "ward",
-            "department",
-            "created_date",
-            "closed_date",
-            "feedback_star",
-            "grievance_text",
-            "category",
-            "sub_issue",
-            "sentiment",
-            "severity",
-            "repeat_flag",
-            "delay_risk",
-            "dissatisfaction_reason",
-            "ai_provider",
-            "ai_engine",
-            "ai_model",
-            "processed_at",
-        ]
-    )
-    rows = db.execute(
-        select(GrievanceRaw, GrievanceStructured).join(GrievanceStructured, GrievanceStructured.raw_id == GrievanceRaw.id)
-    ).all()
-    for raw, s in rows:
-        w.writerow(
-            [
-                raw.grievance_id,
-                raw.ward,
-                raw.department,
-                raw.created_date.isoformat() if raw.created_date else "",
-                raw.closed_date.isoformat() if raw.closed_date else "",
-                raw.feedback_star if raw.feedback_star is not None else "",
-                raw.grievance_text,
-                s.category,
-                s.sub_issue,
-                s.sentiment,
-                s.severity,
-                "true" if s.repeat_flag else "false",
-                s.delay_risk,
-                s.dissatisfaction_reason or "",
-                s.ai_provider,
-                s.ai_engine,
-                s.ai_model,
-                s.processed_at.isoformat() if s.processed_at else "",
-            ]
+    def _iter():
+        # The request-scoped session is closed before a streamed body is sent, so the generator owns its own.
+        raw = io.BytesIO()
+        # write_through: every csv row lands in `raw` as UTF-8 immediately, so a batch is
+        # yielded straight from the bytes buffer with no extra str -> bytes pass.
+        out = io.TextIOWrapper(raw, encoding="utf-8", newline="", write_through=True)
+        w = csv.writer(out)
+        yield _EXPORT_HEADER
+        # Plain column tuples: no ORM instances / identity-map bookkeeping per exported row.
+        stmt = (
+            select(
+                GrievanceRaw.grievance_id,
+                GrievanceRaw.ward,
+                GrievanceRaw.department,
+                GrievanceRaw.created_date,
+                GrievanceRaw.closed_date,
+                GrievanceRaw.feedback_star,
+                GrievanceRaw.grievance_text,
+                GrievanceStructured.category,
+                GrievanceStructured.sub_issue,
+                GrievanceStructured.sentiment,
+                GrievanceStructured.severity,
+                GrievanceStructured.repeat_flag,
+                GrievanceStructured.delay_risk,
+                GrievanceStructured.dissatisfaction_reason,
+                GrievanceStructured.ai_provider,
+                GrievanceStructured.ai_engine,
+                GrievanceStructured.ai_model,
+                GrievanceStructured.processed_at,
+            )
+            .join(GrievanceStructured, GrievanceStructured.raw_id == GrievanceRaw.id)
+            .execution_options(stream_results=True, yield_per=_EXPORT_BATCH)
         )
+        with session_scope() as db:
+            for part in db.execute(stmt).partitions():
+                for (
+                    gid,
+                    ward,
+                    dept,
+                    created,
+                    closed,
+                    star,
+                    text,
+                    category,
+                    sub_issue,
+                    sentiment,
+                    severity,
+                    repeat_flag,
+                    delay_risk,
+                    reason,
+                    provider,
+                    engine,
+                    model,
+                    processed_at,
+                ) in part:
+                    w.writerow(
+                        [
+                            gid,
+                            ward,
+                            dept,
+                            created.isoformat() if created else "",
+                            closed.isoformat() if closed else "",
+                            star if star is not None else "",
+                            text,
+                            category,
+                            sub_issue,
+                            sentiment,
+                            severity,
+                            "true" if repeat_flag else "false",
+                            delay_risk,
+                            reason or "",
+                            provider,
+                            engine,
+                            model,
+                            processed_at.isoformat() if processed_at else "",
+                        ]
+                    )
+                # Flush one batch at a time and reuse the buffer.
+                yield raw.getvalue()
+                raw.seek(0)
+                raw.truncate(0)
 
-    return Response(
-        content=out.getvalue().encode("utf-8"),
+    return StreamingResponse(
+        _iter(),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=cgda_structured_export.csv"},
     )
@@ -7,7 +7,7 @@ from sqlalchemy.orm import Session
 
 from auth import User, require_role
 from database import get_db
-from services.analytics_service import AnalyticsService
+from services.analytics_service import AnalyticsService, analytics_service
 from services.enrichment_service import EnrichmentService
 from config import settings
 
@@ -15,7 +15,7 @@ router = APIRouter(prefix="/api", tags=["overview"])
 
 
 def _svc() -> AnalyticsService:
-    return AnalyticsService()
+    return analytics_service
 
 
 def _parse_required_dates(start_date: str | None, end_date: str | None):
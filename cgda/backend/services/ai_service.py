@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
@@ -19,6 +20,14 @@ def _read_prompt(name: str) -> str:
     return (_prompt_dir() / name).read_text(encoding="utf-8")
 
 
+# Prepended to grievance_structuring.txt when several records are sent in one request.
+_BATCH_PREAMBLE = (
+    "You will receive a JSON ARRAY of {n} grievance records instead of a single record. "
+    "Apply the instructions below to EACH record independently and return ONLY a JSON array of exactly "
+    "{n} objects, in the same order as the input, each with the output schema described below.\n\n"
+)
+
+
 def _title(v: str) -> str:
     v = (v or "").strip()
     if not v:
@@ -58,18 +67,59 @@ class AIService:
     - batch-safe (pipeline never crashes; fill Unknown + continue)
     """
 
+    def __init__(self) -> None:
+        self.gemini = GeminiClient()
+
     def structure_grievance(self, record: dict[str, Any]) -> AIOutput:
         if not settings.gemini_api_key:
             return self._fallback_unknown(settings.gemini_model_primary)
 
         prompt_tpl = _read_prompt("grievance_structuring.txt")
         prompt = prompt_tpl.replace("{{INPUT_JSON}}", json.dumps(record, ensure_ascii=False))
-        res = GeminiClient().generate_json(prompt=prompt, temperature=min(0.2, settings.gemini_temperature), expect="dict")
+        res = self.gemini.generate_json(prompt=prompt, temperature=min(0.2, settings.gemini_temperature), expect="dict")
         if not res.ok or not isinstance(res.parsed_json, dict):
             print(f"[AI] Gemini structuring failed: {res.error}")
             return self._fallback_unknown(res.model_used)
         return self._validate_and_fill(res.parsed_json, model=res.model_used)
 
+    def structure_grievances_batch(self, records: list[dict[str, Any]]) -> list[AIOutput]:
+        """
+        Structure several records in one Gemini request (JSON array in, JSON array out). If the packed
+        answer is unusable as a whole, fall back to per-record calls with up to settings.gemini_concurrency
+        in flight. Output order matches `records`.
+        """
+        if len(records) > 1 and settings.gemini_api_key:
+            packed = self._structure_packed(records)
+            if packed is not None:
+                return packed
+        workers = max(1, min(len(records), int(settings.gemini_concurrency or 1)))
+        if workers == 1 or not settings.gemini_api_key:
+            return [self.structure_grievance(r) for r in records]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gemini") as pool:
+            return list(pool.map(self.structure_grievance, records))
+
+    def _structure_packed(self, records: list[dict[str, Any]]) -> list[AIOutput] | None:
+        # Reuses the single-record prompt; the preamble turns it into an array-in/array-out task.
+        n = len(records)
+        prompt = _BATCH_PREAMBLE.format(n=n) + _read_prompt("grievance_structuring.txt").replace(
+            "{{INPUT_JSON}}", json.dumps(records, ensure_ascii=False)
+        )
+        # Output grows with the batch; same sizing rule as the enrichment batch prompts.
+        max_tokens = min(max(int(settings.gemini_max_output_tokens), n * 200, 800), 4096)
+        res = self.gemini.generate_json(
+            prompt=prompt,
+            temperature=min(0.2, settings.gemini_temperature),
+            max_output_tokens=max_tokens,
+            expect="list",
+        )
+        if not res.ok or not isinstance(res.parsed_json, list) or len(res.parsed_json) != n:
+            print(f"[AI] Gemini batch structuring unusable ({res.error or 'length mismatch'}); retrying per record")
+            return None
+        return [
+            self._validate_and_fill(x, model=res.model_used) if isinstance(x, dict) else self._fallback_unknown(res.model_used)
+            for x in res.parsed_json
+        ]
+
     def commissioner_summary(self, analytics: dict[str, Any]) -> dict[str, Any]:
         # Summary uses the same configured models; never crashes.
         if not settings.gemini_api_key:
@@ -83,7 +133,7 @@ class AIService:
             }
         prompt_tpl = _read_prompt("commissioner_summary.txt")
         prompt = prompt_tpl.replace("{{INPUT_JSON}}", json.dumps(analytics, ensure_ascii=False))
-        res = GeminiClient().generate_json(prompt=prompt, temperature=min(0.2, settings.gemini_temperature), expect="dict")
+        res = self.gemini.generate_json(prompt=prompt, temperature=min(0.2, settings.gemini_temperature), expect="dict")
         if res.ok and isinstance(res.parsed_json, dict):
             out = res.parsed_json
             out["ai_provider"] = "caseA"
@@ -139,3 +189,5 @@ class AIService:
     # All Gemini calls go through services/gemini_client.py (single wrapper).
 
 
+# Shared instance (stateless apart from the pooled Gemini HTTP client).
+ai_service = AIService()
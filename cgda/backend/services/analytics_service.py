@@ -1,37 +1,575 @@
 from __future__ import annotations
 
+import copy
 import datetime as dt
 import re
-from collections import Counter, defaultdict
-from dataclasses import dataclass
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import astuple, dataclass
+from functools import lru_cache, wraps
 from pathlib import Path
 import json
 
-from sqlalchemy import case, func, select
+from sqlalchemy import Integer, String, bindparam, case, cast, delete, func, insert, literal, null, select, tuple_, union_all
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import StaticPool
 
-from models import GrievanceRaw, GrievanceStructured, GrievanceProcessed
-from services.ai_service import AIService
+from models import SENT_NEG, GrievanceRaw, GrievanceStructured, GrievanceProcessed, SubtopicDaily
+from services.ai_service import ai_service
 from config import settings
-from services.gemini_client import GeminiClient
 
 
-def _closure_days(created: dt.date | None, closed: dt.date | None) -> int | None:
-    if not created or not closed:
+_CLOSURE_BUCKETS = ["<7", "7-14", ">14", "Unknown"]
+
+# Ward filters bind the whole list as ONE parameter. On SQLite it is a JSON array unpacked by json_each, so
+# the SQL text (and SQLite's prepared-statement cache entry) is the same for any number of wards and never
+# nears the bound-parameter limit. Other backends keep an expanding IN.
+_WARDS_AS_JSON = settings.database_url.startswith("sqlite:")
+
+
+def _ward_in(col, wards: list[str] | None = None, *, name: str = "wards"):
+    """
+    `col IN (wards)`. With wards=None the parameter is left for execute time (pass _ward_param(wards)
+    under `name`); otherwise the list is bound into the expression.
+    """
+    if _WARDS_AS_JSON:
+        param = bindparam(name, _ward_param(wards), unique=True) if wards is not None else bindparam(name)
+        return col.in_(select(func.json_each(param).table_valued("value").c.value))
+    if wards is not None:
+        return col.in_(list(wards))
+    return col.in_(bindparam(name, expanding=True))
+
+
+def _ward_param(wards) -> str | list[str]:
+    return json.dumps(list(wards)) if _WARDS_AS_JSON else list(wards)
+
+
+def _closure_days_expr(db: Session, created, closed):
+    """
+    SQL expression for closure time in days between two date columns; NULL when either
+    date is missing or closed precedes created.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        days = closed - created  # date - date -> integer days
+    else:
+        days = func.julianday(closed) - func.julianday(created)
+    return case((days >= 0, days), else_=None)
+
+
+def _closure_bucket_expr(days):
+    return case(
+        (days.is_(None), "Unknown"),
+        (days < 7, "<7"),
+        (days <= 14, "7-14"),
+        else_=">14",
+    )
+
+
+def _value_histogram(db: Session, expr, base) -> list[tuple[float, int]]:
+    """
+    Ascending (value, count) pairs of a non-NULL day-count expression over `base`. Only distinct day
+    values reach Python, so memory is bounded by the range of days rather than the number of rows.
+    """
+    rows = db.execute(
+        select(expr, func.count()).where(expr.is_not(None)).select_from(base).group_by(expr).order_by(expr)
+    ).all()
+    return [(float(v), int(c)) for v, c in rows]
+
+
+def _histogram_at(hist: list[tuple[float, int]], k: int) -> float:
+    # k-th value (0-based) of the sorted list the histogram stands for.
+    for v, c in hist:
+        if k < c:
+            return v
+        k -= c
+    return hist[-1][0]
+
+
+def _histogram_median(hist: list[tuple[float, int]], n: int) -> float | None:
+    if not n:
         return None
-    d = (closed - created).days
-    return d if d >= 0 else None
+    mid = n // 2
+    if n % 2 == 1:
+        return _histogram_at(hist, mid)
+    return (_histogram_at(hist, mid - 1) + _histogram_at(hist, mid)) / 2.0
 
 
-def _bucket(days: int | None) -> str:
-    if days is None:
-        return "Unknown"
-    if days < 7:
-        return "<7"
-    if days <= 14:
-        return "7-14"
-    return ">14"
+def _histogram_p90(hist: list[tuple[float, int]], n: int) -> float | None:
+    if not n:
+        return None
+    idx = max(0, min(int(round(0.9 * (n - 1))), n - 1))
+    return _histogram_at(hist, idx)
+
+
+# Independent read-only SELECTs fan out over pooled connections; sqlite3 and psycopg release the GIL
+# while a statement runs, and WAL lets SQLite readers proceed in parallel.
+_READ_WORKERS = 4
+_read_executor = ThreadPoolExecutor(max_workers=_READ_WORKERS, thread_name_prefix="analytics-read")
+
+# Pooled connections set aside for fan-out, on top of the one a request thread's own session holds.
+# The request threadpool is sized to leave exactly this many free (see main.py), and fan-out only runs
+# when it can reserve its connections here, so nested checkouts never wait on an exhausted pool.
+FANOUT_CONNECTIONS = max(0, min(_READ_WORKERS, settings.db_pool_size + settings.db_max_overflow - 1))
+_fanout_free = FANOUT_CONNECTIONS
+_fanout_lock = threading.Lock()
+
+
+@contextmanager
+def _reserve_connections(n: int):
+    """Yields True (and holds n fan-out connections until exit) if n are free right now, else False."""
+    global _fanout_free
+    with _fanout_lock:
+        ok = _fanout_free >= n
+        if ok:
+            _fanout_free -= n
+    try:
+        yield ok
+    finally:
+        if ok:
+            with _fanout_lock:
+                _fanout_free += n
+
+
+def _execute_concurrently(db: Session, stmts: list) -> list[list]:
+    """
+    Run independent SELECTs on separate pooled connections and return their rows in input order.
+    Runs them in turn on the caller's session when the engine shares a single connection (in-memory
+    SQLite) or no fan-out connections are free.
+    """
+    bind = db.get_bind()
+    if len(stmts) < 2 or isinstance(bind.pool, StaticPool):
+        return [db.execute(stmt).all() for stmt in stmts]
+
+    def _run(stmt):
+        with bind.connect() as conn:
+            return conn.execute(stmt).all()
+
+    with _reserve_connections(min(len(stmts), _READ_WORKERS)) as reserved:
+        if reserved:
+            return list(_read_executor.map(_run, stmts))
+    return [db.execute(stmt).all() for stmt in stmts]
+
+
+_WORD_RE = re.compile(r"[a-z]{3,}")
+
+# Minimal stopwords list for the word cloud (government-safe; tuned for civic complaints)
+_STOP = frozenset(
+    {
+        "the",
+        "and",
+        "to",
+        "of",
+        "in",
+        "on",
+        "for",
+        "is",
+        "are",
+        "was",
+        "were",
+        "be",
+        "been",
+        "it",
+        "this",
+        "that",
+        "with",
+        "from",
+        "as",
+        "at",
+        "by",
+        "an",
+        "a",
+        "or",
+        "we",
+        "i",
+        "you",
+        "please",
+        "kindly",
+        "request",
+        "regarding",
+        "complaint",
+        "issue",
+        "problem",
+        "urgent",
+        "immediately",
+        "sir",
+        "madam",
+        "nmmc",
+        "not",
+        "has",
+        "have",
+        "our",
+        "your",
+        "they",
+        "their",
+        "there",
+    }
+)
+
+
+# The only input-dataset columns the word cloud reads (text + filter columns).
+_WORDCLOUD_COLS = ("AI_Input_Text", "Created_Date_ISO", "Ward Name", "Current Department Name")
+
+
+def _read_wordcloud_frame(dataset_path: str):
+    """
+    Load just the word-cloud columns from the input dataset, all as strings.
+    Prefers the Parquet mirror written at preprocess time (column-pruned read), then pyarrow's
+    multithreaded CSV reader, then pandas.
+    """
+    import csv
+
+    import pandas as pd
+
+    pq_path = Path(dataset_path).with_suffix(".parquet")
+    if pq_path.exists() and pq_path.stat().st_mtime >= Path(dataset_path).stat().st_mtime:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            pass
+        else:
+            names = pq.read_schema(pq_path).names
+            return pq.read_table(pq_path, columns=[c for c in _WORDCLOUD_COLS if c in names]).to_pandas()
+
+    with open(dataset_path, "r", newline="", encoding="utf-8-sig") as fh:
+        header = next(csv.reader(fh), [])
+    cols = [c for c in _WORDCLOUD_COLS if c in header]
+
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+    except ImportError:
+        return pd.read_csv(dataset_path, usecols=cols, dtype=str)
+
+    tbl = pacsv.read_csv(
+        dataset_path,
+        read_options=pacsv.ReadOptions(use_threads=True),
+        # Keep everything as text: Arrow would otherwise infer Created_Date_ISO as date32.
+        convert_options=pacsv.ConvertOptions(include_columns=cols, column_types={c: pa.string() for c in cols}),
+    )
+    return tbl.to_pandas()
+
+
+@lru_cache(maxsize=32)
+def _wordcloud_counts(
+    dataset_path: str,
+    mtime: float,
+    start_date: dt.date | None,
+    end_date: dt.date | None,
+    wards: tuple[str, ...],
+    department: str | None,
+    top_n: int,
+) -> tuple[tuple[tuple[str, int], ...], int]:
+    """
+    Word frequencies for the input dataset CSV; returns (top (word, count) pairs, total_docs).
+    `mtime` is only part of the cache key.
+    """
+    import numpy as np
+    import pandas as pd
+
+    df = _read_wordcloud_frame(dataset_path)
+    # Apply light filtering on columns that exist in the input dataset (all read as strings).
+    # A filter whose column is absent is ignored rather than matching nothing.
+    mask = np.ones(len(df), dtype=bool)
+    if "Created_Date_ISO" in df.columns:
+        if start_date:
+            mask &= (df["Created_Date_ISO"] >= start_date.isoformat()).to_numpy()
+        if end_date:
+            mask &= (df["Created_Date_ISO"] <= end_date.isoformat()).to_numpy()
+    if wards and "Ward Name" in df.columns:
+        mask &= df["Ward Name"].isin(wards).to_numpy()
+    if department and "Current Department Name" in df.columns:
+        mask &= (df["Current Department Name"] == department).to_numpy()
+    if not mask.all():
+        df = df[mask]
+    # Category filter: use AI category from structured table if present in dataset (it won't be, so ignore).
+    texts = df.get("AI_Input_Text", pd.Series([], dtype=str))
+
+    # Tokenize (vectorized): keep alphabetic words (3+ chars), drop stopwords
+    tokens = texts.dropna().astype(str).str.lower().str.findall(_WORD_RE).explode().dropna()
+    tokens = tokens[~tokens.isin(_STOP)]
+    top = tokens.value_counts().head(top_n)
+    return tuple((str(k), int(v)) for k, v in top.items()), int(len(texts))
+
+
+# Filter dropdowns and dashboard results change only when data is ingested/preprocessed. Writers call
+# invalidate_analytics_cache(); the TTL bounds staleness for writers that don't (e.g. AI backfills).
+_DIMENSIONS_TTL_S = 60.0
+_data_version = 0
+_dimensions_cache: dict[str, tuple[int, float, dict]] = {}
+
+_AI_META_TTL_S = 300.0
+_ai_meta_cache: tuple[int, float, dict | None] | None = None
+_ai_meta_lock = threading.Lock()
+
+_RESULT_TTL_S = 60.0
+# Predictive aggregates read only processed rows, whose writers all bump _data_version
+# (refresh_subtopic_daily), so they can be held longer than the raw-backed dashboards.
+_PREDICTIVE_TTL_S = 300.0
+_RESULT_CACHE_MAX = 256
+_result_cache: OrderedDict[tuple, tuple[float, dict]] = OrderedDict()
+_result_lock = threading.Lock()
+
+
+def invalidate_analytics_cache() -> None:
+    global _data_version
+    _data_version += 1
+
+
+def refresh_subtopic_daily(db: Session) -> None:
+    """
+    Rebuild mv_subtopic_daily from grievances_processed (delete + INSERT ... SELECT, one transaction).
+    Call after bulk writes to processed rows; the caller's session is committed here.
+    """
+    p = GrievanceProcessed
+    dims = (p.created_date, p.ward_name, p.department_name, p.ai_category, p.source_raw_filename, p.ai_subtopic_norm)
+    db.execute(delete(SubtopicDaily))
+    db.execute(
+        insert(SubtopicDaily).from_select(
+            ["created_date", "ward_name", "department_name", "ai_category", "source_raw_filename", "sub_topic", "cnt"],
+            select(*dims, func.count()).where(p.created_date.is_not(None)).group_by(*dims),
+        )
+    )
+    db.commit()
+    invalidate_analytics_cache()
+
+
+def _subtopic_daily_filters(
+    start_date: dt.date,
+    end_date: dt.date,
+    wards: list[str] | None = None,
+    department: str | None = None,
+    ai_category: str | None = None,
+    source: str | None = None,
+) -> list:
+    # Same semantics as AnalyticsService._processed_base, against the pre-aggregated table.
+    conds = [SubtopicDaily.created_date >= start_date, SubtopicDaily.created_date <= end_date]
+    if wards:
+        conds.append(_ward_in(SubtopicDaily.ward_name, wards))
+    if department:
+        conds.append(SubtopicDaily.department_name == department)
+    if ai_category:
+        conds.append(SubtopicDaily.ai_category == ai_category)
+    if source:
+        conds.append(SubtopicDaily.source_raw_filename == source)
+    return conds
+
+
+@lru_cache(maxsize=16)
+def _top_subtopics_stmt(has_wards: bool, has_department: bool, has_category: bool, has_source: bool):
+    """
+    Shared statement for the top_subtopics* endpoints (global / ward / department), built once per
+    filter shape over mv_subtopic_daily with every value bound at execute time.
+    """
+    total = func.sum(SubtopicDaily.cnt)
+    stmt = select(SubtopicDaily.sub_topic, total).where(
+        SubtopicDaily.created_date >= bindparam("start_date"),
+        SubtopicDaily.created_date <= bindparam("end_date"),
+    )
+    if has_wards:
+        stmt = stmt.where(_ward_in(SubtopicDaily.ward_name))
+    if has_department:
+        stmt = stmt.where(SubtopicDaily.department_name == bindparam("department"))
+    if has_category:
+        stmt = stmt.where(SubtopicDaily.ai_category == bindparam("ai_category"))
+    if has_source:
+        stmt = stmt.where(SubtopicDaily.source_raw_filename == bindparam("source"))
+    return stmt.group_by(SubtopicDaily.sub_topic).order_by(total.desc()).limit(bindparam("top_n"))
+
+
+def _top_subtopics_daily(
+    db: Session,
+    *,
+    start_date: dt.date,
+    end_date: dt.date,
+    wards: list[str] | None,
+    department: str | None,
+    ai_category: str | None,
+    source: str | None,
+    top_n: int,
+) -> list[tuple[str, int]]:
+    stmt = _top_subtopics_stmt(bool(wards), bool(department), bool(ai_category), bool(source))
+    params: dict = {"start_date": start_date, "end_date": end_date, "top_n": top_n}
+    if wards:
+        params["wards"] = _ward_param(wards)
+    if department:
+        params["department"] = department
+    if ai_category:
+        params["ai_category"] = ai_category
+    if source:
+        params["source"] = source
+    return db.execute(stmt, params).all()
+
+
+def _cached_dimensions(key: str, build) -> dict:
+    now = time.monotonic()
+    hit = _dimensions_cache.get(key)
+    if hit and hit[0] == _data_version and now - hit[1] < _DIMENSIONS_TTL_S:
+        return hit[2]
+    version = _data_version
+    out = build()
+    _dimensions_cache[key] = (version, now, out)
+    return out
+
+
+def _freeze(v):
+    if isinstance(v, Filters):
+        return _freeze(astuple(v))
+    if isinstance(v, (list, tuple)):
+        return tuple(_freeze(x) for x in v)
+    if isinstance(v, dict):
+        return tuple(sorted((k, _freeze(x)) for k, x in v.items()))
+    return v
+
+
+def _raw_freshness(db: Session) -> tuple:
+    # Cheap PK-index lookups: new raw rows or new AI-structured rows change the token.
+    return tuple(
+        db.execute(
+            select(
+                select(func.max(GrievanceRaw.id)).scalar_subquery(),
+                select(func.max(GrievanceStructured.id)).scalar_subquery(),
+            )
+        ).one()
+    )
+
+
+def _cached_result(freshness=None, ttl: float = _RESULT_TTL_S):
+    """
+    Memoise a dashboard method (self, db, *args, **kwargs) -> dict for `ttl` seconds, keyed on its
+    arguments, the invalidation counter and an optional per-call freshness token. Callers get a copy.
+    """
+
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(self, db: Session, *args, **kwargs):
+            key = (fn.__name__, _freeze(args), _freeze(kwargs), _data_version, freshness(db) if freshness else None)
+            now = time.monotonic()
+            with _result_lock:
+                hit = _result_cache.get(key)
+                if hit and now - hit[0] < ttl:
+                    _result_cache.move_to_end(key)
+                    return copy.deepcopy(hit[1])
+            out = fn(self, db, *args, **kwargs)
+            with _result_lock:
+                _result_cache[key] = (now, out)
+                while len(_result_cache) > _RESULT_CACHE_MAX:
+                    _result_cache.popitem(last=False)
+            return copy.deepcopy(out)
+
+        return wrapper
+
+    return deco
+
+
+def _distinct_dimension_values(db: Session, cols: dict) -> dict[str, list[str]]:
+    """
+    Sorted, de-duplicated non-null values for each {kind: column}, ordered by the database
+    so that DISTINCT can be answered from the per-column index.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        # Postgres has no skip scan: emulate a loose index scan with a recursive CTE that
+        # hops from one distinct value to the next via the btree index (one probe per value).
+        out: dict[str, list[str]] = {}
+        for kind, col in cols.items():
+            walk = select(func.min(col).label("v")).cte(f"dim_{kind}", recursive=True)
+            step = select(func.min(col)).where(col > walk.c.v).scalar_subquery()
+            walk = walk.union_all(select(step).where(walk.c.v.is_not(None)))
+            rows = db.execute(select(walk.c.v).where(walk.c.v.is_not(None)).order_by(walk.c.v)).scalars()
+            out[kind] = [v for v in rows if v]
+        return out
+
+    u = union_all(
+        *(
+            select(literal(kind).label("kind"), col.label("v")).where(col.is_not(None)).distinct()
+            for kind, col in cols.items()
+        )
+    ).subquery()
+    q = select(u.c.kind, u.c.v).order_by(u.c.kind, u.c.v)
+    out = {kind: [] for kind in cols}
+    for kind, v in db.execute(q):
+        if v:
+            out[kind].append(v)
+    return out
+
+
+@lru_cache(maxsize=16)
+def _rising_subtopics_stmt(has_wards: bool, has_department: bool, has_category: bool, has_source: bool):
+    """
+    Statement for predictive_rising_subtopics, built once per filter *shape*; every value
+    (dates, filters, thresholds) is a named bind parameter supplied at execute time, so the
+    dashboard's auto-refresh reuses one compiled statement per shape.
+
+    Both windows are summed from the per-(day, subtopic) counts in mv_subtopic_daily over one
+    date-range scan, so the cost follows days x subtopics rather than the number of grievances.
+    """
+    d = SubtopicDaily
+    stmt = select(d.sub_topic.label("subTopic")).where(
+        d.created_date >= bindparam("start_date"),
+        d.created_date <= bindparam("end_date"),
+    )
+    if has_wards:
+        stmt = stmt.where(_ward_in(d.ward_name))
+    if has_department:
+        stmt = stmt.where(d.department_name == bindparam("department"))
+    if has_category:
+        stmt = stmt.where(d.ai_category == bindparam("ai_category"))
+    if has_source:
+        stmt = stmt.where(d.source_raw_filename == bindparam("source"))
+
+    recent_expr = func.sum(case((d.created_date >= bindparam("recent_start"), d.cnt), else_=0))
+    prev_expr = func.sum(case((d.created_date <= bindparam("prev_end"), d.cnt), else_=0))
+    recent_count = recent_expr.label("recent_count")
+    prev_count = prev_expr.label("previous_count")
+
+    denom = case((prev_expr > 0, prev_expr), else_=1)
+    growth = ((recent_expr - prev_expr) * 1.0 / denom).label("growth_rate")
+
+    return (
+        stmt.add_columns(prev_count, recent_count, growth)
+        .group_by(d.sub_topic)
+        .having(recent_count >= bindparam("min_volume"))
+        .order_by(growth.desc(), recent_count.desc())
+        .limit(bindparam("top_n"))
+    )
+
+
+def _subtopic_sla_stats(db: Session, stmt) -> dict[str, dict[str, float | None]]:
+    """
+    Per-subtopic closure/rating stats from rows of (subTopic, closure_days, rating), reduced with one
+    pandas groupby instead of per-key Python lists. Fractions (over_30, low_rating) are 0..1 over
+    the non-null values; any stat with no values is None.
+    """
+    import pandas as pd
+
+    df = pd.read_sql_query(stmt, db.connection())
+    if df.empty:
+        return {}
+    closure = pd.to_numeric(df["closure_days"], errors="coerce")
+    rating = pd.to_numeric(df["rating"], errors="coerce")
+    frame = pd.DataFrame(
+        {
+            "sub": df["subTopic"],
+            "closure": closure,
+            "rating": rating,
+            "over_30": (closure > 30).astype(float).where(closure.notna()),
+            "low": (rating <= 2).astype(float).where(rating.notna()),
+        }
+    )
+    agg = frame.groupby("sub").agg(
+        median_closure=("closure", "median"),
+        over_30=("over_30", "mean"),
+        avg_rating=("rating", "mean"),
+        low_rating=("low", "mean"),
+    )
+    return {
+        sub: {k: (None if pd.isna(v) else float(v)) for k, v in row.items()}
+        for sub, row in agg.to_dict(orient="index").items()
+    }
+
 
 
 @dataclass(frozen=True)
@@ -46,8 +584,8 @@ class Filters:
 
 class AnalyticsService:
     def __init__(self) -> None:
-        self.ai = AIService()
-        self.gemini = GeminiClient()
+        self.ai = ai_service
+        self.gemini = ai_service.gemini
 
     def wordcloud(self, db: Session, f: Filters, *, top_n: int = 60) -> dict:
         """
@@ -56,130 +594,93 @@ class AnalyticsService:
         """
         # IMPORTANT: Word cloud must reflect the explicit 100-row input dataset file,
         # not any lingering historical rows in SQLite.
-        import pandas as pd
-
         dataset_path = Path(settings.data_processed_dir) / "input_dataset_latest.csv"
         if not dataset_path.exists():
             return {"words": [], "total_docs": 0, "top_n": int(top_n), "source": "missing_input_dataset"}
 
-        df = pd.read_csv(dataset_path)
-        # Apply light filtering on columns that exist in the input dataset.
-        if f.start_date:
-            df = df[df.get("Created_Date_ISO", "").astype(str) >= f.start_date.strftime("%Y-%m-%d")]
-        if f.end_date:
-            df = df[df.get("Created_Date_ISO", "").astype(str) <= f.end_date.strftime("%Y-%m-%d")]
-        if f.wards:
-            df = df[df.get("Ward Name", "").astype(str).isin(f.wards)]
-        if f.department:
-            df = df[df.get("Current Department Name", "").astype(str) == f.department]
-        # Category filter: use AI category from structured table if present in dataset (it won't be, so ignore).
-        texts = df.get("AI_Input_Text", pd.Series([], dtype=str)).astype(str).tolist()
-
-        # Minimal stopwords list (government-safe; tuned for civic complaints)
-        stop = {
-            "the",
-            "and",
-            "to",
-            "of",
-            "in",
-            "on",
-            "for",
-            "is",
-            "are",
-            "was",
-            "were",
-            "be",
-            "been",
-            "it",
-            "this",
-            "that",
-            "with",
-            "from",
-            "as",
-            "at",
-            "by",
-            "an",
-            "a",
-            "or",
-            "we",
-            "i",
-            "you",
-            "please",
-            "kindly",
-            "request",
-            "regarding",
-            "complaint",
-            "issue",
-            "problem",
-            "urgent",
-            "immediately",
-            "sir",
-            "madam",
-            "nmmc",
-            "not",
-            "has",
-            "have",
-            "our",
-            "your",
-            "they",
-            "their",
-            "there",
-        }
-
-        # Tokenize: keep alphabetic words, drop numbers/short tokens
-        counter: Counter[str] = Counter()
-        for t in texts:
-            s = (t or "").lower()
-            s = re.sub(r"[\r\n\t]+", " ", s)
-            s = re.sub(r"[^a-z\s]", " ", s)
-            s = re.sub(r"\s+", " ", s).strip()
-            if not s:
-                continue
-            for w in s.split(" "):
-                if len(w) < 3:
-                    continue
-                if w in stop:
-                    continue
-                counter[w] += 1
-
         top_n = max(10, min(int(top_n or 60), 120))
-        words = [{"text": k, "count": int(v)} for k, v in counter.most_common(top_n)]
-        return {"words": words, "total_docs": len(texts), "top_n": top_n, "source": str(dataset_path)}
+        # Cached per (file mtime, filters): dashboard refreshes skip the CSV parse + tokenization entirely.
+        # A preprocess run rewrites the CSV, which bumps mtime and naturally invalidates old entries.
+        top, total_docs = _wordcloud_counts(
+            str(dataset_path),
+            dataset_path.stat().st_mtime,
+            f.start_date,
+            f.end_date,
+            tuple(sorted(f.wards or [])),
+            f.department,
+            top_n,
+        )
+        words = [{"text": k, "count": v} for k, v in top]
+        return {"words": words, "total_docs": total_docs, "top_n": top_n, "source": str(dataset_path)}
 
     def _ai_meta(self, db: Session) -> dict | None:
         # If structured data exists, expose caseA/Gemini metadata for conditional UI branding.
-        row = db.execute(
-            select(GrievanceStructured.ai_provider, GrievanceStructured.ai_engine, GrievanceStructured.ai_model)
-            .order_by(GrievanceStructured.processed_at.desc())
-            .limit(1)
-        ).first()
-        if not row:
-            return None
-        provider, engine, model = row
-        return {"ai_provider": provider, "ai_engine": engine, "ai_model": model}
+        # Called by most endpoints; the answer only changes when structuring runs, which bumps _data_version.
+        global _ai_meta_cache
+        now = time.monotonic()
+        hit = _ai_meta_cache
+        if hit and hit[0] == _data_version and now - hit[1] < _AI_META_TTL_S:
+            return dict(hit[2]) if hit[2] else None
+        # A dashboard render fires several endpoints at once; after an invalidation only the first
+        # one queries, the rest wait on the lock and take its answer.
+        with _ai_meta_lock:
+            hit = _ai_meta_cache
+            if hit and hit[0] == _data_version and now - hit[1] < _AI_META_TTL_S:
+                return dict(hit[2]) if hit[2] else None
+            version = _data_version
+            row = db.execute(
+                select(GrievanceStructured.ai_provider, GrievanceStructured.ai_engine, GrievanceStructured.ai_model)
+                .order_by(GrievanceStructured.processed_at.desc())
+                .limit(1)
+            ).first()
+            meta = None
+            if row:
+                provider, engine, model = row
+                meta = {"ai_provider": provider, "ai_engine": engine, "ai_model": model}
+            _ai_meta_cache = (version, time.monotonic(), meta)
+        return dict(meta) if meta else None
 
     def dimensions(self, db: Session) -> dict:
-        wards = [w for (w,) in db.execute(select(GrievanceRaw.ward).distinct()).all() if w]
-        depts = [d for (d,) in db.execute(select(GrievanceRaw.department).distinct()).all() if d]
-        cats = [c for (c,) in db.execute(select(GrievanceStructured.category).distinct()).all() if c]
-        wards.sort()
-        depts.sort()
-        cats.sort()
-        return {"wards": wards, "departments": depts, "categories": cats}
+        def _build() -> dict:
+            by_kind = _distinct_dimension_values(
+                db,
+                {
+                    "ward": GrievanceRaw.ward,
+                    "department": GrievanceRaw.department,
+                    "category": GrievanceStructured.category,
+                },
+            )
+            return {
+                "wards": by_kind["ward"],
+                "departments": by_kind["department"],
+                "categories": by_kind["category"],
+            }
+
+        return _cached_dimensions("raw", _build)
 
     def processed_dimensions(self, db: Session) -> dict:
         """
         Dimensions sourced from grievances_processed (used for date-range filtering UX).
         """
-        wards = [w for (w,) in db.execute(select(GrievanceProcessed.ward_name).distinct()).all() if w]
-        depts = [d for (d,) in db.execute(select(GrievanceProcessed.department_name).distinct()).all() if d]
-        cats = [c for (c,) in db.execute(select(GrievanceProcessed.ai_category).distinct()).all() if c]
-        datasets = [s for (s,) in db.execute(select(GrievanceProcessed.source_raw_filename).distinct()).all() if s]
-        wards.sort()
-        depts.sort()
-        cats.sort()
-        datasets.sort()
-        return {"wards": wards, "departments": depts, "categories": cats, "datasets": datasets}
+
+        def _build() -> dict:
+            by_kind = _distinct_dimension_values(
+                db,
+                {
+                    "ward": GrievanceProcessed.ward_name,
+                    "department": GrievanceProcessed.department_name,
+                    "category": GrievanceProcessed.ai_category,
+                    "dataset": GrievanceProcessed.source_raw_filename,
+                },
+            )
+            return {
+                "wards": by_kind["ward"],
+                "departments": by_kind["department"],
+                "categories": by_kind["category"],
+                "datasets": by_kind["dataset"],
+            }
+
+        return _cached_dimensions("processed", _build)
 
     def processed_datasets(self, db: Session) -> dict:
         """
@@ -343,7 +844,7 @@ class AnalyticsService:
             GrievanceProcessed.created_date <= end_date,
         )
         if wards:
-            q = q.where(GrievanceProcessed.ward_name.in_(wards))
+            q = q.where(_ward_in(GrievanceProcessed.ward_name, wards))
         if department:
             q = q.where(GrievanceProcessed.department_name == department)
         if ai_category:
@@ -352,6 +853,7 @@ class AnalyticsService:
             q = q.where(GrievanceProcessed.source_raw_filename == source)
         return q
 
+    @_cached_result(ttl=_PREDICTIVE_TTL_S)
     def predictive_rising_subtopics(
         self,
         db: Session,
@@ -392,31 +894,24 @@ class AnalyticsService:
                 "note": "Selected date range is too short for two windows; expand the range.",
             }
 
-        base = self._processed_base(
-            start_date=prev_start,
-            end_date=end_date,
-            wards=wards,
-            department=department,
-            ai_category=ai_category,
-            source=source,
-        ).subquery()
-        sub_expr = func.coalesce(func.nullif(func.trim(base.c.ai_subtopic), ""), "General Civic Issue")
-
-        recent_expr = func.sum(case((base.c.created_date >= recent_start, 1), else_=0))
-        prev_expr = func.sum(case((base.c.created_date <= prev_end, 1), else_=0))
-        recent_count = recent_expr.label("recent_count")
-        prev_count = prev_expr.label("previous_count")
-
-        denom = case((prev_expr > 0, prev_expr), else_=1)
-        growth = ((recent_expr - prev_expr) * 1.0 / denom).label("growth_rate")
-
-        rows = db.execute(
-            select(sub_expr.label("subTopic"), prev_count, recent_count, growth)
-            .group_by(sub_expr)
-            .having(recent_count >= min_volume)
-            .order_by(growth.desc(), recent_count.desc())
-            .limit(top_n)
-        ).all()
+        stmt = _rising_subtopics_stmt(bool(wards), bool(department), bool(ai_category), bool(source))
+        params = {
+            "start_date": prev_start,
+            "end_date": end_date,
+            "recent_start": recent_start,
+            "prev_end": prev_end,
+            "min_volume": min_volume,
+            "top_n": top_n,
+        }
+        if wards:
+            params["wards"] = _ward_param(wards)
+        if department:
+            params["department"] = department
+        if ai_category:
+            params["ai_category"] = ai_category
+        if source:
+            params["source"] = source
+        rows = db.execute(stmt, params).all()
 
         out = []
         for sub, prev_n, recent_n, gr in rows:
@@ -442,6 +937,7 @@ class AnalyticsService:
             "rows": out,
         }
 
+    @_cached_result(ttl=_PREDICTIVE_TTL_S)
     def predictive_ward_risk(
         self,
         db: Session,
@@ -473,7 +969,7 @@ class AnalyticsService:
             source=source,
         ).subquery()
         ward_expr = func.coalesce(func.nullif(func.trim(base.c.ward_name), ""), "Unknown")
-        sub_expr = func.coalesce(func.nullif(func.trim(base.c.ai_subtopic), ""), "General Civic Issue")
+        sub_expr = base.c.ai_subtopic_norm
 
         recent_expr = func.sum(case((base.c.created_date >= recent_start, 1), else_=0))
         prev_expr = func.sum(case((base.c.created_date <= prev_end, 1), else_=0))
@@ -501,7 +997,7 @@ class AnalyticsService:
         if not ward_list:
             return {"window_days": window_days, "rows": []}
 
-        ward_sub = db.execute(
+        ward_sub = (
             select(
                 ward_expr.label("ward"),
                 sub_expr.label("subTopic"),
@@ -510,13 +1006,13 @@ class AnalyticsService:
             .where(ward_expr.in_(ward_list))
             .where(base.c.created_date >= recent_start)
             .group_by(ward_expr, sub_expr)
-        ).all()
-
-        # small python post-processing is fine here; aggregation already done in SQL.
-        by_ward_tot = {w: int(rn or 0) for (w, _p, rn, _g, _d) in rows}
-        by_ward_max = {}
-        for w, _s, c in ward_sub:
-            by_ward_max[w] = max(int(c or 0), by_ward_max.get(w, 0))
+            .subquery()
+        )
+        # Only the largest subtopic per ward is needed: reduce in SQL (one row per ward, <= 30).
+        by_ward_max = {
+            w: int(c or 0)
+            for (w, c) in db.execute(select(ward_sub.c.ward, func.max(ward_sub.c.cnt)).group_by(ward_sub.c.ward)).all()
+        }
 
         out = []
         for w, pn, rn, gr, ds in rows:
@@ -553,6 +1049,7 @@ class AnalyticsService:
 
         return {"window_days": window_days, "rows": out}
 
+    @_cached_result(ttl=_PREDICTIVE_TTL_S)
     def predictive_chronic_issues(
         self,
         db: Session,
@@ -587,7 +1084,7 @@ class AnalyticsService:
             ai_category=ai_category,
             source=source,
         ).subquery()
-        sub_expr = func.coalesce(func.nullif(func.trim(base_q.c.ai_subtopic), ""), "General Civic Issue")
+        sub_expr = base_q.c.ai_subtopic_norm
         ward_expr = func.coalesce(func.nullif(func.trim(base_q.c.ward_name), ""), "Unknown")
         period_col = base_q.c.created_week if period == "week" else base_q.c.created_month
 
@@ -602,37 +1099,49 @@ class AnalyticsService:
             .cte("counts")
         )
 
+        # dense_rank (not row_number) on purpose: a subtopic tied with the N-th entry of a period is
+        # just as "top" as the others, and row_number would drop it arbitrarily. The ranked set is the
+        # small per-period aggregate, so rank and filter in one inline subquery rather than two CTEs.
         ranked = select(
             counts.c.period,
             counts.c.subTopic,
             counts.c.cnt,
             func.dense_rank().over(partition_by=counts.c.period, order_by=counts.c.cnt.desc()).label("rnk"),
-        ).cte("ranked")
+        ).subquery("ranked")
+        top = select(ranked.c.period, ranked.c.subTopic, ranked.c.cnt).where(ranked.c.rnk <= top_n_per_period).subquery("topn")
 
-        top = select(ranked.c.period, ranked.c.subTopic, ranked.c.cnt).where(ranked.c.rnk <= top_n_per_period).cte("topn")
-
-        chronic = (
+        # Aggregate once in an inner query so HAVING/ORDER BY reuse the COUNT(DISTINCT) instead of re-evaluating it.
+        per_sub = (
             select(
                 top.c.subTopic,
                 func.count(func.distinct(top.c.period)).label("periods_active"),
                 func.sum(top.c.cnt).label("total_count"),
             )
             .group_by(top.c.subTopic)
-            .having(func.count(func.distinct(top.c.period)) >= min_periods)
-            .order_by(func.count(func.distinct(top.c.period)).desc(), func.sum(top.c.cnt).desc())
+            .subquery("per_sub")
+        )
+        chronic = (
+            select(per_sub.c.subTopic, per_sub.c.periods_active, per_sub.c.total_count)
+            .where(per_sub.c.periods_active >= min_periods)
+            .order_by(per_sub.c.periods_active.desc(), per_sub.c.total_count.desc())
             .limit(limit)
         ).cte("chronic")
 
-        # join back to get affected wards
-        ward_counts = (
+        # join back to get affected wards: (subTopic, ward) is already unique after the GROUP BY, so
+        # rank wards per subtopic and keep the 10 most affected before concatenating.
+        ward_ranked = (
             select(
                 sub_expr.label("subTopic"),
                 ward_expr.label("ward"),
-                func.count().label("cnt"),
+                func.row_number().over(partition_by=sub_expr, order_by=func.count().desc()).label("wrn"),
             )
-            .where(sub_expr.in_(select(chronic.c.subTopic)))
+            .select_from(base_q)
+            .join(chronic, chronic.c.subTopic == sub_expr)
             .group_by(sub_expr, ward_expr)
-            .cte("ward_counts")
+            .subquery("ward_ranked")
+        )
+        ward_counts = (
+            select(ward_ranked.c.subTopic, ward_ranked.c.ward).where(ward_ranked.c.wrn <= 10).cte("ward_counts")
         )
 
         rows = db.execute(
@@ -649,13 +1158,12 @@ class AnalyticsService:
 
         out = []
         for sub, pa, total, wards_str in rows:
-            wards_list = [w.strip() for w in (wards_str or "").split(",") if w.strip()]
             out.append(
                 {
                     "subTopic": sub,
                     "periods_active": int(pa or 0),
                     "total_count": int(total or 0),
-                    "affected_wards": wards_list[:10],
+                    "affected_wards": wards_str.split(", ") if wards_str else [],
                 }
             )
 
@@ -688,77 +1196,91 @@ class AnalyticsService:
             "ai_model": res.model_used,
         }
 
+    @_cached_result(freshness=_raw_freshness)
     def retrospective(self, db: Session, f: Filters) -> dict:
-        base = self._base(db, f).subquery()
-        total = db.scalar(select(func.count()).select_from(base)) or 0
+        conds = self._base_filters(f)
+        s_conds = self._base_filters(f, structured_joined=True)
         ai_meta = self._ai_meta(db)
 
-        # feedback avg + distribution (filtered)
-        ratings = (
-            db.execute(
-                select(GrievanceRaw.feedback_star)
-                .where(GrievanceRaw.id.in_(select(base.c.id)))
-                .where(GrievanceRaw.feedback_star.is_not(None))
-            )
-            .scalars()
-            .all()
+        # Every section is a small GROUP BY over the same filtered set: fetch them all in one
+        # UNION ALL round trip as (kind, key, count, sum) rows and split them apart in Python.
+        days = GrievanceRaw.resolution_days
+        bucket = _closure_bucket_expr(days)
+        # Star histogram key: rating rounded and clamped to 1..5 in SQL (CASE, so it is portable).
+        star_r = func.round(GrievanceRaw.feedback_star)
+        star_key = cast(cast(case((star_r < 1, 1), (star_r > 5, 5), else_=star_r), Integer), String)
+        date_key = cast(GrievanceRaw.created_date, String)
+        q = union_all(
+            select(literal("total"), null(), func.count(), null()).select_from(GrievanceRaw).where(*conds),
+            select(literal("star"), star_key, func.count(), func.sum(GrievanceRaw.feedback_star))
+            .where(*conds, GrievanceRaw.feedback_star.is_not(None))
+            .group_by(star_key),
+            select(literal("low"), null(), func.count(), null())
+            .select_from(GrievanceRaw)
+            .where(*conds, GrievanceRaw.feedback_star <= 2),
+            select(literal("bucket"), bucket, func.count(), func.sum(days)).where(*conds).group_by(bucket),
+            select(literal("category"), GrievanceStructured.category, func.count(GrievanceStructured.id), null())
+            .join(GrievanceRaw, GrievanceRaw.id == GrievanceStructured.raw_id)
+            .where(*s_conds)
+            .group_by(GrievanceStructured.category),
+            select(literal("sub"), GrievanceStructured.sub_issue, func.count(GrievanceStructured.id), null())
+            .join(GrievanceRaw, GrievanceRaw.id == GrievanceStructured.raw_id)
+            .where(*s_conds)
+            .group_by(GrievanceStructured.sub_issue),
+            select(literal("ward"), GrievanceRaw.ward, func.count(GrievanceRaw.id), null())
+            .where(*conds)
+            .group_by(GrievanceRaw.ward),
+            # Daily counts; ISO-week labels are derived from the (few) distinct dates below.
+            select(literal("day"), date_key, func.count(), null())
+            .where(*conds, GrievanceRaw.created_date.is_not(None))
+            .group_by(date_key),
         )
-        avg_feedback = (sum(ratings) / len(ratings)) if ratings else None
-        dist = Counter(int(round(max(1.0, min(5.0, float(r))))) for r in ratings)
-        feedback_dist = [{"star": s, "count": dist.get(s, 0)} for s in range(1, 6)]
+
+        total = 0
+        star_counts: dict[int, int] = {}
+        rating_sum = 0.0
+        low_feedback_n = 0
+        bucket_rows: list[tuple[str, int, float | None]] = []
+        by_kind: dict[str, list[tuple[str | None, int]]] = defaultdict(list)
+        by_week: dict[str, int] = {}
+        for kind, key, n, extra in db.execute(q):
+            n = int(n or 0)
+            if kind == "total":
+                total = n
+            elif kind == "star":
+                star_counts[int(key)] = n
+                rating_sum += float(extra or 0)
+            elif kind == "low":
+                low_feedback_n = n
+            elif kind == "bucket":
+                bucket_rows.append((key, n, extra))
+            elif kind == "day":
+                y, w, _ = dt.date.fromisoformat(str(key)[:10]).isocalendar()
+                wk = f"{y}-W{w:02d}"
+                by_week[wk] = by_week.get(wk, 0) + n
+            else:
+                by_kind[kind].append((key, n))
+
+        # feedback avg + distribution (filtered)
+        n_ratings = sum(star_counts.values())
+        avg_feedback = (rating_sum / n_ratings) if n_ratings else None
+        feedback_dist = [{"star": s, "count": star_counts.get(s, 0)} for s in range(1, 6)]
 
         # closure distribution (filtered)
-        rows = db.execute(
-            select(GrievanceRaw.created_date, GrievanceRaw.closed_date).where(GrievanceRaw.id.in_(select(base.c.id)))
-        ).all()
-        days = [_closure_days(a, b) for (a, b) in rows]
-        bucket_counts = Counter(_bucket(d) for d in days)
-        closure_buckets = [{"bucket": b, "count": bucket_counts.get(b, 0)} for b in ["<7", "7-14", ">14", "Unknown"]]
-        known = [d for d in days if d is not None]
-        avg_closure = (sum(known) / len(known)) if known else None
+        bucket_counts = {b: n for (b, n, _) in bucket_rows}
+        closure_buckets = [{"bucket": b, "count": bucket_counts.get(b, 0)} for b in _CLOSURE_BUCKETS]
+        known_n = sum(n for (b, n, _) in bucket_rows if b != "Unknown")
+        known_sum = sum(float(t or 0) for (_, _, t) in bucket_rows)
+        avg_closure = (known_sum / known_n) if known_n else None
 
-        # category distribution (filtered)
-        cat_rows = db.execute(
-            select(GrievanceStructured.category, func.count(GrievanceStructured.id))
-            .join(GrievanceRaw, GrievanceRaw.id == GrievanceStructured.raw_id)
-            .where(GrievanceRaw.id.in_(select(base.c.id)))
-            .group_by(GrievanceStructured.category)
-            .order_by(func.count(GrievanceStructured.id).desc())
-        ).all()
-        categories = [{"category": c, "count": n} for (c, n) in cat_rows]
+        def _desc(kind: str) -> list[tuple[str | None, int]]:
+            return sorted(by_kind.get(kind, []), key=lambda kv: kv[1], reverse=True)
 
+        categories = [{"category": c, "count": n} for (c, n) in _desc("category")]
         # subcategory/subtopic distribution (filtered) — derived from AI sub_issue
-        sub_rows = db.execute(
-            select(GrievanceStructured.sub_issue, func.count(GrievanceStructured.id))
-            .join(GrievanceRaw, GrievanceRaw.id == GrievanceStructured.raw_id)
-            .where(GrievanceRaw.id.in_(select(base.c.id)))
-            .group_by(GrievanceStructured.sub_issue)
-            .order_by(func.count(GrievanceStructured.id).desc())
-        ).all()
-        subcategories = [{"subTopic": s, "count": n} for (s, n) in sub_rows]
-
-        # ward heatmap (filtered)
-        ward_rows = db.execute(
-            select(GrievanceRaw.ward, func.count(GrievanceRaw.id))
-            .where(GrievanceRaw.id.in_(select(base.c.id)))
-            .group_by(GrievanceRaw.ward)
-            .order_by(func.count(GrievanceRaw.id).desc())
-        ).all()
-        ward_heat = [{"ward": (w or "Unknown"), "count": n} for (w, n) in ward_rows]
-
+        subcategories = [{"subTopic": s, "count": n} for (s, n) in _desc("sub")]
+        ward_heat = [{"ward": (w or "Unknown"), "count": n} for (w, n) in _desc("ward")]
         # trend (weekly by created_date) (filtered)
-        created_dates = (
-            db.execute(select(GrievanceRaw.created_date).where(GrievanceRaw.id.in_(select(base.c.id))))
-            .scalars()
-            .all()
-        )
-        by_week: dict[str, int] = defaultdict(int)
-        for d in created_dates:
-            if not d:
-                continue
-            y, w, _ = d.isocalendar()
-            key = f"{y}-W{w:02d}"
-            by_week[key] += 1
         trend = [{"week": k, "count": by_week[k]} for k in sorted(by_week.keys())]
 
         insights = []
@@ -769,7 +1291,7 @@ class AnalyticsService:
         if avg_closure is not None:
             insights.append(f"Average closure time is {round(avg_closure, 1)} days with {bucket_counts.get('>14', 0)} in >14 days.")
         if avg_feedback is not None:
-            insights.append(f"Average feedback is {round(avg_feedback, 2)}/5.0; low feedback (≤2) count: {sum(1 for r in ratings if r <= 2)}.")
+            insights.append(f"Average feedback is {round(avg_feedback, 2)}/5.0; low feedback (≤2) count: {low_feedback_n}.")
 
         return {
             "ai_meta": ai_meta,
@@ -787,20 +1309,40 @@ class AnalyticsService:
             "insights": insights[:5],
         }
 
+    def commissioner_bundle(self, db: Session, f: Filters) -> dict:
+        """
+        retrospective + inferential + predictive for the commissioner report. The three are independent
+        reads, so they run concurrently, each on its own session over the same engine, when that many
+        fan-out connections can be reserved; otherwise in turn on the caller's session.
+        """
+        parts = {"retrospective": self.retrospective, "inferential": self.inferential, "predictive": self.predictive}
+        bind = db.get_bind()
+
+        def _run(fn):
+            with Session(bind) as s:
+                return fn(s, f)
+
+        if not isinstance(bind.pool, StaticPool):
+            # The sessions' connections come out of the fan-out budget, so the parts' own
+            # _execute_concurrently calls only fan out with whatever is left of it.
+            with _reserve_connections(len(parts)) as reserved:
+                if reserved:
+                    # A dedicated pool: the parts fan out their own SELECTs on _read_executor, so running
+                    # them on it too could leave every worker waiting on queued inner work.
+                    with ThreadPoolExecutor(max_workers=len(parts), thread_name_prefix="analytics-bundle") as pool:
+                        return dict(zip(parts, pool.map(_run, parts.values())))
+        return {name: fn(db, f) for name, fn in parts.items()}
+
     def inferential(self, db: Session, f: Filters) -> dict:
-        base = self._base(db, f).subquery()
         ai_meta = self._ai_meta(db)
-        # Low feedback subset (filtered)
-        low_ids = (
-            db.execute(
-                select(GrievanceRaw.id)
-                .where(GrievanceRaw.id.in_(select(base.c.id)))
-                .where(GrievanceRaw.feedback_star <= 2.0)
-            )
-            .scalars()
-            .all()
+        # Low feedback subset (filtered); stays in SQL as a CTE that the driver queries join against.
+        low = (
+            select(GrievanceRaw.id)
+            .where(*self._base_filters(f), GrievanceRaw.feedback_star <= 2.0)
+            .cte("low_feedback")
         )
-        if not low_ids:
+        low_count = int(db.scalar(select(func.count()).select_from(low)) or 0)
+        if not low_count:
             return {
                 "ai_meta": ai_meta,
                 "lowFeedback": {"count": 0},
@@ -810,70 +1352,76 @@ class AnalyticsService:
                 "insights": ["No low-feedback grievances found for current filters."],
             }
 
-        # correlate low feedback
-        by_cat = db.execute(
-            select(GrievanceStructured.category, func.count(GrievanceStructured.id))
-            .join(GrievanceRaw, GrievanceRaw.id == GrievanceStructured.raw_id)
-            .where(GrievanceRaw.id.in_(low_ids))
-            .group_by(GrievanceStructured.category)
-            .order_by(func.count(GrievanceStructured.id).desc())
-        ).all()
-        by_sub = db.execute(
-            select(GrievanceStructured.sub_issue, func.count(GrievanceStructured.id))
-            .join(GrievanceRaw, GrievanceRaw.id == GrievanceStructured.raw_id)
-            .where(GrievanceRaw.id.in_(low_ids))
-            .group_by(GrievanceStructured.sub_issue)
-            .order_by(func.count(GrievanceStructured.id).desc())
-        ).all()
-        by_ward = db.execute(
-            select(GrievanceRaw.ward, func.count(GrievanceRaw.id))
-            .where(GrievanceRaw.id.in_(low_ids))
-            .group_by(GrievanceRaw.ward)
-            .order_by(func.count(GrievanceRaw.id).desc())
-        ).all()
-        by_dept = db.execute(
-            select(GrievanceRaw.department, func.count(GrievanceRaw.id))
-            .where(GrievanceRaw.id.in_(low_ids))
-            .group_by(GrievanceRaw.department)
-            .order_by(func.count(GrievanceRaw.id).desc())
-        ).all()
+        days = GrievanceRaw.resolution_days
+        bucket = _closure_bucket_expr(days)
+        reason_key = func.coalesce(func.nullif(GrievanceStructured.dissatisfaction_reason, ""), "Unspecified")
+        ward_key = func.coalesce(func.nullif(GrievanceRaw.ward, ""), "Unknown")
+        (
+            by_cat,
+            by_sub,
+            by_ward,
+            by_dept,
+            bucket_rows,
+            reason_rows,
+            cat_delay_rows,
+            ward_delay_rows,
+            silent_rows,
+        ) = _execute_concurrently(
+            db,
+            [
+                # correlate low feedback
+                select(GrievanceStructured.category, func.count(GrievanceStructured.id))
+                .join(GrievanceRaw, GrievanceRaw.id == GrievanceStructured.raw_id)
+                .join(low, low.c.id == GrievanceRaw.id)
+                .group_by(GrievanceStructured.category)
+                .order_by(func.count(GrievanceStructured.id).desc()),
+                select(GrievanceStructured.sub_issue, func.count(GrievanceStructured.id))
+                .join(GrievanceRaw, GrievanceRaw.id == GrievanceStructured.raw_id)
+                .join(low, low.c.id == GrievanceRaw.id)
+                .group_by(GrievanceStructured.sub_issue)
+                .order_by(func.count(GrievanceStructured.id).desc()),
+                select(GrievanceRaw.ward, func.count(GrievanceRaw.id))
+                .join(low, low.c.id == GrievanceRaw.id)
+                .group_by(GrievanceRaw.ward)
+                .order_by(func.count(GrievanceRaw.id).desc()),
+                select(GrievanceRaw.department, func.count(GrievanceRaw.id))
+                .join(low, low.c.id == GrievanceRaw.id)
+                .group_by(GrievanceRaw.department)
+                .order_by(func.count(GrievanceRaw.id).desc()),
+                # closure bucket correlation
+                select(bucket, func.count()).join(low, low.c.id == GrievanceRaw.id).group_by(bucket),
+                # AI dissatisfaction reasons top
+                select(reason_key, func.count())
+                .join(GrievanceRaw, GrievanceRaw.id == GrievanceStructured.raw_id)
+                .join(low, low.c.id == GrievanceRaw.id)
+                .group_by(reason_key)
+                .order_by(func.count().desc())
+                .limit(8),
+                # delay drivers: avg closure by category / ward
+                select(GrievanceStructured.category, func.avg(days), func.count(days))
+                .join(GrievanceRaw, GrievanceRaw.id == GrievanceStructured.raw_id)
+                .where(days.is_not(None))
+                .group_by(GrievanceStructured.category),
+                select(ward_key, func.avg(days), func.count(days))
+                .join(GrievanceRaw, GrievanceRaw.id == GrievanceStructured.raw_id)
+                .where(days.is_not(None))
+                .group_by(ward_key),
+                select(func.count(GrievanceStructured.id))
+                .join(GrievanceRaw, GrievanceRaw.id == GrievanceStructured.raw_id)
+                .join(low, low.c.id == GrievanceRaw.id)
+                .where(GrievanceStructured.repeat_flag.is_(True)),
+            ],
+        )
 
-        # closure bucket correlation (python)
-        rows = db.execute(select(GrievanceRaw.created_date, GrievanceRaw.closed_date).where(GrievanceRaw.id.in_(low_ids))).all()
-        buckets = Counter(_bucket(_closure_days(a, b)) for (a, b) in rows)
-        by_closure_bucket = [{"bucket": b, "count": buckets.get(b, 0)} for b in ["<7", "7-14", ">14", "Unknown"]]
-
-        # AI dissatisfaction reasons top
-        reasons = db.execute(
-            select(GrievanceStructured.dissatisfaction_reason).join(GrievanceRaw, GrievanceRaw.id == GrievanceStructured.raw_id).where(GrievanceRaw.id.in_(low_ids))
-        ).scalars().all()
-        reason_counts = Counter((r or "Unspecified") for r in reasons)
-        top_reasons = [{"reason": k, "count": v} for k, v in reason_counts.most_common(8)]
-
-        # delay drivers: avg closure by category / ward
-        joined = db.execute(
-            select(GrievanceStructured.category, GrievanceRaw.ward, GrievanceRaw.created_date, GrievanceRaw.closed_date)
-            .join(GrievanceRaw, GrievanceRaw.id == GrievanceStructured.raw_id)
-        ).all()
-        by_cat_days: dict[str, list[int]] = defaultdict(list)
-        by_ward_days: dict[str, list[int]] = defaultdict(list)
-        for cat, ward, a, b in joined:
-            d = _closure_days(a, b)
-            if d is None:
-                continue
-            by_cat_days[cat].append(d)
-            by_ward_days[ward or "Unknown"].append(d)
-        delay_by_cat = [{"category": k, "avgDays": round(sum(v)/len(v), 2), "count": len(v)} for k, v in by_cat_days.items() if v]
-        delay_by_ward = [{"ward": k, "avgDays": round(sum(v)/len(v), 2), "count": len(v)} for k, v in by_ward_days.items() if v]
+        buckets = {b: int(n) for (b, n) in bucket_rows}
+        by_closure_bucket = [{"bucket": b, "count": buckets.get(b, 0)} for b in _CLOSURE_BUCKETS]
+        top_reasons = [{"reason": k, "count": int(v)} for (k, v) in reason_rows]
+        delay_by_cat = [{"category": k, "avgDays": round(float(a), 2), "count": int(n)} for (k, a, n) in cat_delay_rows]
+        delay_by_ward = [{"ward": k, "avgDays": round(float(a), 2), "count": int(n)} for (k, a, n) in ward_delay_rows]
         delay_by_cat.sort(key=lambda x: x["avgDays"], reverse=True)
         delay_by_ward.sort(key=lambda x: x["avgDays"], reverse=True)
 
-        silent = db.scalar(
-            select(func.count(GrievanceStructured.id))
-            .join(GrievanceRaw, GrievanceRaw.id == GrievanceStructured.raw_id)
-            .where(GrievanceRaw.id.in_(low_ids))
-            .where(GrievanceStructured.repeat_flag.is_(True))
-        ) or 0
+        silent = silent_rows[0][0] or 0
 
         insights = []
         if by_cat:
@@ -887,7 +1435,7 @@ class AnalyticsService:
 
         return {
             "ai_meta": ai_meta,
-            "lowFeedback": {"count": len(low_ids)},
+            "lowFeedback": {"count": low_count},
             "drivers": {
                 "byCategory": [{"category": c, "count": n} for (c, n) in by_cat],
                 "bySubIssue": [{"subIssue": s, "count": n} for (s, n) in by_sub[:12]],
@@ -901,32 +1449,57 @@ class AnalyticsService:
             "insights": insights[:5],
         }
 
+    @_cached_result(freshness=_raw_freshness)
     def predictive(self, db: Session, f: Filters) -> dict:
-        base = self._base(db, f).subquery()
+        conds = self._base_filters(f)
+        s_conds = self._base_filters(f, structured_joined=True)
         ai_meta = self._ai_meta(db)
-        anchor = db.scalar(select(func.max(GrievanceRaw.created_date)).where(GrievanceRaw.id.in_(select(base.c.id))))
+        anchor = db.scalar(select(func.max(GrievanceRaw.created_date)).where(*conds))
         today = anchor or dt.date.today()
         d30 = today - dt.timedelta(days=30)
         d60 = today - dt.timedelta(days=60)
 
-        rows = db.execute(
-            select(GrievanceRaw.ward, GrievanceRaw.created_date).where(GrievanceRaw.id.in_(select(base.c.id)))
-        ).all()
-        ward_last = Counter()
-        ward_prev = Counter()
-        for ward, created in rows:
-            if not created:
-                continue
-            w = ward or "Unknown"
-            if created >= d30:
-                ward_last[w] += 1
-            elif created >= d60:
-                ward_prev[w] += 1
+        created = GrievanceRaw.created_date
+        in_last = created >= d30
+        in_prev = (created < d30) & (created >= d60)
+        has_ai = GrievanceStructured.id.is_not(None)
+        is_neg = GrievanceStructured.sentiment_id == SENT_NEG
+        ward_key = func.coalesce(func.nullif(GrievanceRaw.ward, ""), "Unknown")
+
+        def _n(cond):
+            return func.sum(case((cond, 1), else_=0))
+
+        # One conditional-aggregate pass per ward: volume windows over all rows, plus the structured-only
+        # totals / negatives used by the sentiment alerts (outer join so unstructured rows still count as volume).
+        # The per-category windows are independent, so both queries run concurrently.
+        ward_rows, cat_rows = _execute_concurrently(
+            db,
+            [
+                select(
+                    ward_key,
+                    _n(in_last),
+                    _n(in_prev),
+                    _n(in_last & has_ai),
+                    _n(in_prev & has_ai),
+                    _n(in_last & is_neg),
+                    _n(in_prev & is_neg),
+                )
+                .select_from(GrievanceRaw)
+                .outerjoin(GrievanceStructured, GrievanceStructured.raw_id == GrievanceRaw.id)
+                .where(*s_conds, created.is_not(None))
+                .group_by(ward_key),
+                select(GrievanceStructured.category, _n(in_last), _n(in_prev))
+                .join(GrievanceRaw, GrievanceRaw.id == GrievanceStructured.raw_id)
+                .where(*s_conds, created.is_not(None))
+                .group_by(GrievanceStructured.category),
+            ],
+        )
 
         ward_risk = []
-        for w in set(ward_last) | set(ward_prev):
-            last = ward_last[w]
-            prev = ward_prev[w]
+        sent_by_ward: dict[str, tuple[int, int, int, int]] = {}
+        for w, last, prev, s_last, s_prev, n_last, n_prev in ward_rows:
+            last, prev = int(last or 0), int(prev or 0)
+            sent_by_ward[w] = (int(s_last or 0), int(s_prev or 0), int(n_last or 0), int(n_prev or 0))
             if last >= max(6, prev * 2) and last > prev:
                 ward_risk.append({"ward": w, "risk": "HIGH", "last30": last, "prev30": prev})
             elif last >= max(4, int(prev * 1.5)) and last > prev:
@@ -934,25 +1507,9 @@ class AnalyticsService:
         ward_risk.sort(key=lambda x: (x["risk"], x["last30"]), reverse=True)
 
         # category rising
-        rows2 = db.execute(
-            select(GrievanceStructured.category, GrievanceRaw.created_date)
-            .join(GrievanceRaw, GrievanceRaw.id == GrievanceStructured.raw_id)
-            .where(GrievanceRaw.id.in_(select(base.c.id)))
-        ).all()
-        cat_last = Counter()
-        cat_prev = Counter()
-        for cat, created in rows2:
-            if not created:
-                continue
-            if created >= d30:
-                cat_last[cat] += 1
-            elif created >= d60:
-                cat_prev[cat] += 1
-
         cat_risk = []
-        for cat in set(cat_last) | set(cat_prev):
-            last = cat_last[cat]
-            prev = cat_prev[cat]
+        for cat, last, prev in cat_rows:
+            last, prev = int(last or 0), int(prev or 0)
             if last >= max(8, prev * 2) and last > prev:
                 cat_risk.append({"category": cat, "risk": "HIGH", "last30": last, "prev30": prev})
             elif last >= max(5, int(prev * 1.5)) and last > prev:
@@ -960,33 +1517,13 @@ class AnalyticsService:
         cat_risk.sort(key=lambda x: (x["risk"], x["last30"]), reverse=True)
 
         # alerts: rising volume + negative sentiment (by ward)
-        ward_sent = db.execute(
-            select(GrievanceRaw.ward, GrievanceStructured.sentiment, GrievanceRaw.created_date)
-            .join(GrievanceStructured, GrievanceStructured.raw_id == GrievanceRaw.id)
-            .where(GrievanceRaw.id.in_(select(base.c.id)))
-        ).all()
-        neg_last = Counter()
-        neg_prev = Counter()
-        total_last = Counter()
-        total_prev = Counter()
-        for ward, sent, created in ward_sent:
-            if not created:
-                continue
-            w = ward or "Unknown"
-            if created >= d30:
-                total_last[w] += 1
-                if sent == "negative":
-                    neg_last[w] += 1
-            elif created >= d60:
-                total_prev[w] += 1
-                if sent == "negative":
-                    neg_prev[w] += 1
         alerts = []
         for w in ward_risk[:20]:
             ward = w["ward"]
-            last_ratio = (neg_last[ward] / total_last[ward]) if total_last[ward] else 0.0
-            prev_ratio = (neg_prev[ward] / total_prev[ward]) if total_prev[ward] else 0.0
-            if last_ratio > prev_ratio + 0.15 and total_last[ward] >= 4:
+            total_last, total_prev, neg_last, neg_prev = sent_by_ward.get(ward, (0, 0, 0, 0))
+            last_ratio = (neg_last / total_last) if total_last else 0.0
+            prev_ratio = (neg_prev / total_prev) if total_prev else 0.0
+            if last_ratio > prev_ratio + 0.15 and total_last >= 4:
                 alerts.append({"type": "WARD_SENTIMENT", "ward": ward, "negativeRatioLast30": round(last_ratio, 2), "negativeRatioPrev30": round(prev_ratio, 2)})
 
         insights = []
@@ -1033,15 +1570,17 @@ class AnalyticsService:
             else_=None,
         ).label("star")
 
+        # Distribution and average from one pass: per-star counts plus per-star rating sums.
         dist_rows = db.execute(
-            select(star_norm, func.count().label("count"))
+            select(star_norm, func.count().label("count"), func.sum(base.c.feedback_rating).label("rating_sum"))
             .where(star_norm.is_not(None))
             .group_by(star_norm)
             .order_by(star_norm.asc())
         ).all()
-        feedback_distribution = [{"star": int(s), "count": int(c)} for (s, c) in dist_rows if s is not None]
+        feedback_distribution = [{"star": int(s), "count": int(c)} for (s, c, _) in dist_rows if s is not None]
 
-        avg_feedback = db.execute(select(func.avg(base.c.feedback_rating)).where(star_norm.is_not(None))).scalar()
+        rated_n = sum(int(c) for (_, c, _) in dist_rows)
+        avg_feedback = (sum(float(t or 0) for (_, _, t) in dist_rows) / rated_n) if rated_n else None
         avg_feedback = round(float(avg_feedback), 2) if avg_feedback is not None else None
 
         # Low feedback (<=2)
@@ -1049,34 +1588,26 @@ class AnalyticsService:
         cat_expr = func.coalesce(func.nullif(func.trim(base.c.ai_category), ""), func.nullif(func.trim(base.c.department_name), ""), "Unknown").label("category")
         ward_expr = func.coalesce(func.nullif(func.trim(base.c.ward_name), ""), "Unknown").label("ward")
 
-        by_cat_rows = db.execute(
-            select(cat_expr, func.count().label("count"))
-            .where(star_norm.is_not(None), is_low)
-            .group_by(cat_expr)
-            .order_by(func.count().desc())
-        ).all()
-        by_ward_rows = db.execute(
-            select(ward_expr, func.count().label("count"))
-            .where(star_norm.is_not(None), is_low)
-            .group_by(ward_expr)
-            .order_by(func.count().desc())
-        ).all()
-
         # Closure bucket for low feedback correlation (only if closed_date present)
-        days = cast(func.julianday(base.c.closed_date) - func.julianday(base.c.created_date), Integer)
-        days_ok = case(((base.c.closed_date.is_not(None)) & (base.c.created_date.is_not(None)) & (days >= 0), days), else_=None)
-        bucket = case(
-            (days_ok.is_(None), "Unknown"),
-            (days_ok < 7, "<7"),
-            (days_ok <= 14, "7-14"),
-            else_=">14",
-        ).label("bucket")
-        by_bucket_rows = db.execute(
-            select(bucket, func.count().label("count"))
-            .where(star_norm.is_not(None), is_low)
-            .group_by(bucket)
-            .order_by(func.count().desc())
+        days_ok = _closure_days_expr(db, base.c.created_date, base.c.closed_date)
+        bucket = _closure_bucket_expr(days_ok).label("bucket")
+
+        # All three low-feedback driver breakdowns in one UNION ALL round trip, tagged by kind.
+        driver_rows = db.execute(
+            union_all(
+                select(literal("category").label("kind"), cat_expr, func.count().label("count"))
+                .where(star_norm.is_not(None), is_low)
+                .group_by(cat_expr),
+                select(literal("ward"), ward_expr, func.count()).where(star_norm.is_not(None), is_low).group_by(ward_expr),
+                select(literal("bucket"), bucket, func.count()).where(star_norm.is_not(None), is_low).group_by(bucket),
+            )
         ).all()
+        drivers: dict[str, list[tuple[str, int]]] = defaultdict(list)
+        for kind, key, n in driver_rows:
+            if key:
+                drivers[kind].append((key, int(n)))
+        for rows in drivers.values():
+            rows.sort(key=lambda kv: kv[1], reverse=True)
 
         # We intentionally avoid grouping by free-text remarks here (too noisy for charts).
         top_reasons: list[dict] = []
@@ -1108,9 +1639,9 @@ class AnalyticsService:
             "avgFeedback": avg_feedback,
             "lowFeedbackDrivers": {
                 "topDissatisfactionReasons": top_reasons,
-                "byCategory": [{"category": c, "count": int(n)} for (c, n) in by_cat_rows if c],
-                "byWard": [{"ward": w, "count": int(n)} for (w, n) in by_ward_rows if w],
-                "byClosureBucket": [{"bucket": b, "count": int(n)} for (b, n) in by_bucket_rows if b],
+                "byCategory": [{"category": c, "count": n} for (c, n) in drivers["category"]],
+                "byWard": [{"ward": w, "count": n} for (w, n) in drivers["ward"]],
+                "byClosureBucket": [{"bucket": b, "count": n} for (b, n) in drivers["bucket"]],
             },
             "insights": insights[:5],
         }
@@ -1120,7 +1651,6 @@ class AnalyticsService:
         Closure analytics using grievances_processed (supports raw2 close_date).
         """
         import datetime as dt
-        from sqlalchemy import Integer, and_, cast
 
         start = f.start_date or dt.date(1900, 1, 1)
         end = f.end_date or dt.date.today()
@@ -1134,20 +1664,12 @@ class AnalyticsService:
             source=f.source,
         ).subquery()
 
-        days = cast(func.julianday(base.c.closed_date) - func.julianday(base.c.created_date), Integer)
-        days_ok = case(((base.c.closed_date.is_not(None)) & (base.c.created_date.is_not(None)) & (days >= 0), days), else_=None).label(
-            "closure_days"
-        )
-        bucket = case(
-            (days_ok.is_(None), "Unknown"),
-            (days_ok < 7, "<7"),
-            (days_ok <= 14, "7-14"),
-            else_=">14",
-        ).label("bucket")
+        days_ok = _closure_days_expr(db, base.c.created_date, base.c.closed_date)
+        bucket = _closure_bucket_expr(days_ok).label("bucket")
 
         bucket_rows = db.execute(select(bucket, func.count().label("count")).group_by(bucket)).all()
         bucket_counts = {b: int(c) for (b, c) in bucket_rows if b}
-        buckets = [{"bucket": b, "count": bucket_counts.get(b, 0)} for b in ["<7", "7-14", ">14", "Unknown"]]
+        buckets = [{"bucket": b, "count": bucket_counts.get(b, 0)} for b in _CLOSURE_BUCKETS]
 
         cat_expr = func.coalesce(func.nullif(func.trim(base.c.ai_category), ""), func.nullif(func.trim(base.c.department_name), ""), "Unknown").label("category")
         ward_expr = func.coalesce(func.nullif(func.trim(base.c.ward_name), ""), "Unknown").label("ward")
@@ -1243,17 +1765,11 @@ class AnalyticsService:
             else_=closed_days,
         )
 
-        vals = db.execute(select(closure_ok).where(closure_ok.is_not(None)).select_from(base)).scalars().all()
-        xs = [float(x) for x in vals if x is not None]
-        xs.sort()
-        n = len(xs)
+        hist = _value_histogram(db, closure_ok, base)
+        n = sum(c for _, c in hist)
 
-        median = self._median(xs) if xs else None
-        p90 = None
-        if xs:
-            idx = int(round(0.9 * (len(xs) - 1)))
-            idx = max(0, min(idx, len(xs) - 1))
-            p90 = float(xs[idx])
+        median = _histogram_median(hist, n)
+        p90 = _histogram_p90(hist, n)
 
         # Bucket distribution (days)
         buckets = [
@@ -1270,30 +1786,30 @@ class AnalyticsService:
         within_1 = 0
         within_7 = 0
         over_30 = 0
-        for v in xs:
+        for v, c in hist:
             if v <= 1:
-                within_1 += 1
+                within_1 += c
             if v <= 7:
-                within_7 += 1
+                within_7 += c
             if v > 30:
-                over_30 += 1
+                over_30 += c
             # bucket assignment (exclusive lower bound, inclusive upper bound)
             placed = False
             for label, lo, hi, _band in buckets:
                 if hi is None:
                     if v > lo:
-                        counts[label] += 1
+                        counts[label] += c
                         placed = True
                         break
                 else:
                     if v > lo and v <= hi:
-                        counts[label] += 1
+                        counts[label] += c
                         placed = True
                         break
             if not placed:
                 # For exact 0 days, put into 0-1 Day.
                 if v == 0:
-                    counts["0-1 Day"] += 1
+                    counts["0-1 Day"] += c
 
         def pct(x: int) -> float | None:
             if not n:
@@ -1382,16 +1898,10 @@ class AnalyticsService:
             ),
         )
 
-        dvals = db.execute(select(delay).where(delay.is_not(None)).select_from(base)).scalars().all()
-        xs = [float(x) for x in dvals if x is not None]
-        xs.sort()
-        n_delay = len(xs)
-        med_delay = self._median(xs) if xs else None
-        p90_delay = None
-        if xs:
-            idx = int(round(0.9 * (len(xs) - 1)))
-            idx = max(0, min(idx, len(xs) - 1))
-            p90_delay = float(xs[idx])
+        dhist = _value_histogram(db, delay, base)
+        n_delay = sum(c for _, c in dhist)
+        med_delay = _histogram_median(dhist, n_delay)
+        p90_delay = _histogram_p90(dhist, n_delay)
 
         # Hop distribution among forwarded tickets:
         # - 1 Hop = forward_count == 1
@@ -1585,20 +2095,29 @@ class AnalyticsService:
         }
 
     def _base(self, db: Session, f: Filters):
-        q = select(GrievanceRaw.id)
+        return select(GrievanceRaw.id).where(*self._base_filters(f))
+
+    def _base_filters(self, f: Filters, *, structured_joined: bool = False) -> list:
+        """
+        The `_base` filters as plain WHERE clauses on GrievanceRaw, for single-table leaf queries that
+        don't need the id subquery. Pass structured_joined=True when the query already joins
+        GrievanceStructured, so the category filter applies to that join instead of an EXISTS.
+        """
+        conds = []
         if f.start_date:
-            q = q.where(GrievanceRaw.created_date >= f.start_date)
+            conds.append(GrievanceRaw.created_date >= f.start_date)
         if f.end_date:
-            q = q.where(GrievanceRaw.created_date <= f.end_date)
+            conds.append(GrievanceRaw.created_date <= f.end_date)
         if f.wards:
-            q = q.where(GrievanceRaw.ward.in_(f.wards))
+            conds.append(_ward_in(GrievanceRaw.ward, f.wards))
         if f.department:
-            q = q.where(GrievanceRaw.department == f.department)
+            conds.append(GrievanceRaw.department == f.department)
         if f.category:
-            q = q.join(GrievanceStructured, GrievanceStructured.raw_id == GrievanceRaw.id).where(
-                GrievanceStructured.category == f.category
-            )
-        return q
+            if structured_joined:
+                conds.append(GrievanceStructured.category == f.category)
+            else:
+                conds.append(GrievanceRaw.structured.has(GrievanceStructured.category == f.category))
+        return conds
 
     # =========================
     # Date-range analytics (NEW) — uses grievances_processed only
@@ -1658,7 +2177,7 @@ class AnalyticsService:
         if wards:
             ward_list = [w.strip() for w in wards if str(w or "").strip()]
             if ward_list:
-                conds.append(func.trim(GrievanceProcessed.ward_name).in_(ward_list))
+                conds.append(_ward_in(func.trim(GrievanceProcessed.ward_name), ward_list))
         if department:
             conds.append(func.trim(GrievanceProcessed.department_name) == str(department).strip())
         if category:
@@ -1690,6 +2209,7 @@ class AnalyticsService:
             )
         return q.subquery()
 
+    @_cached_result()
     def executive_overview_v2(
         self,
         db: Session,
@@ -1754,18 +2274,11 @@ class AnalyticsService:
         )
         avg_closure = _with_retry(lambda: db.scalar(select(func.avg(closure_ok)).select_from(base)))
         avg_closure = round(float(avg_closure), 2) if avg_closure is not None else None
-        # median / p90 (python; N ~ 10k is fine)
-        closure_vals = _with_retry(
-            lambda: db.execute(select(closure_ok).where(closure_ok.is_not(None)).select_from(base)).scalars().all()
-        )
-        closure_vals_f = [float(x) for x in closure_vals if x is not None]
-        closure_vals_f.sort()
-        median_closure = self._median(closure_vals_f) if closure_vals_f else None
-        p90_closure = None
-        if closure_vals_f:
-            idx = int(round(0.9 * (len(closure_vals_f) - 1)))
-            idx = max(0, min(idx, len(closure_vals_f) - 1))
-            p90_closure = float(closure_vals_f[idx])
+        # median / p90 from the per-day histogram (one row per distinct closure time, not per grievance)
+        closure_hist = _with_retry(lambda: _value_histogram(db, closure_ok, base))
+        n_closure = sum(c for _, c in closure_hist)
+        median_closure = _histogram_median(closure_hist, n_closure)
+        p90_closure = _histogram_p90(closure_hist, n_closure)
 
         # rating (1..5)
         rating_ok = case(
@@ -1835,7 +2348,7 @@ class AnalyticsService:
 
         # top categories/subtopics (count + priority_sum)
         cat_expr = func.coalesce(func.nullif(func.trim(base.c.ai_category), ""), "Other Civic Issues")
-        sub_expr = func.coalesce(func.nullif(func.trim(base.c.ai_subtopic), ""), "General Civic Issue")
+        sub_expr = base.c.ai_subtopic_norm
         pr = func.sum(func.coalesce(base.c.actionable_score, 0)).label("priority_sum")
 
         cat_rows = db.execute(
@@ -1861,7 +2374,7 @@ class AnalyticsService:
             .group_by(base.c.created_date)
             .order_by(base.c.created_date.asc())
         ).all()
-        created_daily = {d.strftime("%Y-%m-%d"): int(n) for (d, n) in created_rows if d}
+        created_daily = {d.isoformat(): int(n) for (d, n) in created_rows if d}
 
         closed_rows = db.execute(
             select(base.c.closed_date.label("d"), func.count().label("cnt"))
@@ -1869,13 +2382,13 @@ class AnalyticsService:
             .group_by(base.c.closed_date)
             .order_by(base.c.closed_date.asc())
         ).all()
-        closed_daily = {d.strftime("%Y-%m-%d"): int(n) for (d, n) in closed_rows if d}
+        closed_daily = {d.isoformat(): int(n) for (d, n) in closed_rows if d}
 
         closed_coverage = int(db.scalar(select(func.count()).where(base.c.closed_date.is_not(None)).select_from(base)) or 0)
         closed_coverage_pct = (float(closed_coverage) / float(total)) if total else 0.0
         show_closed = bool(closed_coverage_pct >= float(closed_series_min_coverage))
 
-        all_days = sorted(set(created_daily.keys()) | set(closed_daily.keys()))
+        all_days = sorted(created_daily.keys() | closed_daily.keys())
         series = [{"day": day, "created": created_daily.get(day, 0), "closed": closed_daily.get(day, 0)} for day in all_days]
 
         # insights (no extra AI calls)
@@ -2002,7 +2515,7 @@ class AnalyticsService:
             "rating": {"pct": round(100.0 * rating_known / total, 1) if total else 0.0, "known": rating_known, "total": total},
         }
 
-        sub_expr = func.coalesce(func.nullif(func.trim(base.c.ai_subtopic), ""), "General Civic Issue")
+        sub_expr = base.c.ai_subtopic_norm
         pr = func.sum(func.coalesce(base.c.actionable_score, 0)).label("priority_sum")
 
         # Top subtopics (count + priority_sum)
@@ -2070,31 +2583,17 @@ class AnalyticsService:
             else_=None,
         ).label("rating")
 
-        metrics_map = {s: {"closure": [], "rating": []} for s in top_subtopics}
-        if top_subtopics:
-            rows = db.execute(
-                select(sub_expr.label("subTopic"), closure_ok, rating_ok)
-                .where(sub_expr.in_(top_subtopics))
-            ).all()
-            for s, cd, rt in rows:
-                if s not in metrics_map:
-                    continue
-                if cd is not None:
-                    try:
-                        metrics_map[s]["closure"].append(float(cd))
-                    except Exception:
-                        pass
-                if rt is not None:
-                    try:
-                        metrics_map[s]["rating"].append(float(rt))
-                    except Exception:
-                        pass
+        metrics_map = (
+            _subtopic_sla_stats(db, select(sub_expr.label("subTopic"), closure_ok, rating_ok).where(sub_expr.in_(top_subtopics)))
+            if top_subtopics
+            else {}
+        )
 
         for r in top_list:
-            m = metrics_map.get(r["subTopic"]) or {"closure": [], "rating": []}
-            med = self._median(m["closure"])
-            avg = (sum(m["rating"]) / len(m["rating"])) if m["rating"] else None
-            pct_over_30 = (sum(1 for x in m["closure"] if x > 30) / len(m["closure"]) * 100.0) if m["closure"] else None
+            m = metrics_map.get(r["subTopic"], {})
+            med = m.get("median_closure")
+            avg = m.get("avg_rating")
+            pct_over_30 = m["over_30"] * 100.0 if m.get("over_30") is not None else None
             r["median_sla_days"] = round(float(med), 2) if med is not None else None
             r["avg_rating"] = round(float(avg), 2) if avg is not None else None
             r["pct_over_30d"] = round(float(pct_over_30), 1) if pct_over_30 is not None else None
@@ -2178,7 +2677,7 @@ class AnalyticsService:
             category=category,
             source=source,
         )
-        u_sub = func.coalesce(func.nullif(func.trim(u_q.c.ai_subtopic), ""), "General Civic Issue")
+        u_sub = u_q.c.ai_subtopic_norm
         u_counts = (
             select(u_sub.label("subTopic"), func.count().label("cnt"))
             .group_by(u_sub)
@@ -2218,7 +2717,7 @@ class AnalyticsService:
             unique_out.append(
                 {
                     "grievance_id": gid,
-                    "created_date": cd.strftime("%Y-%m-%d") if cd else "",
+                    "created_date": cd.isoformat() if cd else "",
                     "ward": wardn or "",
                     "department": deptn or "",
                     "subTopic": sub or "",
@@ -2258,7 +2757,7 @@ class AnalyticsService:
                 category=category,
                 source=source,
             )
-            w_sub = func.coalesce(func.nullif(func.trim(wq.c.ai_subtopic), ""), "General Civic Issue")
+            w_sub = wq.c.ai_subtopic_norm
             w_pr = func.sum(func.coalesce(wq.c.actionable_score, 0)).label("priority_sum")
             ward_rows_raw = db.execute(
                 select(w_sub.label("subTopic"), func.count().label("count"), w_pr)
@@ -2286,11 +2785,12 @@ class AnalyticsService:
             ent_vals = db.execute(
                 select(wq.c.ai_entities_json).where((wq.c.ai_entities_json.is_not(None)) & (func.trim(wq.c.ai_entities_json) != ""))
             ).scalars().all()
-            ctr: Counter[str] = Counter()
+            ctr: dict[str, int] = {}
             for s in ent_vals:
                 for e in self._parse_entities(s):
-                    ctr[e] += 1
-            ward_entities = [{"entity": k, "count": int(v)} for k, v in ctr.most_common(entities_top_n)]
+                    ctr[e] = ctr.get(e, 0) + 1
+            top_entities = sorted(ctr.items(), key=lambda kv: kv[1], reverse=True)[:entities_top_n]
+            ward_entities = [{"entity": k, "count": int(v)} for k, v in top_entities]
 
         # Department focus: derive from this dataset scope (trimmed) and default to TOP department by volume.
         dept_expr = func.trim(base.c.department_name)
@@ -2317,7 +2817,7 @@ class AnalyticsService:
                 category=category,
                 source=source,
             )
-            d_sub = func.coalesce(func.nullif(func.trim(dq.c.ai_subtopic), ""), "General Civic Issue")
+            d_sub = dq.c.ai_subtopic_norm
             d_pr = func.sum(func.coalesce(dq.c.actionable_score, 0)).label("priority_sum")
             d_rows = db.execute(
                 select(d_sub.label("subTopic"), func.count().label("count"), d_pr)
@@ -2326,7 +2826,7 @@ class AnalyticsService:
                 .limit(by_dept_top_n)
             ).all()
             subs = [s for (s, _n, _p) in d_rows]
-            d_map = {s: {"closure": [], "rating": []} for s in subs}
+            d_map: dict[str, dict[str, float | None]] = {}
             if subs:
                 d_jd = func.julianday(dq.c.closed_date) - func.julianday(dq.c.created_date)
                 d_closed_days = case(
@@ -2347,28 +2847,16 @@ class AnalyticsService:
                     ),
                     else_=None,
                 ).label("rating")
-                d_rows2 = db.execute(select(d_sub.label("subTopic"), d_closure_ok, d_rating_ok).where(d_sub.in_(subs))).all()
-                for s, cd, rt in d_rows2:
-                    if s not in d_map:
-                        continue
-                    if cd is not None:
-                        try:
-                            d_map[s]["closure"].append(float(cd))
-                        except Exception:
-                            pass
-                    if rt is not None:
-                        try:
-                            d_map[s]["rating"].append(float(rt))
-                        except Exception:
-                            pass
+                d_map = _subtopic_sla_stats(
+                    db, select(d_sub.label("subTopic"), d_closure_ok, d_rating_ok).where(d_sub.in_(subs))
+                )
 
             for s, n, p in d_rows:
-                clos = d_map.get(s, {}).get("closure", [])
-                rats = d_map.get(s, {}).get("rating", [])
-                med = self._median(clos)
-                pct_over_30 = (sum(1 for x in clos if x > 30) / len(clos) * 100.0) if clos else None
-                avg_rt = (sum(rats) / len(rats)) if rats else None
-                low_rt_pct = (sum(1 for x in rats if x <= 2) / len(rats) * 100.0) if rats else None
+                m = d_map.get(s, {})
+                med = m.get("median_closure")
+                pct_over_30 = m["over_30"] * 100.0 if m.get("over_30") is not None else None
+                avg_rt = m.get("avg_rating")
+                low_rt_pct = m["low_rating"] * 100.0 if m.get("low_rating") is not None else None
                 dept_table.append(
                     {
                         "subTopic": s,
@@ -2393,7 +2881,7 @@ class AnalyticsService:
                 category=category,
                 source=source,
             )
-            t_sub = func.coalesce(func.nullif(func.trim(tq.c.ai_subtopic), ""), "General Civic Issue")
+            t_sub = tq.c.ai_subtopic_norm
             rows = db.execute(
                 select(
                     tq.c.created_month.label("month"),
@@ -2468,6 +2956,7 @@ class AnalyticsService:
             },
         }
 
+    @_cached_result()
     def executive_overview(
         self,
         db: Session,
@@ -2488,7 +2977,7 @@ class AnalyticsService:
             GrievanceProcessed.created_date <= end_date,
         )
         if wards:
-            q = q.where(GrievanceProcessed.ward_name.in_(wards))
+            q = q.where(_ward_in(GrievanceProcessed.ward_name, wards))
         if department:
             q = q.where(GrievanceProcessed.department_name == department)
         if ai_category:
@@ -2509,7 +2998,7 @@ class AnalyticsService:
         status_breakdown = [{"status": (s or "Unknown"), "count": int(n)} for (s, n) in status_rows]
 
         # AI fields: treat NULL/"" as General Civic Issue for subtopics
-        sub_expr = func.coalesce(func.nullif(func.trim(base.c.ai_subtopic), ""), "General Civic Issue")
+        sub_expr = base.c.ai_subtopic_norm
         cat_expr = func.coalesce(func.nullif(func.trim(base.c.ai_category), ""), "Other Civic Issues")
 
         cat_rows = db.execute(
@@ -2536,7 +3025,7 @@ class AnalyticsService:
             .order_by(base.c.created_date.asc())
         ).all()
         grievances_over_time = [
-            {"date": d.strftime("%Y-%m-%d"), "count": int(n)} for (d, n) in trend_rows if d
+            {"date": d.isoformat(), "count": int(n)} for (d, n) in trend_rows if d
         ]
 
         # avg feedback rating (1..5)
@@ -2592,6 +3081,7 @@ class AnalyticsService:
             },
         }
 
+    @_cached_result()
     def top_subtopics(
         self,
         db: Session,
@@ -2605,29 +3095,19 @@ class AnalyticsService:
         top_n: int = 10,
     ) -> dict:
         top_n = max(1, min(int(top_n or 10), 25))
-        q = select(GrievanceProcessed.ai_subtopic).where(
-            GrievanceProcessed.created_date.is_not(None),
-            GrievanceProcessed.created_date >= start_date,
-            GrievanceProcessed.created_date <= end_date,
+        rows = _top_subtopics_daily(
+            db,
+            start_date=start_date,
+            end_date=end_date,
+            wards=wards,
+            department=department,
+            ai_category=ai_category,
+            source=source,
+            top_n=top_n,
         )
-        if wards:
-            q = q.where(GrievanceProcessed.ward_name.in_(wards))
-        if department:
-            q = q.where(GrievanceProcessed.department_name == department)
-        if ai_category:
-            q = q.where(GrievanceProcessed.ai_category == ai_category)
-        if source:
-            q = q.where(GrievanceProcessed.source_raw_filename == source)
-        base = q.subquery()
-        sub_expr = func.coalesce(func.nullif(func.trim(base.c.ai_subtopic), ""), "General Civic Issue")
-        rows = db.execute(
-            select(sub_expr.label("subTopic"), func.count())
-            .group_by(sub_expr)
-            .order_by(func.count().desc())
-            .limit(top_n)
-        ).all()
         return {"rows": [{"subTopic": s, "count": int(n)} for (s, n) in rows], "top_n": top_n}
 
+    @_cached_result()
     def top_subtopics_by_ward(
         self,
         db: Session,
@@ -2644,28 +3124,19 @@ class AnalyticsService:
         if not ward:
             return {"ward": "", "rows": [], "top_n": int(top_n or 5)}
         top_n = max(1, min(int(top_n or 5), 15))
-        q = select(GrievanceProcessed.ai_subtopic).where(
-            GrievanceProcessed.created_date.is_not(None),
-            GrievanceProcessed.created_date >= start_date,
-            GrievanceProcessed.created_date <= end_date,
-            GrievanceProcessed.ward_name == ward,
+        rows = _top_subtopics_daily(
+            db,
+            start_date=start_date,
+            end_date=end_date,
+            wards=[ward],
+            department=department,
+            ai_category=ai_category,
+            source=source,
+            top_n=top_n,
         )
-        if department:
-            q = q.where(GrievanceProcessed.department_name == department)
-        if ai_category:
-            q = q.where(GrievanceProcessed.ai_category == ai_category)
-        if source:
-            q = q.where(GrievanceProcessed.source_raw_filename == source)
-        base = q.subquery()
-        sub_expr = func.coalesce(func.nullif(func.trim(base.c.ai_subtopic), ""), "General Civic Issue")
-        rows = db.execute(
-            select(sub_expr.label("subTopic"), func.count())
-            .group_by(sub_expr)
-            .order_by(func.count().desc())
-            .limit(top_n)
-        ).all()
         return {"ward": ward, "rows": [{"subTopic": s, "count": int(n)} for (s, n) in rows], "top_n": top_n}
 
+    @_cached_result()
     def top_subtopics_by_department(
         self,
         db: Session,
@@ -2682,32 +3153,79 @@ class AnalyticsService:
         if not department:
             return {"department": "", "rows": [], "top_n": int(top_n or 10)}
         top_n = max(1, min(int(top_n or 10), 25))
-        q = select(GrievanceProcessed.ai_subtopic).where(
-            GrievanceProcessed.created_date.is_not(None),
-            GrievanceProcessed.created_date >= start_date,
-            GrievanceProcessed.created_date <= end_date,
-            GrievanceProcessed.department_name == department,
+        rows = _top_subtopics_daily(
+            db,
+            start_date=start_date,
+            end_date=end_date,
+            wards=wards,
+            department=department,
+            ai_category=ai_category,
+            source=source,
+            top_n=top_n,
         )
-        if wards:
-            q = q.where(GrievanceProcessed.ward_name.in_(wards))
-        if ai_category:
-            q = q.where(GrievanceProcessed.ai_category == ai_category)
-        if source:
-            q = q.where(GrievanceProcessed.source_raw_filename == source)
-        base = q.subquery()
-        sub_expr = func.coalesce(func.nullif(func.trim(base.c.ai_subtopic), ""), "General Civic Issue")
-        rows = db.execute(
-            select(sub_expr.label("subTopic"), func.count())
-            .group_by(sub_expr)
-            .order_by(func.count().desc())
-            .limit(top_n)
-        ).all()
         return {
             "department": department,
             "rows": [{"subTopic": s, "count": int(n)} for (s, n) in rows],
             "top_n": top_n,
         }
 
+    @_cached_result()
+    def all_subtopic_rollups(
+        self,
+        db: Session,
+        *,
+        start_date: dt.date,
+        end_date: dt.date,
+        ai_category: str | None = None,
+        source: str | None = None,
+        top_n: int = 5,
+    ) -> dict:
+        """
+        Global, per-ward and per-department top sub-topics in one round trip (same counts as the
+        top_subtopics* endpoints). Postgres uses GROUPING SETS; other dialects a UNION ALL of the three.
+        """
+        top_n = max(1, min(int(top_n or 5), 25))
+        conds = _subtopic_daily_filters(start_date, end_date, ai_category=ai_category, source=source)
+        sub, ward, dept = SubtopicDaily.sub_topic, SubtopicDaily.ward_name, SubtopicDaily.department_name
+        n = func.sum(SubtopicDaily.cnt)
+
+        if db.get_bind().dialect.name == "postgresql":
+            gw, gd = func.grouping(ward), func.grouping(dept)
+            kind = case((gw == 0, "ward"), (gd == 0, "department"), else_="global")
+            key = case((gw == 0, ward), (gd == 0, dept), else_=None)
+            stmt = (
+                select(kind, key, sub, n)
+                .where(*conds)
+                .group_by(func.grouping_sets(tuple_(sub), tuple_(sub, ward), tuple_(sub, dept)))
+            )
+        else:
+            stmt = union_all(
+                select(literal("global"), null(), sub, n).where(*conds).group_by(sub),
+                select(literal("ward"), ward, sub, n).where(*conds).group_by(ward, sub),
+                select(literal("department"), dept, sub, n).where(*conds).group_by(dept, sub),
+            )
+
+        groups: dict[tuple[str, str | None], list[tuple[str, int]]] = defaultdict(list)
+        for k, key_v, s_, cnt in db.execute(stmt):
+            if k != "global" and not key_v:
+                continue  # undimensioned rows only count towards the global ranking
+            groups[(k, key_v)].append((s_, int(cnt or 0)))
+
+        def _top(items: list[tuple[str, int]]) -> list[dict]:
+            items.sort(key=lambda kv: kv[1], reverse=True)
+            return [{"subTopic": s_, "count": c} for (s_, c) in items[:top_n]]
+
+        out: dict = {"global": [], "byWard": {}, "byDepartment": {}, "top_n": top_n}
+        for (k, key_v), items in groups.items():
+            if k == "global":
+                out["global"] = _top(items)
+            elif k == "ward":
+                out["byWard"][key_v] = _top(items)
+            else:
+                out["byDepartment"][key_v] = _top(items)
+        return out
+
+    @_cached_result()
     def subtopic_trend(
         self,
         db: Session,
@@ -2728,10 +3246,10 @@ class AnalyticsService:
             GrievanceProcessed.created_date.is_not(None),
             GrievanceProcessed.created_date >= start_date,
             GrievanceProcessed.created_date <= end_date,
-            func.coalesce(func.nullif(func.trim(GrievanceProcessed.ai_subtopic), ""), "General Civic Issue") == subtopic,
+            GrievanceProcessed.ai_subtopic_norm == subtopic,
         )
         if wards:
-            q = q.where(GrievanceProcessed.ward_name.in_(wards))
+            q = q.where(_ward_in(GrievanceProcessed.ward_name, wards))
         if department:
             q = q.where(GrievanceProcessed.department_name == department)
         if ai_category:
@@ -2747,6 +3265,7 @@ class AnalyticsService:
         months = [{"month": (m or ""), "count": int(n)} for (m, n) in rows if m]
         return {"subTopic": subtopic, "months": months}
 
+    @_cached_result()
     def one_of_a_kind_complaints(
         self,
         db: Session,
@@ -2765,35 +3284,42 @@ class AnalyticsService:
         """
         limit = max(5, min(int(limit or 25), 100))
 
-        q = self._processed_base(
-            start_date=start_date,
-            end_date=end_date,
-            wards=wards,
-            department=department,
-            ai_category=ai_category,
-            source=source,
-        ).subquery()
-        sub_expr = func.coalesce(func.nullif(func.trim(q.c.ai_subtopic), ""), "General Civic Issue")
-
-        counts = (
-            select(sub_expr.label("subTopic"), func.count().label("cnt"))
-            .group_by(sub_expr)
-            .having(func.count() == 1)
-            .cte("one_counts")
+        # One pass over the filtered rows: a per-subtopic window count marks the singletons.
+        gp = GrievanceProcessed
+        scoped = (
+            self._processed_base(
+                start_date=start_date,
+                end_date=end_date,
+                wards=wards,
+                department=department,
+                ai_category=ai_category,
+                source=source,
+            )
+            .with_only_columns(
+                gp.grievance_id,
+                gp.created_date,
+                gp.ward_name,
+                gp.department_name,
+                gp.ai_category,
+                gp.ai_subtopic_norm,
+                func.substr(gp.subject, 1, 180).label("subject"),
+                func.count().over(partition_by=gp.ai_subtopic_norm).label("sub_n"),
+            )
+            .subquery("scoped")
         )
 
         rows = db.execute(
             select(
-                q.c.grievance_id,
-                q.c.created_date,
-                q.c.ward_name,
-                q.c.department_name,
-                q.c.ai_category,
-                sub_expr.label("subTopic"),
-                q.c.subject,
+                scoped.c.grievance_id,
+                scoped.c.created_date,
+                scoped.c.ward_name,
+                scoped.c.department_name,
+                scoped.c.ai_category,
+                scoped.c.ai_subtopic_norm,
+                scoped.c.subject,
             )
-            .join(counts, counts.c.subTopic == sub_expr)
-            .order_by(q.c.created_date.desc())
+            .where(scoped.c.sub_n == 1)
+            .order_by(scoped.c.created_date.desc())
             .limit(limit)
         ).all()
 
@@ -2802,17 +3328,18 @@ class AnalyticsService:
             out.append(
                 {
                     "grievance_id": gid,
-                    "created_date": cd.strftime("%Y-%m-%d") if cd else "",
+                    "created_date": cd.isoformat() if cd else "",
                     "ward": ward or "",
                     "department": dept or "",
                     "ai_category": cat or "",
                     "ai_subtopic": sub or "",
-                    "subject": (subj or "")[:180],
+                    "subject": subj or "",
                 }
             )
 
         return {"definition": "Sub-Topics with exactly 1 complaint in the selected filters.", "rows": out, "limit": limit}
 
+    @_cached_result(freshness=_raw_freshness)
     def subtopics_top(
         self,
         db: Session,
@@ -2825,35 +3352,33 @@ class AnalyticsService:
         Top AI sub-topics overall (uses stored GrievanceStructured.sub_issue).
         Excludes empty values. Excludes "General Civic Issue" unless it exceeds a threshold.
         """
-        base = self._base(db, f).subquery()
-        total = db.scalar(select(func.count()).select_from(base)) or 0
+        total = db.scalar(select(func.count()).select_from(GrievanceRaw).where(*self._base_filters(f))) or 0
 
         limit = max(1, min(int(limit or 10), 25))
 
+        # "General Civic Issue" only counts when it reaches include_general_min_pct of the total; the
+        # threshold and the top-N cut both run in SQL so only `limit` rows come back.
+        sub = GrievanceStructured.sub_issue
+        cnt = func.count(GrievanceStructured.id)
         rows = db.execute(
-            select(GrievanceStructured.sub_issue, func.count(GrievanceStructured.id))
+            select(sub, cnt)
             .join(GrievanceRaw, GrievanceRaw.id == GrievanceStructured.raw_id)
-            .where(GrievanceRaw.id.in_(select(base.c.id)))
-            .where(GrievanceStructured.sub_issue.is_not(None))
-            .where(func.trim(GrievanceStructured.sub_issue) != "")
-            .group_by(GrievanceStructured.sub_issue)
-            .order_by(func.count(GrievanceStructured.id).desc())
+            .where(*self._base_filters(f, structured_joined=True), sub.is_not(None))
+            .where(func.trim(sub) != "")
+            .group_by(sub)
+            .having((func.trim(sub) != "General Civic Issue") | (cnt >= float(include_general_min_pct) * float(total)))
+            .order_by(cnt.desc())
+            .limit(limit)
         ).all()
 
         out = []
-        for sub, n in rows:
-            sub = str(sub or "").strip()
-            if not sub:
-                continue
+        for sub_issue, n in rows:
             pct = (float(n) / float(total)) if total else 0.0
-            if sub == "General Civic Issue" and pct < float(include_general_min_pct):
-                continue
-            out.append({"subTopic": sub, "count": int(n), "pct": round(pct, 4)})
-            if len(out) >= limit:
-                break
+            out.append({"subTopic": str(sub_issue).strip(), "count": int(n), "pct": round(pct, 4)})
 
         return {"total": int(total), "limit": limit, "rows": out, "ai_meta": self._ai_meta(db)}
 
+    @_cached_result(freshness=_raw_freshness)
     def subtopics_by_ward(self, db: Session, f: Filters, *, ward: str, limit: int = 5) -> dict:
         """
         Top AI sub-topics for a specific ward (stored sub_issue).
@@ -2863,15 +3388,13 @@ class AnalyticsService:
             return {"ward": "", "total": 0, "limit": int(limit or 5), "rows": [], "ai_meta": self._ai_meta(db)}
 
         f2 = Filters(start_date=f.start_date, end_date=f.end_date, wards=[ward], department=f.department, category=f.category)
-        base = self._base(db, f2).subquery()
-        total = db.scalar(select(func.count()).select_from(base)) or 0
+        total = db.scalar(select(func.count()).select_from(GrievanceRaw).where(*self._base_filters(f2))) or 0
         limit = max(1, min(int(limit or 5), 15))
 
         rows = db.execute(
             select(GrievanceStructured.sub_issue, func.count(GrievanceStructured.id))
             .join(GrievanceRaw, GrievanceRaw.id == GrievanceStructured.raw_id)
-            .where(GrievanceRaw.id.in_(select(base.c.id)))
-            .where(GrievanceStructured.sub_issue.is_not(None))
+            .where(*self._base_filters(f2, structured_joined=True), GrievanceStructured.sub_issue.is_not(None))
             .where(func.trim(GrievanceStructured.sub_issue) != "")
             .group_by(GrievanceStructured.sub_issue)
             .order_by(func.count(GrievanceStructured.id).desc())
@@ -2888,6 +3411,7 @@ class AnalyticsService:
 
         return {"ward": ward, "total": int(total), "limit": limit, "rows": out, "ai_meta": self._ai_meta(db)}
 
+    @_cached_result(freshness=_raw_freshness)
     def subtopics_by_department(self, db: Session, f: Filters, *, department: str, limit: int = 10) -> dict:
         """
         Top AI sub-topics for a specific department (stored sub_issue).
@@ -2897,15 +3421,13 @@ class AnalyticsService:
             return {"department": "", "total": 0, "limit": int(limit or 10), "rows": [], "ai_meta": self._ai_meta(db)}
 
         f2 = Filters(start_date=f.start_date, end_date=f.end_date, wards=f.wards, department=department, category=f.category)
-        base = self._base(db, f2).subquery()
-        total = db.scalar(select(func.count()).select_from(base)) or 0
+        total = db.scalar(select(func.count()).select_from(GrievanceRaw).where(*self._base_filters(f2))) or 0
         limit = max(1, min(int(limit or 10), 25))
 
         rows = db.execute(
             select(GrievanceStructured.sub_issue, func.count(GrievanceStructured.id))
             .join(GrievanceRaw, GrievanceRaw.id == GrievanceStructured.raw_id)
-            .where(GrievanceRaw.id.in_(select(base.c.id)))
-            .where(GrievanceStructured.sub_issue.is_not(None))
+            .where(*self._base_filters(f2, structured_joined=True), GrievanceStructured.sub_issue.is_not(None))
             .where(func.trim(GrievanceStructured.sub_issue) != "")
             .group_by(GrievanceStructured.sub_issue)
             .order_by(func.count(GrievanceStructured.id).desc())
@@ -2922,47 +3444,28 @@ class AnalyticsService:
 
         return {"department": department, "total": int(total), "limit": limit, "rows": out, "ai_meta": self._ai_meta(db)}
 
+    @_cached_result(freshness=_raw_freshness)
     def subtopics_trend(self, db: Session, f: Filters, *, subtopic: str) -> dict:
         """
-        Month-wise trend for one sub-topic.
-        Uses DB aggregation when possible (SQLite), falls back to Python grouping otherwise.
+        Month-wise trend for one sub-topic, grouped on the stored grievances_raw.created_month.
         """
         subtopic = (subtopic or "").strip()
         if not subtopic:
             return {"subTopic": "", "total": 0, "months": [], "ai_meta": self._ai_meta(db)}
 
-        base = self._base(db, f).subquery()
-
-        if str(settings.database_url).startswith("sqlite:"):
-            month_expr = func.strftime("%Y-%m", GrievanceRaw.created_date)
-            rows = db.execute(
-                select(month_expr, func.count(GrievanceRaw.id))
-                .join(GrievanceStructured, GrievanceStructured.raw_id == GrievanceRaw.id)
-                .where(GrievanceRaw.id.in_(select(base.c.id)))
-                .where(GrievanceStructured.sub_issue == subtopic)
-                .where(GrievanceRaw.created_date.is_not(None))
-                .group_by(month_expr)
-                .order_by(month_expr.asc())
-            ).all()
-            months = [{"month": (m or ""), "count": int(n)} for (m, n) in rows if m]
-            total = sum(x["count"] for x in months)
-            return {"subTopic": subtopic, "total": int(total), "months": months, "ai_meta": self._ai_meta(db)}
-
-        # Fallback (portable)
-        rows2 = db.execute(
-            select(GrievanceRaw.created_date)
+        conds = self._base_filters(f, structured_joined=True)
+        month = GrievanceRaw.created_month
+        rows = db.execute(
+            select(month, func.count(GrievanceRaw.id))
             .join(GrievanceStructured, GrievanceStructured.raw_id == GrievanceRaw.id)
-            .where(GrievanceRaw.id.in_(select(base.c.id)))
-            .where(GrievanceStructured.sub_issue == subtopic)
-            .where(GrievanceRaw.created_date.is_not(None))
-        ).scalars().all()
-        by_month: dict[str, int] = defaultdict(int)
-        for d in rows2:
-            if not d:
-                continue
-            by_month[d.strftime("%Y-%m")] += 1
-        months = [{"month": k, "count": int(by_month[k])} for k in sorted(by_month.keys())]
-        total = sum(by_month.values())
+            .where(*conds, GrievanceStructured.sub_issue == subtopic)
+            .where(month.is_not(None))
+            .group_by(month)
+            .order_by(month.asc())
+        ).all()
+        months = [{"month": m, "count": int(n)} for (m, n) in rows]
+        total = sum(x["count"] for x in months)
         return {"subTopic": subtopic, "total": int(total), "months": months, "ai_meta": self._ai_meta(db)}
 
-
+# Shared instance; FastAPI dependencies return this instead of constructing one per request.
+analytics_service = AnalyticsService()
@@ -1,21 +1,30 @@
 from __future__ import annotations
 
-import csv
 import datetime as dt
+import hashlib
 import json
 import os
+import re
 import shutil
+import threading
 import uuid
-from dataclasses import dataclass
+import warnings
+from dataclasses import asdict, dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import BinaryIO, Iterator
 
-from sqlalchemy import select
+import pandas as pd
+from sqlalchemy import exists, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only
 
 from config import settings
-from models import GrievanceRaw, GrievanceStructured
-from services.ai_service import AIService
+from models import AIResponseCache, GrievanceRaw, GrievanceStructured, month_key, sentiment_id
+from services.ai_service import AIOutput, ai_service
+from services.analytics_service import invalidate_analytics_cache
 
 
 def _ensure_dirs() -> None:
@@ -23,37 +32,156 @@ def _ensure_dirs() -> None:
     Path(settings.data_processed_dir).mkdir(parents=True, exist_ok=True)
 
 
-def _parse_date(value: str | None) -> dt.date | None:
-    if not value:
+# Date part of a client export value: year-first (2025-12-22, 2025/12/22) or day-first (22-12-2025, 22/12/2025),
+# with one separator used throughout. Anything after the first "T"/space (a time of day) is ignored.
+_DATE_RE = re.compile(r"(\d{1,4})([-/])(\d{1,2})\2(\d{1,4})")
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_token(token: str) -> dt.date | None:
+    # Exports repeat the same few hundred dates across many rows, so parses are memoised.
+    if len(token) == 10 and token[4] == "-" and token[7] == "-":
+        # Canonical ISO date: the C-implemented fromisoformat handles it without the regex.
+        try:
+            return dt.date.fromisoformat(token)
+        except ValueError:
+            pass
+    m = _DATE_RE.fullmatch(token)
+    if not m:
+        return None
+    a, _, b, c = m.groups()
+    if len(a) == 4 and len(c) <= 2:
+        y, mo, d = a, b, c
+    elif len(a) <= 2 and len(c) == 4:
+        d, mo, y = a, b, c
+    else:
+        return None
+    try:
+        return dt.date(int(y), int(mo), int(d))
+    except ValueError:
         return None
-    value = value.strip()
+
+
+def _parse_date(value: str | None) -> dt.date | None:
     if not value:
         return None
-    # Common client exports include time (e.g., "22-12-2025 09:52 AM"). Support both date and datetime.
-    # Try full datetime formats first, then fall back to date-only formats, then "first token" parsing.
-    for fmt in (
-        "%d-%m-%Y %I:%M %p",
-        "%d/%m/%Y %I:%M %p",
-        "%Y-%m-%d %H:%M:%S",
-        "%Y-%m-%d %H:%M",
-        "%d-%m-%Y",
-        "%d/%m/%Y",
-        "%Y-%m-%d",
-        "%Y/%m/%d",
-    ):
-        try:
-            return dt.datetime.strptime(value, fmt).date()
-        except ValueError:
-            continue
-    # If a time component exists but doesn't match known formats, take first token as date.
-    token = value.split("T", 1)[0].split(" ", 1)[0].strip()
-    if token and token != value:
-        for fmt in ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%Y/%m/%d"):
-            try:
-                return dt.datetime.strptime(token, fmt).date()
-            except ValueError:
-                continue
-    return None
+    # Common client exports include time (e.g., "22-12-2025 09:52 AM"); only the date part is kept.
+    # One regex match picks the layout instead of trying strptime formats until one stops raising.
+    token = value.strip().split("T", 1)[0].split(" ", 1)[0]
+    return _parse_date_token(token) if token else None
+
+
+def _parse_date_column(values: pd.Series) -> list[dt.date | None]:
+    """
+    Parse one ingest chunk of a date column. The layout is detected once from the first non-empty value
+    and the whole chunk is parsed in C by pandas with that fixed format; values that don't fit it
+    (mixed layouts, bad dates) go through _parse_date, so results match the per-value parser.
+    """
+    tokens = values.str.strip().str.split("T", n=1).str[0].str.split(" ", n=1).str[0]
+    sample = next((t for t in tokens if t), None)
+    m = _DATE_RE.fullmatch(sample) if sample else None
+    if not m:
+        return [_parse_date(v) for v in values]
+    a, sep, _, c = m.groups()
+    fmt = f"%Y{sep}%m{sep}%d" if len(a) == 4 else f"%d{sep}%m{sep}%Y" if len(c) == 4 else None
+    if fmt is None:
+        return [_parse_date(v) for v in values]
+    parsed = pd.to_datetime(tokens, format=fmt, errors="coerce")
+    return [
+        ts.date() if not pd.isna(ts) else (_parse_date(v) if t else None)
+        for ts, t, v in zip(parsed, tokens, values)
+    ]
+
+
+_CSV_BLOCK_SIZE = 8 << 20
+
+
+class _ShortCsvRows(Exception):
+    """The pyarrow reader met a row with fewer fields than the header (it can only skip such rows, not pad them)."""
+
+
+class _RaggedRows:
+    """
+    Counts CSV rows with more fields than the header; the readers skip them (rows with fewer fields are
+    padded with empty cells instead). Instances are pyarrow invalid_row_handlers, which may be called
+    from the reader's parsing threads.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.short = False
+        self._lock = threading.Lock()
+
+    def add(self, n: int = 1) -> None:
+        with self._lock:
+            self.count += n
+
+    def __call__(self, row) -> str:
+        if row.actual_columns < row.expected_columns:
+            # Abort the pyarrow read; _iter_csv_chunks turns this into _ShortCsvRows.
+            self.short = True
+            return "error"
+        self.add()
+        return "skip"
+
+
+def _iter_csv_chunks_pandas(csv_path: str, ragged: _RaggedRows) -> Iterator[pd.DataFrame]:
+    # Rows with too many fields are skipped: "warn" reports each one as "Skipping line N: ..." in a
+    # ParserWarning, which is how they're counted. Rows with too few are padded with "" (the missing
+    # trailing fields, under keep_default_na=False), matching csv.DictReader's restval handling.
+    reader = pd.read_csv(
+        csv_path,
+        dtype=str,
+        keep_default_na=False,
+        encoding="utf-8-sig",
+        chunksize=_INGEST_CHUNK,
+        on_bad_lines="warn",
+    )
+    with reader:
+        while True:
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always", pd.errors.ParserWarning)
+                try:
+                    chunk = next(reader)
+                except StopIteration:
+                    return
+            ragged.add(sum(str(w.message).count("Skipping line") for w in caught))
+            yield chunk
+
+
+def _iter_csv_chunks(csv_path: str, headers: list[str], ragged: _RaggedRows) -> Iterator[pd.DataFrame]:
+    """
+    Yield the CSV body as all-string DataFrames of at most _INGEST_CHUNK rows (column names = `headers`).
+    Uses pyarrow's streaming, multithreaded CSV reader when installed, else pandas' chunked C parser.
+    Rows with more fields than the header are skipped and counted in `ragged`; short rows are padded with ""
+    by the pandas reader, while the pyarrow reader raises _ShortCsvRows on the first one (possibly after
+    yielding earlier chunks) so the caller can re-read the file with _iter_csv_chunks_pandas.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+    except ImportError:
+        yield from _iter_csv_chunks_pandas(csv_path, ragged)
+        return
+
+    try:
+        reader = pacsv.open_csv(
+            csv_path,
+            # Names come from the (BOM-aware) pandas header read, so both paths label columns identically.
+            read_options=pacsv.ReadOptions(block_size=_CSV_BLOCK_SIZE, skip_rows=1, column_names=headers),
+            convert_options=pacsv.ConvertOptions(column_types={h: pa.string() for h in headers}),
+            # Free-text cells often contain line breaks inside quotes; without this they'd split the record.
+            parse_options=pacsv.ParseOptions(newlines_in_values=True, invalid_row_handler=ragged),
+        )
+        for batch in reader:
+            frame = batch.to_pandas()
+            # Record batches follow the block size; re-slice so each INSERT stays within the parameter limit.
+            for start in range(0, len(frame), _INGEST_CHUNK):
+                yield frame.iloc[start : start + _INGEST_CHUNK]
+    except pa.ArrowInvalid as e:
+        if ragged.short:
+            raise _ShortCsvRows() from e
+        raise
 
 
 def _parse_float(value: str | None) -> float | None:
@@ -68,6 +196,13 @@ def _parse_float(value: str | None) -> float | None:
         return None
 
 
+def _resolution_days(created: dt.date | None, closed: dt.date | None) -> int | None:
+    if not created or not closed:
+        return None
+    d = (closed - created).days
+    return d if d >= 0 else None
+
+
 def _normalize_headers(headers: list[str]) -> dict[str, str]:
     # maps normalized -> original
     out: dict[str, str] = {}
@@ -82,99 +217,261 @@ def _pick(norm_map: dict[str, str], *candidates: str) -> str | None:
             return norm_map[c]
     return None
 
+# Rows per multi-VALUES INSERT (11 bound columns -> ~11k parameters, within SQLite's default limit).
+_INGEST_CHUNK = 1000
+_UPLOAD_COPY_CHUNK = 1024 * 1024
+
+
+def _insert_ignore_duplicates(db: Session, rows: list[dict]) -> int:
+    """
+    Insert a chunk of grievances_raw rows, silently skipping grievance_ids that already exist
+    (including duplicates within the chunk). Returns the number of rows actually inserted.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        stmt = sqlite_insert(GrievanceRaw).values(rows).on_conflict_do_nothing(index_elements=["grievance_id"])
+    elif dialect == "postgresql":
+        stmt = pg_insert(GrievanceRaw).values(rows).on_conflict_do_nothing(index_elements=["grievance_id"])
+    else:
+        # No portable INSERT-OR-IGNORE; fall back to per-row savepoints.
+        n = 0
+        for r in rows:
+            try:
+                with db.begin_nested():
+                    db.add(GrievanceRaw(**r))
+                    db.flush()
+                n += 1
+            except IntegrityError:
+                continue
+        return n
+    # Single multi-row INSERT: rowcount is SQLite changes() / Postgres affected rows.
+    return int(db.execute(stmt).rowcount or 0)
+
+
+def _text_hash(text: str) -> str:
+    # Case/whitespace-insensitive, so copies of the same form letter share one cache entry.
+    return hashlib.sha256(" ".join((text or "").lower().split()).encode("utf-8")).hexdigest()
+
+
+def _cached_ai_outputs(db: Session, hashes: list[str]) -> dict[str, AIOutput]:
+    rows = db.execute(
+        select(AIResponseCache.text_hash, AIResponseCache.structured_json).where(
+            AIResponseCache.text_hash.in_(set(hashes))
+        )
+    ).all()
+    return {h: AIOutput(**json.loads(js)) for h, js in rows}
+
+
+def _store_ai_outputs(db: Session, outs: dict[str, AIOutput]) -> None:
+    rows = [{"text_hash": h, "structured_json": json.dumps(asdict(o))} for h, o in outs.items()]
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite_insert if dialect == "sqlite" else pg_insert)(AIResponseCache).values(rows)
+        # Newest answer wins, so a reprocess pass replaces whatever an earlier run cached for the text.
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["text_hash"], set_={"structured_json": stmt.excluded.structured_json}
+            )
+        )
+    else:
+        for r in rows:
+            db.merge(AIResponseCache(**r))
+
+
+# process_pending_structuring only reads these; skips loading raw_payload_json (the full source row).
+_STRUCTURING_COLS = load_only(
+    GrievanceRaw.grievance_id,
+    GrievanceRaw.grievance_text,
+    GrievanceRaw.ward,
+    GrievanceRaw.department,
+    GrievanceRaw.created_date,
+    GrievanceRaw.closed_date,
+    GrievanceRaw.feedback_star,
+)
+
+
+# Anti-join as NOT EXISTS: SQLite probes the unique raw_id index per raw row and stops at the first match,
+# instead of materialising a LEFT JOIN and filtering on NULL.
+_UNSTRUCTURED = ~exists().where(GrievanceStructured.raw_id == GrievanceRaw.id)
+
+
+def _upsert_structured(db: Session, rows: list[dict]) -> int:
+    """
+    Write a batch of grievances_structured rows keyed on raw_id, refreshing the AI fields of rows that
+    already exist (re-processing, or another worker got there first). Returns the number of rows written.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite_insert if dialect == "sqlite" else pg_insert)(GrievanceStructured).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["raw_id"],
+            set_={k: stmt.excluded[k] for k in rows[0] if k != "raw_id"},
+        )
+        db.execute(stmt)
+        return len(rows)
+    # No portable upsert: look up the batch's existing rows in one query, then per-row savepoints
+    # (a concurrent writer can still insert between the lookup and our INSERT).
+    existing_by_raw = {
+        st.raw_id: st
+        for st in db.execute(
+            select(GrievanceStructured).where(GrievanceStructured.raw_id.in_([r["raw_id"] for r in rows]))
+        ).scalars()
+    }
+    n = 0
+    for r in rows:
+        try:
+            with db.begin_nested():
+                existing = existing_by_raw.get(r["raw_id"])
+                if existing:
+                    for k, v in r.items():
+                        setattr(existing, k, v)
+                else:
+                    db.add(GrievanceStructured(**r))
+                db.flush()
+            n += 1
+        except IntegrityError:
+            continue
+    return n
+
+
 
 @dataclass(frozen=True)
 class UploadResult:
     stored_raw_path: str
     inserted: int
     skipped_duplicates: int
+    # Rows dropped because they had more fields than the header.
+    skipped_malformed: int = 0
 
 
 class DataService:
     def __init__(self) -> None:
         _ensure_dirs()
 
-    def store_uploaded_csv(self, tmp_path: str, original_filename: str) -> str:
+    def store_uploaded_csv(self, src: BinaryIO, original_filename: str) -> str:
+        """Stream an uploaded file object into data_raw_dir (1 MiB at a time) and return the stored path."""
         _ensure_dirs()
         stamp = dt.datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
         safe_name = "".join(ch for ch in original_filename if ch.isalnum() or ch in ("-", "_", ".", " ")).strip()
         if not safe_name:
             safe_name = "grievances.csv"
         dest = Path(settings.data_raw_dir) / f"{stamp}_{uuid.uuid4().hex[:8]}_{safe_name}"
-        shutil.copyfile(tmp_path, dest)
+        with open(dest, "wb") as out:
+            shutil.copyfileobj(src, out, length=_UPLOAD_COPY_CHUNK)
         return str(dest)
 
     def ingest_csv_into_db(self, db: Session, csv_path: str) -> UploadResult:
         _ensure_dirs()
-        inserted = 0
-        skipped = 0
-
-        with open(csv_path, "r", newline="", encoding="utf-8-sig") as f:
-            reader = csv.DictReader(f)
-            if not reader.fieldnames:
-                raise ValueError("CSV has no headers")
-            norm_map = _normalize_headers(list(reader.fieldnames))
-
-            col_gid = _pick(norm_map, "grievance_id", "complaint_id", "id", "ticket_id")
-            # Client exports often use "Subject" as the complaint narrative; accept that as grievance_text.
-            col_text = _pick(norm_map, "grievance_text", "complaint_text", "description", "details", "text", "subject", "complaint_subject")
-            # Client exports often use "Date" with time.
-            col_created = _pick(
-                norm_map,
-                "created_date",
-                "lodged_date",
-                "registered_date",
-                "date_lodged",
-                "date",
-                "created_on",
-                "created_datetime",
-                "created_at",
-            )
-            col_closed = _pick(
-                norm_map,
-                "closed_date",
-                "resolved_date",
-                "date_closed",
-                "closed_on",
-                "closed_datetime",
-                "closed_at",
+
+        try:
+            headers = list(pd.read_csv(csv_path, nrows=0, encoding="utf-8-sig").columns)
+        except pd.errors.EmptyDataError:
+            headers = []
+        if not headers:
+            raise ValueError("CSV has no headers")
+        norm_map = _normalize_headers(headers)
+
+        col_gid = _pick(norm_map, "grievance_id", "complaint_id", "id", "ticket_id")
+        # Client exports often use "Subject" as the complaint narrative; accept that as grievance_text.
+        col_text = _pick(norm_map, "grievance_text", "complaint_text", "description", "details", "text", "subject", "complaint_subject")
+        # Client exports often use "Date" with time.
+        col_created = _pick(
+            norm_map,
+            "created_date",
+            "lodged_date",
+            "registered_date",
+            "date_lodged",
+            "date",
+            "created_on",
+            "created_datetime",
+            "created_at",
+        )
+        col_closed = _pick(
+            norm_map,
+            "closed_date",
+            "resolved_date",
+            "date_closed",
+            "closed_on",
+            "closed_datetime",
+            "closed_at",
+        )
+        col_ward = _pick(norm_map, "ward", "ward_name", "ward_no", "ward_number")
+        col_dept = _pick(norm_map, "department", "dept", "service", "category_department")
+        col_rating = _pick(norm_map, "feedback_star", "star_rating", "citizen_feedback_rating", "rating", "feedback_rating")
+
+        if not col_gid or not col_text:
+            raise ValueError(
+                "CSV must include at least grievance_id and grievance_text columns "
+                "(case-insensitive)."
             )
-            col_ward = _pick(norm_map, "ward", "ward_name", "ward_no", "ward_number")
-            col_dept = _pick(norm_map, "department", "dept", "service", "category_department")
-            col_rating = _pick(norm_map, "feedback_star", "star_rating", "citizen_feedback_rating", "rating", "feedback_rating")
-
-            if not col_gid or not col_text:
-                raise ValueError(
-                    "CSV must include at least grievance_id and grievance_text columns "
-                    "(case-insensitive)."
-                )
 
-            for row in reader:
-                gid = (row.get(col_gid) or "").strip()
-                text = (row.get(col_text) or "").strip()
-                if not gid or not text:
+        # Streamed, all-string chunks (bounded memory); per-column work is vectorised and rows are
+        # only materialised for the bulk INSERT. Every column is read because raw_payload_json keeps the full row.
+        def _insert_chunks(chunks: Iterator[pd.DataFrame]) -> tuple[int, int]:
+            inserted = skipped = 0
+            for chunk in chunks:
+                chunk = chunk.fillna("")
+                gids = chunk[col_gid].str.strip()
+                texts = chunk[col_text].str.strip()
+                keep = (gids != "") & (texts != "")
+                if not keep.all():
+                    chunk, gids, texts = chunk[keep], gids[keep], texts[keep]
+                if chunk.empty:
                     continue
 
-                try:
-                    with db.begin_nested():
-                        raw = GrievanceRaw(
-                            grievance_id=gid,
-                            created_date=_parse_date(row.get(col_created)) if col_created else None,
-                            closed_date=_parse_date(row.get(col_closed)) if col_closed else None,
-                            ward=(row.get(col_ward) or "").strip() or None if col_ward else None,
-                            department=(row.get(col_dept) or "").strip() or None if col_dept else None,
-                            feedback_star=_parse_float(row.get(col_rating)) if col_rating else None,
-                            grievance_text=text,
-                            raw_payload_json=json.dumps(row, ensure_ascii=False),
-                        )
-                        db.add(raw)
-                        db.flush()
-                        inserted += 1
-                except IntegrityError:
-                    skipped += 1
-                    continue
+                none = [None] * len(chunk)
+                created = _parse_date_column(chunk[col_created]) if col_created else none
+                closed = _parse_date_column(chunk[col_closed]) if col_closed else none
+                wards = [v or None for v in chunk[col_ward].str.strip()] if col_ward else none
+                depts = [v or None for v in chunk[col_dept].str.strip()] if col_dept else none
+                ratings = [_parse_float(v) for v in chunk[col_rating]] if col_rating else none
+                # One C-level JSON encode for the whole chunk instead of json.dumps per row. JSON escapes
+                # newlines inside strings, so splitting the lines output on "\n" yields exactly one object per row.
+                payloads = chunk.to_json(orient="records", lines=True, force_ascii=False).rstrip("\n").split("\n")
+
+                pending = [
+                    {
+                        "grievance_id": gid,
+                        "created_date": c,
+                        "created_month": month_key(c),
+                        "closed_date": cl,
+                        "resolution_days": _resolution_days(c, cl),
+                        "ward": w,
+                        "department": d,
+                        "feedback_star": r,
+                        "grievance_text": text,
+                        "raw_payload_json": payload,
+                    }
+                    for gid, text, c, cl, w, d, r, payload in zip(
+                        gids, texts, created, closed, wards, depts, ratings, payloads
+                    )
+                ]
+                n = _insert_ignore_duplicates(db, pending)
+                inserted += n
+                skipped += len(pending) - n
+            return inserted, skipped
 
-        return UploadResult(stored_raw_path=csv_path, inserted=inserted, skipped_duplicates=skipped)
+        ragged = _RaggedRows()
+        try:
+            # pyarrow can't pad short rows: it stops with _ShortCsvRows, the savepoint drops what it had
+            # inserted, and the file is re-read by pandas, which pads them.
+            with db.begin_nested():
+                inserted, skipped = _insert_chunks(_iter_csv_chunks(csv_path, headers, ragged))
+        except _ShortCsvRows:
+            ragged = _RaggedRows()
+            inserted, skipped = _insert_chunks(_iter_csv_chunks_pandas(csv_path, ragged))
+
+        # All chunks land in one transaction; request-scoped sessions (get_db) don't commit on their own.
+        db.commit()
+        if inserted:
+            invalidate_analytics_cache()
+        if ragged.count:
+            print(f"[INGEST] Skipped {ragged.count} malformed CSV row(s) in {csv_path}")
+        return UploadResult(
+            stored_raw_path=csv_path, inserted=inserted, skipped_duplicates=skipped, skipped_malformed=ragged.count
+        )
 
     def has_any_data(self, db: Session) -> bool:
         return db.scalar(select(GrievanceRaw.id).limit(1)) is not None
@@ -194,12 +491,13 @@ class DataService:
         - never crashes pipeline; continues on AI failures
         """
         bs = max(5, min(int(batch_size), 10))
-        ai = AIService()
+        ai = ai_service
         processed = 0
         batches = 0
+        reprocess = reprocess_mock or reprocess_unknown
 
         while batches < max_batches:
-            if reprocess_mock or reprocess_unknown:
+            if reprocess:
                 # Re-run previously structured records that were produced via fallback (is_mock)
                 # and/or have an "Unknown" category.
                 from sqlalchemy import or_
@@ -212,6 +510,7 @@ class DataService:
                 raws = (
                     db.execute(
                         select(GrievanceRaw)
+                        .options(_STRUCTURING_COLS)
                         .join(GrievanceStructured, GrievanceStructured.raw_id == GrievanceRaw.id)
                         .where(or_(*conds))
                         .order_by(GrievanceRaw.id.asc())
@@ -224,8 +523,8 @@ class DataService:
                 raws = (
                     db.execute(
                         select(GrievanceRaw)
-                        .outerjoin(GrievanceStructured, GrievanceStructured.raw_id == GrievanceRaw.id)
-                        .where(GrievanceStructured.id.is_(None))
+                        .options(_STRUCTURING_COLS)
+                        .where(_UNSTRUCTURED)
                         .order_by(GrievanceRaw.id.asc())
                         .limit(bs)
                     )
@@ -236,8 +535,8 @@ class DataService:
                 break
             batches += 1
 
-            for raw in raws:
-                record = {
+            records = [
+                {
                     "grievance_id": raw.grievance_id,
                     "grievance_text": raw.grievance_text,
                     "ward": raw.ward,
@@ -246,68 +545,57 @@ class DataService:
                     "closed_date": raw.closed_date.isoformat() if raw.closed_date else None,
                     "feedback_star": raw.feedback_star,
                 }
-                out = ai.structure_grievance(record)
-                # Idempotency guard: another worker/request may have already structured this raw_id.
-                # Commit per-row to keep SQLite happy and avoid aborting the whole batch on a single duplicate.
-                try:
-                    with db.begin_nested():
-                        existing = db.execute(
-                            select(GrievanceStructured).where(GrievanceStructured.raw_id == raw.id).limit(1)
-                        ).scalar_one_or_none()
-                        if existing:
-                            existing.category = out.category
-                            existing.sub_issue = out.sub_issue
-                            existing.sentiment = out.sentiment
-                            existing.severity = out.severity
-                            existing.repeat_flag = out.repeat_flag
-                            existing.delay_risk = out.delay_risk
-                            existing.dissatisfaction_reason = out.dissatisfaction_reason
-                            existing.ai_rationale = "Gemini JSON structuring (or fallback Unknown)."
-                            existing.ai_provider = out.ai_provider
-                            existing.ai_engine = out.ai_engine
-                            existing.ai_model = out.ai_model
-                            existing.ai_version = "v3"
-                            existing.is_mock = not out.raw_ok
-                        else:
-                            s = GrievanceStructured(
-                                raw_id=raw.id,
-                                category=out.category,
-                                sub_issue=out.sub_issue,
-                                sentiment=out.sentiment,
-                                severity=out.severity,
-                                repeat_flag=out.repeat_flag,
-                                delay_risk=out.delay_risk,
-                                dissatisfaction_reason=out.dissatisfaction_reason,
-                                ai_rationale="Gemini JSON structuring (or fallback Unknown).",
-                                ai_provider=out.ai_provider,
-                                ai_engine=out.ai_engine,
-                                ai_model=out.ai_model,
-                                ai_version="v3",
-                                is_mock=not out.raw_ok,
-                            )
-                            db.add(s)
-                        db.flush()
-                    db.commit()
-                    processed += 1
-                except IntegrityError:
-                    db.rollback()
-                    continue
-
-        remaining = (
-            db.execute(
-                select(GrievanceRaw.id)
-                .outerjoin(GrievanceStructured, GrievanceStructured.raw_id == GrievanceRaw.id)
-                .where(GrievanceStructured.id.is_(None))
-                .limit(1)
-            ).first()
-            is not None
-        )
-        remaining_mock = (
-            db.execute(
-                select(GrievanceStructured.id).where(GrievanceStructured.is_mock.is_(True)).limit(1)
-            ).first()
-            is not None
-        )
+                for raw in raws
+            ]
+            # Exact-text cache first; only unseen texts go to Gemini (one packed request, per-record
+            # fallback inside). Reprocess passes skip the lookup: asking Gemini again is their whole point.
+            # Only usable answers are cached; fallbacks and "Unknown" categories get retried later.
+            hashes = [_text_hash(raw.grievance_text) for raw in raws]
+            cached = {} if reprocess else _cached_ai_outputs(db, hashes)
+            miss = [i for i, h in enumerate(hashes) if h not in cached]
+            fresh = ai.structure_grievances_batch([records[i] for i in miss]) if miss else []
+            by_idx = dict(zip(miss, fresh))
+            outs = [by_idx[i] if i in by_idx else cached[h] for i, h in enumerate(hashes)]
+            _store_ai_outputs(
+                db,
+                {
+                    hashes[i]: o
+                    for i, o in by_idx.items()
+                    if o.raw_ok and (o.category or "").strip().lower() != "unknown"
+                },
+            )
+            rows = [
+                {
+                    "raw_id": raw.id,
+                    "category": out.category,
+                    "sub_issue": out.sub_issue,
+                    "sentiment": out.sentiment,
+                    "sentiment_id": sentiment_id(out.sentiment),
+                    "severity": out.severity,
+                    "repeat_flag": out.repeat_flag,
+                    "delay_risk": out.delay_risk,
+                    "dissatisfaction_reason": out.dissatisfaction_reason,
+                    "ai_rationale": "Gemini JSON structuring (or fallback Unknown).",
+                    "ai_provider": out.ai_provider,
+                    "ai_engine": out.ai_engine,
+                    "ai_model": out.ai_model,
+                    "ai_version": "v3",
+                    "is_mock": not out.raw_ok,
+                }
+                for raw, out in zip(raws, outs)
+            ]
+            processed += _upsert_structured(db, rows)
+            db.commit()
+
+        if processed:
+            invalidate_analytics_cache()
+        # Both end-of-run flags in one round-trip.
+        remaining, remaining_mock = db.execute(
+            select(
+                exists(select(GrievanceRaw.id).where(_UNSTRUCTURED)),
+                exists(select(GrievanceStructured.id).where(GrievanceStructured.is_mock.is_(True))),
+            )
+        ).one()
         return {
             "processed": processed,
             "batches": batches,
@@ -326,3 +614,5 @@ class DataService:
         }
 
 
+# Shared instance reused by routes and background workers.
+data_service = DataService()
@@ -7,6 +7,7 @@ import os
 import re
 import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
@@ -16,9 +17,10 @@ from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from config import settings
-from models import EnrichmentCheckpoint, EnrichmentExtraCheckpoint, EnrichmentRun, GrievanceRaw, GrievanceStructured
+from models import EnrichmentCheckpoint, EnrichmentExtraCheckpoint, EnrichmentRun, GrievanceRaw, GrievanceStructured, subtopic_norm
 from services.gemini_client import GeminiClient
 from services.actionable_score import ActionableInputs, compute_actionable_score
+from services.analytics_service import refresh_subtopic_daily
 
 
 REQUIRED_COLS = [
@@ -76,16 +78,56 @@ def _clean_text(s: str, *, max_chars: int = 2500) -> str:
     return s
 
 
-def _strip_cell_newlines(v: Any) -> Any:
-    if isinstance(v, str):
-        return re.sub(r"[\r\n]+", " ", v).strip()
-    return v
+_NEWLINES_RE = re.compile(r"[\r\n]+")
+
+
+def _strip_frame_newlines(df: pd.DataFrame, *, copy: bool = True) -> pd.DataFrame:
+    """
+    df with embedded newlines collapsed to a space (and surrounding whitespace stripped) in every
+    string cell, column-wise. Non-string cells in object columns are left as they were.
+    copy=False rewrites the columns of df itself instead of a copy.
+    """
+    out = df.copy() if copy else df
+    for c in out.select_dtypes(include="object").columns:
+        col = out[c]
+        try:
+            cleaned = col.str.replace(_NEWLINES_RE, " ", regex=True).str.strip()
+        except AttributeError:
+            # No string cells at all (e.g. an object column of datetimes); nothing to clean.
+            continue
+        # .str yields NaN for non-string cells (numbers, None); keep the originals there.
+        out[c] = cleaned.where(cleaned.notna(), col)
+    return out
 
 
 def _sha256(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
 
+def _write_parquet_mirror(df: pd.DataFrame, csv_path: Path) -> None:
+    """
+    Best-effort Parquet copy (snappy, dictionary-encoded) next to a CSV artifact, with the same
+    all-text cells as the CSV. pyarrow is optional: without it any stale mirror is removed instead.
+    """
+    pq_path = csv_path.with_suffix(".parquet")
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        pq_path.unlink(missing_ok=True)
+        return
+    tmp_path = pq_path.with_suffix(".parquet.tmp")
+    try:
+        table = pa.Table.from_pandas(df.astype("string"), preserve_index=False)
+        pq.write_table(table, tmp_path, compression="snappy", use_dictionary=True, data_page_size=1 << 20)
+        os.replace(tmp_path, pq_path)
+        print(f"[PIPELINE] Wrote Parquet mirror: {pq_path}")
+    except Exception as e:
+        tmp_path.unlink(missing_ok=True)
+        pq_path.unlink(missing_ok=True)
+        print(f"[PIPELINE] Parquet mirror skipped: {type(e).__name__}: {e}")
+
+
 @dataclass(frozen=True)
 class LatestRawFile:
     path: str
@@ -332,9 +374,8 @@ class EnrichmentService:
 
         # INPUT DATASET contains original columns + stable keys + sanitized AI input.
         # This is the explicit "dataset we pass to the code" for enrichment/analytics.
-        out_df = df.copy()
         # Make the CSV “1 record = 1 row” by stripping embedded newlines from ALL string cells.
-        out_df = out_df.applymap(_strip_cell_newlines)
+        out_df = _strip_frame_newlines(df)
         out_df["grievance_key"] = grievance_ids
         out_df["AI_Input_Text"] = ai_input_texts
         out_df["AI_InputHash"] = ai_hashes
@@ -349,6 +390,7 @@ class EnrichmentService:
         latest = Path(settings.data_processed_dir) / "input_dataset_latest.csv"
         out_df.to_csv(per_run, index=False)
         out_df.to_csv(latest, index=False)
+        _write_parquet_mirror(out_df, latest)
 
         print(f"[PIPELINE] Wrote INPUT DATASET file to: {per_run}")
         print(f"[PIPELINE] Updated INPUT DATASET latest pointer: {latest}")
@@ -886,6 +928,7 @@ class EnrichmentService:
                                     .values(
                                         ai_category=getattr(prev, "ai_category", None),
                                         ai_subtopic=getattr(prev, "ai_subtopic", None),
+                                        ai_subtopic_norm=subtopic_norm(getattr(prev, "ai_subtopic", None)),
                                         ai_confidence=getattr(prev, "ai_confidence", None),
                                         ai_issue_type=getattr(prev, "ai_issue_type", None),
                                         ai_entities_json=getattr(prev, "ai_entities_json", None),
@@ -1019,6 +1062,7 @@ class EnrichmentService:
                             .values(
                                 ai_category=r0.get("ai_category"),
                                 ai_subtopic=r0.get("ai_subtopic"),
+                                ai_subtopic_norm=subtopic_norm(r0.get("ai_subtopic")),
                                 ai_confidence=r0.get("ai_confidence"),
                                 ai_issue_type=r0.get("ai_issue_type"),
                                 ai_entities_json=r0.get("ai_entities_json"),
@@ -1043,6 +1087,8 @@ class EnrichmentService:
                 run.finished_at = dt.datetime.utcnow()
                 run.status = "completed"
                 db.commit()
+                # Processed rows got new AI labels: rebuild the subtopic aggregate the dashboards read.
+                refresh_subtopic_daily(db)
 
                 # File-pipeline: if we enriched a staged dataset, export AI outputs snapshot to ai_outputs folder.
                 if str(source).startswith("processed_data_"):
@@ -1183,6 +1229,10 @@ class EnrichmentService:
             if s.lower() in ("nan", "none", "<na>"):
                 return None
             return s
+        # Whole-column work up front: dates parsed once (format="mixed" keeps per-value inference) and all
+        # row payloads encoded in one C-level to_json call (NaN becomes null) instead of json.dumps per row.
+        created_dts = pd.to_datetime(created, errors="coerce", format="mixed")
+        payloads = df.to_json(orient="records", lines=True, force_ascii=False).rstrip("\n").split("\n")
         new_raw = []
         for i in range(len(df)):
             gid = str(grievance_ids.iloc[i]).strip()
@@ -1191,13 +1241,9 @@ class EnrichmentService:
             # Avoid duplicates already in DB AND duplicates inside the same file/run.
             if gid in seen_raw_ids:
                 continue
-            try:
-                created_dt = pd.to_datetime(created.iloc[i], errors="coerce")
-                created_date = created_dt.date() if pd.notna(created_dt) else None
-            except Exception:
-                created_date = None
+            created_dt = created_dts.iloc[i]
+            created_date = created_dt.date() if pd.notna(created_dt) else None
 
-            row_payload = df.iloc[i].to_dict()
             new_raw.append(
                 GrievanceRaw(
                     grievance_id=gid,
@@ -1207,7 +1253,7 @@ class EnrichmentService:
                     department=_clean_dim(depts.iloc[i]),
                     feedback_star=None,
                     grievance_text=ai_input_texts[i],
-                    raw_payload_json=json.dumps(row_payload, ensure_ascii=False),
+                    raw_payload_json=payloads[i],
                 )
             )
             seen_raw_ids.add(gid)
@@ -1378,93 +1424,100 @@ class EnrichmentService:
                 }
             )
 
-        # Process in batches of 10
+        # Process in batches of 10. Gemini calls for upcoming batches run concurrently (bounded by
+        # settings.gemini_concurrency); results are consumed and written in order on this thread.
         batch_size = 10
-        for start in range(0, len(work), batch_size):
-            batch = work[start : start + batch_size]
-            # Label batch; if batch fails, mark each item failed and continue
-            try:
-                labeled, model_used, usage = self._label_batch(batch)
-                if usage:
-                    for k in ("prompt_tokens", "output_tokens", "total_tokens"):
-                        if usage.get(k) is not None:
-                            token_usage_total[k] += int(usage.get(k) or 0)
-                    if model_used:
-                        m = token_usage_by_model.setdefault(model_used, {"prompt_tokens": 0, "output_tokens": 0, "total_tokens": 0})
+        batches = [work[start : start + batch_size] for start in range(0, len(work), batch_size)]
+        workers = max(1, min(len(batches), int(settings.gemini_concurrency or 1)))
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gemini-label")
+        futures = [pool.submit(self._label_batch, batch) for batch in batches]
+        try:
+            for batch, fut in zip(batches, futures):
+                # Label batch; if batch fails, mark each item failed and continue
+                try:
+                    labeled, model_used, usage = fut.result()
+                    if usage:
                         for k in ("prompt_tokens", "output_tokens", "total_tokens"):
                             if usage.get(k) is not None:
-                                m[k] += int(usage.get(k) or 0)
-            except Exception as e:
-                msg = f"{type(e).__name__}: {e}"
-                for item in batch:
-                    # If we're forcing reprocess but Gemini fails, do NOT overwrite an existing
-                    # successful checkpoint (preserve last-known-good labels).
-                    prev = existing_cp.get(item["grievance_key"])
-                    if force_reprocess and prev and not prev.ai_error:
-                        skipped += 1
-                        continue
-                    cp = EnrichmentCheckpoint(
-                        grievance_key=item["grievance_key"],
-                        ai_input_hash=item["ai_input_hash"],
-                        ai_category="Other Civic Issues",
-                        ai_subtopic="General Civic Issue",
-                        ai_confidence="Low",
-                        ai_model=settings.gemini_model_fallback,
-                        ai_run_timestamp=dt.datetime.utcnow(),
-                        ai_error=msg,
-                    )
-                    existing = db.execute(
-                        select(EnrichmentCheckpoint).where(EnrichmentCheckpoint.grievance_key == item["grievance_key"])
-                    ).scalar_one_or_none()
+                                token_usage_total[k] += int(usage.get(k) or 0)
+                        if model_used:
+                            m = token_usage_by_model.setdefault(model_used, {"prompt_tokens": 0, "output_tokens": 0, "total_tokens": 0})
+                            for k in ("prompt_tokens", "output_tokens", "total_tokens"):
+                                if usage.get(k) is not None:
+                                    m[k] += int(usage.get(k) or 0)
+                except Exception as e:
+                    msg = f"{type(e).__name__}: {e}"
+                    for item in batch:
+                        # If we're forcing reprocess but Gemini fails, do NOT overwrite an existing
+                        # successful checkpoint (preserve last-known-good labels).
+                        prev = existing_cp.get(item["grievance_key"])
+                        if force_reprocess and prev and not prev.ai_error:
+                            skipped += 1
+                            continue
+                        cp = EnrichmentCheckpoint(
+                            grievance_key=item["grievance_key"],
+                            ai_input_hash=item["ai_input_hash"],
+                            ai_category="Other Civic Issues",
+                            ai_subtopic="General Civic Issue",
+                            ai_confidence="Low",
+                            ai_model=settings.gemini_model_fallback,
+                            ai_run_timestamp=dt.datetime.utcnow(),
+                            ai_error=msg,
+                        )
+                        existing = db.execute(
+                            select(EnrichmentCheckpoint).where(EnrichmentCheckpoint.grievance_key == item["grievance_key"])
+                        ).scalar_one_or_none()
+                        if existing:
+                            existing.ai_input_hash = cp.ai_input_hash
+                            existing.ai_category = cp.ai_category
+                            existing.ai_subtopic = cp.ai_subtopic
+                            existing.ai_confidence = cp.ai_confidence
+                            existing.ai_model = cp.ai_model
+                            existing.ai_run_timestamp = cp.ai_run_timestamp
+                            existing.ai_error = cp.ai_error
+                        else:
+                            db.add(cp)
+                        failed += 1
+                    db.commit()
+                    self._update_run_progress(db, run_id, processed, skipped, failed)
+                    continue
+
+                # Write checkpoints + also upsert into grievance_raw/structured for analytics pages
+                for i, item in enumerate(batch):
+                    out = labeled[i]
+                    cat = self._category_sanitize(out["category"])
+                    sub = self._subtopic_sanitize(out["sub_topic"])
+                    conf = self._confidence_sanitize(out["confidence"])
+
+                    existing = existing_cp.get(item["grievance_key"])
                     if existing:
-                        existing.ai_input_hash = cp.ai_input_hash
-                        existing.ai_category = cp.ai_category
-                        existing.ai_subtopic = cp.ai_subtopic
-                        existing.ai_confidence = cp.ai_confidence
-                        existing.ai_model = cp.ai_model
-                        existing.ai_run_timestamp = cp.ai_run_timestamp
-                        existing.ai_error = cp.ai_error
+                        existing.ai_input_hash = item["ai_input_hash"]
+                        existing.ai_category = cat
+                        existing.ai_subtopic = sub
+                        existing.ai_confidence = conf
+                        existing.ai_model = model_used
+                        existing.ai_run_timestamp = dt.datetime.utcnow()
+                        existing.ai_error = None
                     else:
-                        db.add(cp)
-                    failed += 1
-                db.commit()
-                self._update_run_progress(db, run_id, processed, skipped, failed)
-                continue
-
-            # Write checkpoints + also upsert into grievance_raw/structured for analytics pages
-            for i, item in enumerate(batch):
-                out = labeled[i]
-                cat = self._category_sanitize(out["category"])
-                sub = self._subtopic_sanitize(out["sub_topic"])
-                conf = self._confidence_sanitize(out["confidence"])
-
-                existing = existing_cp.get(item["grievance_key"])
-                if existing:
-                    existing.ai_input_hash = item["ai_input_hash"]
-                    existing.ai_category = cat
-                    existing.ai_subtopic = sub
-                    existing.ai_confidence = conf
-                    existing.ai_model = model_used
-                    existing.ai_run_timestamp = dt.datetime.utcnow()
-                    existing.ai_error = None
-                else:
-                    existing = EnrichmentCheckpoint(
-                        grievance_key=item["grievance_key"],
-                        ai_input_hash=item["ai_input_hash"],
-                        ai_category=cat,
-                        ai_subtopic=sub,
-                        ai_confidence=conf,
-                        ai_model=model_used,
-                        ai_run_timestamp=dt.datetime.utcnow(),
-                        ai_error=None,
-                    )
-                    db.add(existing)
-                    existing_cp[item["grievance_key"]] = existing
+                        existing = EnrichmentCheckpoint(
+                            grievance_key=item["grievance_key"],
+                            ai_input_hash=item["ai_input_hash"],
+                            ai_category=cat,
+                            ai_subtopic=sub,
+                            ai_confidence=conf,
+                            ai_model=model_used,
+                            ai_run_timestamp=dt.datetime.utcnow(),
+                            ai_error=None,
+                        )
+                        db.add(existing)
+                        existing_cp[item["grievance_key"]] = existing
 
-                processed += 1
+                    processed += 1
 
-            db.commit()
-            self._update_run_progress(db, run_id, processed, skipped, failed)
+                db.commit()
+                self._update_run_progress(db, run_id, processed, skipped, failed)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
 
         # Regenerate enriched CSV
         self._write_enriched_csv(db, run_id, df, mapping, grievance_ids, ai_input_texts, ai_hashes)
@@ -1555,8 +1608,7 @@ class EnrichmentService:
         extra_rows = db.execute(select(EnrichmentExtraCheckpoint)).scalars().all()
         extra_map = {c.grievance_key: c for c in extra_rows}
 
-        out_df = df.copy()
-        out_df = out_df.applymap(_strip_cell_newlines)
+        out_df = _strip_frame_newlines(df)
         out_df["grievance_key"] = key_series
         out_df["AI_Input_Text"] = ai_input_texts
         out_df["AI_InputHash"] = ai_hashes
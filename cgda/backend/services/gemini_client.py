@@ -52,7 +52,8 @@ class GeminiClient:
     """
 
     def __init__(self) -> None:
-        pass
+        # Keep-alive connection pool shared by every call made through this client.
+        self._http = requests.Session()
 
     def generate_json(
         self,
@@ -197,7 +198,7 @@ class GeminiClient:
             },
         }
 
-        resp = requests.post(url, params=params, json=payload, timeout=timeout_s)
+        resp = self._http.post(url, params=params, json=payload, timeout=timeout_s)
         if resp.status_code in (429, 500, 502, 503, 504):
             raise GeminiError(
                 "Retryable Gemini error",
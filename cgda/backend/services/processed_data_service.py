@@ -14,19 +14,14 @@ from sqlalchemy import func, select, text
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from config import settings
-from models import EnrichmentCheckpoint, GrievanceProcessed, PreprocessRun
-from services.enrichment_service import EnrichmentService
+from models import GENERAL_SUBTOPIC, EnrichmentCheckpoint, GrievanceProcessed, PreprocessRun, subtopic_norm
+from services.analytics_service import refresh_subtopic_daily
+from services.enrichment_service import EnrichmentService, _strip_frame_newlines
 
 
 IST = ZoneInfo("Asia/Kolkata")
 
 
-def _strip_cell_newlines(v):
-    if isinstance(v, str):
-        return re.sub(r"[\r\n]+", " ", v).strip()
-    return v
-
-
 @dataclass(frozen=True)
 class PreprocessStatus:
     raw_filename: str
@@ -162,8 +157,8 @@ class ProcessedDataService:
             df = df.head(int(limit_rows))
         mapping = self._raw._map_columns(df)  # noqa: SLF001 (internal reuse; keeps behavior consistent)
 
-        # Strip embedded newlines so 1 record == 1 row consistently.
-        df = df.applymap(_strip_cell_newlines)
+        # Strip embedded newlines so 1 record == 1 row consistently (in place: df is ours, skip the extra copy).
+        df = _strip_frame_newlines(df, copy=False)
 
         # Helpers for optional columns (schema varies by input source)
         norm_to_actual = {re.sub(r"[^a-z0-9]+", " ", str(c).strip().lower()).strip(): c for c in df.columns}
@@ -363,8 +358,19 @@ class ProcessedDataService:
         status_mr = clean_opt_str(opt("status_mr"))
 
         # Pull AI fields from stored checkpoints (no Gemini).
-        cps = db.execute(select(EnrichmentCheckpoint)).scalars().all()
-        cp_map = {c.grievance_key: c for c in cps}
+        # Only the AI columns as plain rows: no ORM hydration or identity-map bookkeeping per checkpoint.
+        ec = EnrichmentCheckpoint
+        cps = db.execute(select(ec.grievance_key, ec.ai_category, ec.ai_subtopic, ec.ai_confidence, ec.ai_error)).all()
+        ai_cols = ["ai_category", "ai_subtopic", "ai_subtopic_norm", "ai_confidence"]
+        cp_df = pd.DataFrame.from_records(
+            [(c.grievance_key, c.ai_category, c.ai_subtopic, subtopic_norm(c.ai_subtopic), c.ai_confidence, c.ai_error) for c in cps],
+            columns=["grievance_key", *ai_cols, "ai_error"],
+        ).set_index("grievance_key")
+        # Errored checkpoints keep their key (they still win the ticket-key lookup) but carry no AI values;
+        # ai_subtopic_norm is NOT NULL and stays subtopic_norm(None), like rows with no checkpoint at all.
+        errored = cp_df["ai_error"].fillna("").astype(bool)
+        cp_df.loc[errored, ["ai_category", "ai_subtopic", "ai_confidence"]] = None
+        cp_df.loc[errored, "ai_subtopic_norm"] = GENERAL_SUBTOPIC
 
         # Ticket identity:
         # Prefer grievance_code for ticket identity, fallback to raw grievance_id.
@@ -421,84 +427,89 @@ class ProcessedDataService:
             kh = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
             return f"{tag}:{kh}"
 
-        rows = []
-        for i in keep_idx:
-            key = str(record_key.loc[i]).strip()
-            if not key or key.lower() == "nan":
-                continue
-            if mode == "append_delta":
-                rid = str(grievance_id_raw.loc[i]).strip() if pd.notna(grievance_id_raw.loc[i]) else ""
-                if rid and rid in existing_raw_ids:
-                    continue
-
-            # Prefer checkpoint keyed by ticket key (grievance_code), fallback to raw grievance id.
-            # This keeps AI fields populated even for id-dedup datasets where multiple rows share a ticket code.
-            tk = str(ticket_key.loc[i]).strip()
-            cp = (cp_map.get(tk) if tk else None) or cp_map.get(str(grievance_id_raw.loc[i]).strip())
-            if cp and cp.ai_error:
-                cp = None
-
-            # Derived: resolution days (close_date - grievance_date)
-            rd = None
-            try:
-                cd = closed_date.loc[i]
-                gd = created_date.loc[i]
-                if pd.notna(cd) and pd.notna(gd):
-                    delta = (cd - gd).days
-                    rd = int(delta) if delta >= 0 else None
-            except Exception:
-                rd = None
-
-            rows.append(
-                {
-                    # grievance_id is the dataset-level unique key (namespaced for variants)
-                    "grievance_id": _namespaced_id(key),
-                    "source_raw_filename": source_raw_filename,
-                    "raw_id": (str(grievance_id_raw.loc[i]).strip() if pd.notna(grievance_id_raw.loc[i]) else None),
-                    "source_row_index": (int(i) + source_row_index_offset) if i is not None else None,
-                    "created_at": created_utc.loc[i].to_pydatetime() if pd.notna(created_utc.loc[i]) else None,
-                    "created_date": created_date.loc[i] if pd.notna(created_date.loc[i]) else None,
-                    "created_month": str(created_month.loc[i]) if pd.notna(created_month.loc[i]) else None,
-                    "created_week": str(created_week.loc[i]) if pd.notna(created_week.loc[i]) else None,
-                    "ward_name": (ward.loc[i] if ward.loc[i] is not None else None),
-                    "department_name": (dept.loc[i] if dept.loc[i] is not None else None),
-                    "status": (status.loc[i] if status.loc[i] is not None else None),
-                    "subject": (str(subject.loc[i]).strip() or None),
-                    "description": (str(desc.loc[i]).strip() or None),
-                    "closing_remark": (str(closing.loc[i]).strip() or None),
-                    "grievance_code": (grievance_code.loc[i] if grievance_code.loc[i] is not None else None),
-                    "assignee_name": (assignee.loc[i] if assignee.loc[i] is not None else None),
-                    "closed_at": closed_utc.loc[i].to_pydatetime() if pd.notna(closed_utc.loc[i]) else None,
-                    "closed_date": closed_date.loc[i] if pd.notna(closed_date.loc[i]) else None,
-                    "feedback_rating": float(rating.loc[i]) if pd.notna(rating.loc[i]) else None,
-                    "resolution_days": rd,
-                    "forward_count": int(forward_count.loc[i]) if pd.notna(forward_count.loc[i]) else 0,
-                    "forwarded_at": fwd_utc.loc[i].to_pydatetime() if pd.notna(fwd_utc.loc[i]) else None,
-                    "forward_remark": (fwd_remark.loc[i] if fwd_remark.loc[i] is not None else None),
-                    "subject_mr": (subject_mr.loc[i] if subject_mr.loc[i] is not None else None),
-                    "description_mr": (description_mr.loc[i] if description_mr.loc[i] is not None else None),
-                    "department_name_mr": (department_mr.loc[i] if department_mr.loc[i] is not None else None),
-                    "status_mr": (status_mr.loc[i] if status_mr.loc[i] is not None else None),
-                    "ai_category": (cp.ai_category if cp else None),
-                    "ai_subtopic": (cp.ai_subtopic if cp else None),
-                    "ai_confidence": (cp.ai_confidence if cp else None),
-                }
-            )
-
-        if not rows:
+        # Derived: resolution days (close_date - grievance_date), computed column-wise; negative -> unknown.
+        resolution_days = (
+            pd.to_datetime(closed_date, errors="coerce") - pd.to_datetime(created_date, errors="coerce")
+        ).dt.days
+        resolution_days = resolution_days.where(resolution_days >= 0)
+
+        # Build the output column-wise over the representative rows (no per-row .loc lookups).
+        sel = pd.Index(keep_idx)
+        key = record_key.loc[sel]
+        keep = (key != "") & (key.str.lower() != "nan")
+        if mode == "append_delta":
+            keep &= ~grievance_id_raw.loc[sel].isin(existing_raw_ids)
+        sel = sel[keep.to_numpy()]
+
+        # Prefer checkpoint keyed by ticket key (grievance_code), fallback to raw grievance id.
+        # This keeps AI fields populated even for id-dedup datasets where multiple rows share a ticket code.
+        tk = ticket_key.loc[sel]
+        cp_key = tk.where((tk != "") & tk.isin(cp_df.index), grievance_id_raw.loc[sel])
+        ai = cp_df.reindex(cp_key.to_numpy())
+        ai["ai_subtopic_norm"] = ai["ai_subtopic_norm"].fillna(GENERAL_SUBTOPIC)
+
+        def text_or_none(s: pd.Series) -> pd.Series:
+            t = s.loc[sel].str.strip()
+            return t.where(t != "", None)
+
+        out = pd.DataFrame(
+            {
+                # grievance_id is the dataset-level unique key (namespaced for variants)
+                "grievance_id": key.loc[sel].map(_namespaced_id),
+                "source_raw_filename": source_raw_filename,
+                "raw_id": grievance_id_raw.loc[sel],
+                "source_row_index": sel + source_row_index_offset,
+                "created_at": created_utc.loc[sel],
+                "created_date": created_date.loc[sel],
+                "created_month": created_month.loc[sel],
+                "created_week": created_week.loc[sel],
+                "ward_name": ward.loc[sel],
+                "department_name": dept.loc[sel],
+                "status": status.loc[sel],
+                "subject": text_or_none(subject),
+                "description": text_or_none(desc),
+                "closing_remark": text_or_none(closing),
+                "grievance_code": grievance_code.loc[sel],
+                "assignee_name": assignee.loc[sel],
+                "closed_at": closed_utc.loc[sel],
+                "closed_date": closed_date.loc[sel],
+                "feedback_rating": rating.loc[sel],
+                "resolution_days": resolution_days.loc[sel].astype("Int64"),
+                "forward_count": forward_count.loc[sel].fillna(0).astype(int),
+                "forwarded_at": fwd_utc.loc[sel],
+                "forward_remark": fwd_remark.loc[sel],
+                "subject_mr": subject_mr.loc[sel],
+                "description_mr": description_mr.loc[sel],
+                "department_name_mr": department_mr.loc[sel],
+                "status_mr": status_mr.loc[sel],
+                **{c: ai[c].to_numpy() for c in ai_cols},
+            },
+            index=sel,
+        )
+        # NaN/NaT/NA -> None (NULL); datetime64 cells come out as Timestamps, which are datetime subclasses.
+        out = out.astype(object).where(out.notna(), None)
+        if out.empty:
             return 0
 
         # Idempotent upsert on grievance_id (SQLite).
         # This allows re-run without duplication and updates AI fields if checkpoints improved later.
-        for start in range(0, len(rows), 1000):
-            chunk = rows[start : start + 1000]
-            stmt = sqlite_insert(GrievanceProcessed).values(chunk)
-            update_cols = {c.name: getattr(stmt.excluded, c.name) for c in GrievanceProcessed.__table__.columns if c.name != "grievance_id"}
-            stmt = stmt.on_conflict_do_update(index_elements=["grievance_id"], set_=update_cols)
-            db.execute(stmt)
-            db.commit()
+        # One statement, executemany'd per 5000-row batch (records are materialised a batch at a time), and a
+        # single commit at the end: one WAL sync for the whole file instead of one per batch.
+        table = GrievanceProcessed.__table__
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["grievance_id"],
+            set_={c.name: stmt.excluded[c.name] for c in table.columns if c.name != "grievance_id"},
+        )
+        for start in range(0, len(out), 5000):
+            db.execute(stmt, out.iloc[start : start + 5000].to_dict(orient="records"))
+        db.commit()
 
-        return len(rows)
+        # Bulk load changes the value distribution; refresh planner stats so the composite indexes are used.
+        db.execute(text("PRAGMA analysis_limit=1000"))
+        db.execute(text("ANALYZE grievances_processed"))
+        refresh_subtopic_daily(db)
+        return len(out)
 
     def build_run_sample(self, db: Session, *, source: str, sample_size: int = 100) -> str:
         """
@@ -552,6 +563,7 @@ class ProcessedDataService:
             stmt = stmt.on_conflict_do_update(index_elements=["grievance_id"], set_=update_cols)
             db.execute(stmt)
             db.commit()
+        refresh_subtopic_daily(db)
         return sample_source
 
     def clone_sample_source(self, db: Session, *, source: str, output_source: str, sample_size: int = 100) -> str:
@@ -609,6 +621,7 @@ class ProcessedDataService:
             db.execute(stmt)
             db.commit()
 
+        refresh_subtopic_daily(db)
         return output_source
 
     def export_source_to_csv(
@@ -713,6 +726,8 @@ class ProcessedDataService:
                     if v is pd.NA:
                         v = None
                     d[c] = v
+            # Derived from ai_subtopic; older exports don't carry the column.
+            d["ai_subtopic_norm"] = subtopic_norm(d.get("ai_subtopic"))
             if d.get("grievance_id"):
                 payload.append(d)
 
@@ -735,6 +750,7 @@ class ProcessedDataService:
             db.execute(stmt)
             db.commit()
 
+        refresh_subtopic_daily(db)
         return len(payload)
 
     def backfill_ai_fields_from_source(
@@ -793,6 +809,9 @@ UPDATE grievances_processed
 SET
   ai_category = (SELECT ai_category FROM src WHERE src.join_key = grievances_processed.{key}),
   ai_subtopic = (SELECT ai_subtopic FROM src WHERE src.join_key = grievances_processed.{key}),
+  ai_subtopic_norm = (
+    SELECT coalesce(nullif(trim(ai_subtopic), ''), 'General Civic Issue') FROM src WHERE src.join_key = grievances_processed.{key}
+  ),
   ai_confidence = (SELECT ai_confidence FROM src WHERE src.join_key = grievances_processed.{key}),
   ai_issue_type = (SELECT ai_issue_type FROM src WHERE src.join_key = grievances_processed.{key}),
   ai_entities_json = (SELECT ai_entities_json FROM src WHERE src.join_key = grievances_processed.{key}),
@@ -818,6 +837,7 @@ WHERE source_raw_filename = :to_src
 """
         res = db.execute(text(sql), {"from_src": src, "to_src": tgt})
         db.commit()
+        refresh_subtopic_daily(db)
         try:
             return int(res.rowcount or 0)
         except Exception: